@@ -71,7 +71,10 @@ def main():
         print(f"   - {kind}: {count}")
 
     print("\nGraph generation complete!")
-    print(f"Graph saved to: {graph_location}")
+    print(f"Graph cached at: {generator.cache.location}")
+
+    # Keep a GraphML copy for external tools (Gephi, Cosmograph)
+    generator.export_graphml(str(graph_location))
     print("\nYou can now use this graph for further analysis.")
 
     # Step 6: Visualize the graph
@@ -0,0 +1,8 @@
+"""
+Benchmarks for Lean Graph Analysor (airspeed velocity).
+
+Run from the directory holding `asv.conf.json`:
+    asv run                        # benchmark the current commit
+    asv continuous main HEAD       # compare two commits, flag regressions
+    asv publish && asv preview     # history of every benchmark over time
+"""
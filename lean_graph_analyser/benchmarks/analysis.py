@@ -0,0 +1,89 @@
+"""Layout, metrics, reachability and plotting on a cached synthetic graph."""
+
+import os
+import shutil
+import tempfile
+
+from lean_graph_analyser.metrics.engine import MetricEngine, metric_func
+from lean_graph_analyser.reachability import ReachabilityIndex
+from lean_graph_analyser.utils.plot_graph import compute_mathlib_layout, plot_graph
+
+from .common import SIZES, TIMEOUT, cached_graph
+
+
+class Layout:
+    params = (SIZES, ["topological", "depth"])
+    param_names = ["n_nodes", "x_axis"]
+    timeout = TIMEOUT
+    number = 1
+    repeat = (1, 5, 60.0)
+
+    def setup(self, n_nodes, x_axis):
+        self.graph = cached_graph(n_nodes)
+
+    def time_layout(self, n_nodes, x_axis):
+        compute_mathlib_layout(self.graph, x_axis=x_axis)
+
+
+class Metrics:
+    """Each registered metric computed from scratch (no metric cache)."""
+
+    params = (
+        SIZES,
+        ["in_degree", "pagerank", "k_core", "transitive_dependencies", "sampled_betweenness", "approx_harmonic"],
+    )
+    param_names = ["n_nodes", "metric"]
+    timeout = TIMEOUT
+    number = 1
+    repeat = (1, 3, 60.0)
+
+    def setup(self, n_nodes, metric):
+        self.graph = cached_graph(n_nodes)
+
+    def time_metric(self, n_nodes, metric):
+        MetricEngine(self.graph).get(metric)
+
+    def peakmem_metric(self, n_nodes, metric):
+        MetricEngine(self.graph).get(metric)
+
+
+class Reachability:
+    params = SIZES
+    param_names = ["n_nodes"]
+    timeout = TIMEOUT
+    number = 1
+    repeat = (1, 3, 60.0)
+
+    def setup(self, n_nodes):
+        self.graph = cached_graph(n_nodes)
+        self.index = ReachabilityIndex.build(self.graph)
+        self.pairs = [(i * 7919 % n_nodes, i * 104729 % n_nodes) for i in range(1000)]
+
+    def time_build(self, n_nodes):
+        ReachabilityIndex.build(self.graph)
+
+    def time_1000_queries(self, n_nodes):
+        for u, v in self.pairs:
+            self.index.reaches(u, v)
+
+
+class Plot:
+    params = SIZES
+    param_names = ["n_nodes"]
+    timeout = TIMEOUT
+    number = 1
+    repeat = (1, 3, 60.0)
+
+    def setup(self, n_nodes):
+        self.graph = cached_graph(n_nodes)
+        self.directory = tempfile.mkdtemp(prefix="lean_graph_plot_")
+        self.centrality = metric_func("in_degree")
+
+    def teardown(self, n_nodes):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def time_plot(self, n_nodes):
+        plot_graph(
+            self.graph, centrality_func=self.centrality,
+            output_file=os.path.join(self.directory, "atlas.html"), open_browser=False,
+        )
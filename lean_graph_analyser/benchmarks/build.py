@@ -0,0 +1,76 @@
+"""Graph generation: extraction from a traced repo, and cache save/load."""
+
+import os
+import shutil
+import tempfile
+
+from lean_graph_analyser.cache.formats import cache_for
+from lean_graph_analyser.graph_generator import GraphGenerator
+from lean_graph_analyser.utils.notifier import EmptyNotifier
+from lean_graph_analyser.utils.synthetic import make_synthetic_repo
+
+from .common import SIZES, TIMEOUT, cached_graph
+
+
+class GraphBuild:
+    """Full `GraphGenerator.generate()` from a synthetic traced repo, without a cache."""
+
+    params = SIZES
+    param_names = ["n_nodes"]
+    timeout = TIMEOUT
+    number = 1
+    repeat = (1, 3, 60.0)
+    warmup_time = 0
+
+    def setup(self, n_nodes):
+        self.repo = make_synthetic_repo(n_nodes)
+        self.directory = tempfile.mkdtemp(prefix="lean_graph_build_")
+
+    def teardown(self, n_nodes):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _generate(self, workers=1):
+        # A fresh location every run: the previous run's cache must not be hit
+        location = tempfile.mkdtemp(dir=self.directory)
+        GraphGenerator(
+            self.repo, notifier=EmptyNotifier(), graph_location=os.path.join(location, "graph.graphml"),
+            workers=workers,
+        ).generate()
+
+    def time_build(self, n_nodes):
+        self._generate()
+
+    def time_build_parallel(self, n_nodes):
+        self._generate(workers=os.cpu_count() or 1)
+
+    def peakmem_build(self, n_nodes):
+        self._generate()
+
+
+class CacheIO:
+    """Saving and loading the graph cache in each format."""
+
+    params = (SIZES, ["columnar", "graphml"])
+    param_names = ["n_nodes", "cache_format"]
+    timeout = TIMEOUT
+    number = 1
+    repeat = (1, 5, 60.0)
+    warmup_time = 0
+
+    def setup(self, n_nodes, cache_format):
+        self.graph = cached_graph(n_nodes)
+        self.directory = tempfile.mkdtemp(prefix="lean_graph_cache_")
+        self.cache = cache_for(os.path.join(self.directory, "graph.graphml"), cache_format)
+        self.cache.save(self.graph)
+
+    def teardown(self, n_nodes, cache_format):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def time_save(self, n_nodes, cache_format):
+        self.cache.save(self.graph)
+
+    def time_load(self, n_nodes, cache_format):
+        self.cache.load()
+
+    def peakmem_load(self, n_nodes, cache_format):
+        self.cache.load()
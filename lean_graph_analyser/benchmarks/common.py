@@ -0,0 +1,43 @@
+"""
+Shared setup of the benchmarks: synthetic graphs at Mathlib-like sizes.
+
+Graphs are built once with `GraphGenerator` from a `SyntheticTracedRepo` and
+cached under `LEAN_GRAPH_BENCH_DIR` (default: a directory in the system temp
+dir), so only the build benchmarks pay for extraction.
+
+`LEAN_GRAPH_BENCH_SIZES` (comma-separated node counts) overrides the sizes,
+e.g. `LEAN_GRAPH_BENCH_SIZES=10000 asv run --quick` for a smoke run.
+"""
+
+import os
+import tempfile
+
+import igraph as ig
+
+from lean_graph_analyser.graph_generator import GraphGenerator
+from lean_graph_analyser.utils.notifier import EmptyNotifier
+from lean_graph_analyser.utils.synthetic import make_synthetic_repo
+
+SIZES = [int(n) for n in os.environ.get("LEAN_GRAPH_BENCH_SIZES", "10000,100000,500000").split(",")]
+
+BENCH_DIR = os.environ.get("LEAN_GRAPH_BENCH_DIR", os.path.join(tempfile.gettempdir(), "lean_graph_bench"))
+
+# Slow benchmarks run once per sample; a 500k build takes minutes
+TIMEOUT = 3600
+
+
+def graph_location(n_nodes: int) -> str:
+    return os.path.join(BENCH_DIR, f"synthetic_{n_nodes}", "graph.graphml")
+
+
+def cached_generator(n_nodes: int) -> GraphGenerator:
+    """Generator of the synthetic graph with `n_nodes` nodes, already generated (built once, then loaded)."""
+    generator = GraphGenerator(
+        make_synthetic_repo(n_nodes), notifier=EmptyNotifier(), graph_location=graph_location(n_nodes)
+    )
+    generator.generate()
+    return generator
+
+
+def cached_graph(n_nodes: int) -> ig.Graph:
+    return cached_generator(n_nodes).graph
@@ -0,0 +1,198 @@
+"""
+Vertex Attributes Module
+========================
+
+String vertex attributes stored as int codes.
+
+A graph built by `GraphGenerator` keeps only compact columns on its
+vertices: `name`, `start_line`, `end_line` and three int codes into string
+tables held once per graph, as graph attributes:
+
+    vertex column    graph attribute   resolves to
+    file_id          file_paths        file_path
+    kind_id          kinds             kind
+    namespace_id     namespaces        full_namespace, root_namespace, namespace
+
+A code of -1 means "none" (no file, or a name without a namespace, whose
+`full_namespace` is "Root"). `label` is the last component of `name`.
+
+The strings are resolved lazily, and only for the vertices asked for, by
+`vertex_strings`; `coded_column` gives a whole column as codes plus table,
+which is what group-bys and categorical encodings want. `decode_attributes`
+returns a copy carrying plain string columns, for GraphML export. Graphs
+that already carry a string column (older caches, hand-made graphs) are
+read as they are, and `encode_attributes` converts them.
+
+Example:
+    vertex_strings(g, "file_path", [0, 1])
+    codes, files = coded_column(g, "file_path")
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import igraph as ig
+import numpy as np
+import pandas as pd
+
+from lean_graph_analyser.symbols import ROOT_NAMESPACE, NamespaceTable
+
+# Int vertex column -> graph attribute holding its string table
+CODED_COLUMNS: Dict[str, str] = {
+    "file_id": "file_paths",
+    "kind_id": "kinds",
+    "namespace_id": "namespaces",
+}
+
+# String attribute -> the coded column it is resolved from (None: from `name`)
+STRING_ATTRIBUTES: Dict[str, Optional[str]] = {
+    "label": None,
+    "root_namespace": "namespace_id",
+    "namespace": "namespace_id",
+    "full_namespace": "namespace_id",
+    "file_path": "file_id",
+    "kind": "kind_id",
+}
+
+
+def has_attribute(g: ig.Graph, attribute: str) -> bool:
+    """True if `attribute` is a vertex column of `g` or can be resolved from one."""
+    attributes = g.vs.attributes()
+    if attribute in attributes:
+        return True
+    if attribute not in STRING_ATTRIBUTES:
+        return False
+    source = STRING_ATTRIBUTES[attribute] or "name"
+    return source in attributes and (source == "name" or CODED_COLUMNS[source] in g.attributes())
+
+
+def intern_table(table: Dict[str, int], values: Sequence[Optional[str]]) -> np.ndarray:
+    """
+    Codes of `values` in `table` (value -> code), adding new values at the
+    end; None maps to -1. Used to build and to merge the string tables.
+    """
+    return np.fromiter(
+        (-1 if value is None else table.setdefault(value, len(table)) for value in values),
+        dtype=np.int32,
+        count=len(values),
+    )
+
+
+def _codes(g: ig.Graph, column: str, vids: Optional[Sequence[int]]) -> np.ndarray:
+    values = g.vs[column] if vids is None else g.vs[list(vids)][column]
+    return np.asarray(values, dtype=np.int32)
+
+
+def _names(g: ig.Graph, vids: Optional[Sequence[int]]) -> List[str]:
+    return g.vs["name"] if vids is None else g.vs[list(vids)]["name"]
+
+
+def _labels(names: Sequence[str]) -> np.ndarray:
+    return np.array([name.rpartition(".")[2] for name in names], dtype=object)
+
+
+def vertex_strings(g: ig.Graph, attribute: str, vids: Optional[Sequence[int]] = None) -> List[Optional[str]]:
+    """
+    Values of a string vertex attribute, resolved from its codes.
+
+    Args:
+        g: The graph.
+        attribute: A plain vertex attribute, or one of `STRING_ATTRIBUTES`.
+        vids: Vertices to resolve, in order; all of them by default.
+
+    For "A.B.c": root "A", namespace "B", full namespace "A.B"; a name with one dot ("A.c") has namespace
+    "c", and a name without dots is its own root and namespace.
+    """
+    if attribute in g.vs.attributes():
+        return g.vs[attribute] if vids is None else g.vs[list(vids)][attribute]
+    if not has_attribute(g, attribute):
+        raise KeyError(f"The graph has no vertex attribute `{attribute}`.")
+    if attribute == "label":
+        return _labels(_names(g, vids)).tolist()
+
+    column = STRING_ATTRIBUTES[attribute]
+    codes = _codes(g, column, vids)
+    table = g[CODED_COLUMNS[column]]
+    if attribute in ("file_path", "kind"):
+        return np.array(table + [None], dtype=object)[codes].tolist()
+    if attribute == "full_namespace":
+        return np.array(table + [ROOT_NAMESPACE], dtype=object)[codes].tolist()
+
+    parts = [prefix.split(".", 2) for prefix in table]
+    if attribute == "root_namespace":
+        per_namespace = [p[0] for p in parts]
+    else:
+        per_namespace = [p[1] if len(p) > 1 else None for p in parts]
+    values = np.array(per_namespace + [None], dtype=object)[codes]
+    missing = values == None  # noqa: E711 (elementwise on object arrays)
+    if missing.any():
+        values[missing] = _labels(_names(g, vids))[missing]
+    return values.tolist()
+
+
+def coded_column(g: ig.Graph, attribute: str) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """
+    A string vertex attribute as (codes, table): the value of vertex v is
+    `table[codes[v]]`. Codes are int32 and never negative; "none" values
+    (None, or "Root" for names without a namespace) get a table slot of
+    their own. The table may hold values no vertex uses.
+    """
+    coded = attribute in ("file_path", "kind", "full_namespace") and attribute not in g.vs.attributes()
+    if coded and has_attribute(g, attribute):
+        # One value per table entry: the codes are used as they are
+        column = STRING_ATTRIBUTES[attribute]
+        table = list(g[CODED_COLUMNS[column]])
+        table.append(ROOT_NAMESPACE if attribute == "full_namespace" else None)
+        codes = _codes(g, column, None)
+        codes[codes < 0] = len(table) - 1
+        return codes, table
+
+    # Namespace and root components, labels and plain columns are factorized
+    codes, uniques = pd.factorize(np.asarray(vertex_strings(g, attribute), dtype=object))
+    table = list(uniques) + [None]
+    codes = codes.astype(np.int32)
+    codes[codes < 0] = len(table) - 1
+    return codes, table
+
+
+def encode_attributes(g: ig.Graph) -> None:
+    """
+    Replaces the plain string columns of `g` (as in caches written before
+    the coded columns) by `file_id`, `kind_id` and `namespace_id` in place.
+    """
+    attributes = g.vs.attributes()
+    for attribute, column in (("file_path", "file_id"), ("kind", "kind_id")):
+        if attribute in attributes:
+            table: Dict[str, int] = {}
+            g.vs[column] = intern_table(table, g.vs[attribute]).tolist()
+            g[CODED_COLUMNS[column]] = list(table)
+            del g.vs[attribute]
+    if "namespace_id" not in attributes:
+        namespaces = NamespaceTable()
+        g.vs["namespace_id"] = [
+            namespaces.intern(prefix) if dot else -1
+            for prefix, dot, _ in (name.rpartition(".") for name in g.vs["name"])
+        ]
+        g["namespaces"] = list(namespaces.names)
+    for attribute in ("label", "root_namespace", "namespace", "full_namespace"):
+        if attribute in attributes:
+            del g.vs[attribute]
+
+
+def decode_attributes(g: ig.Graph) -> ig.Graph:
+    """
+    Copy of `g` with every resolvable string attribute as a plain column and
+    no coded columns or string tables (GraphML cannot hold the tables).
+    A graph without coded columns is returned as it is.
+    """
+    if not any(column in g.vs.attributes() for column in CODED_COLUMNS):
+        return g
+    decoded = g.copy()
+    for attribute in STRING_ATTRIBUTES:
+        if attribute not in g.vs.attributes() and has_attribute(g, attribute):
+            decoded.vs[attribute] = vertex_strings(g, attribute)
+    for column, table in CODED_COLUMNS.items():
+        if column in decoded.vs.attributes():
+            del decoded.vs[column]
+        if table in decoded.attributes():
+            del decoded[table]
+    return decoded
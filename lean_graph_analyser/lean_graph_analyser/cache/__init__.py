@@ -0,0 +1,9 @@
+"""
+Graph Cache Package.
+
+This package contains the on-disk artifacts kept next to a generated graph:
+the graph cache formats, the per-file manifest used to detect which Lean
+sources changed, and the sidecar store holding vertex code out of band.
+Indexes built from the graph (e.g. `reachability.npz`) live in the same
+directory and survive cache rewrites.
+"""
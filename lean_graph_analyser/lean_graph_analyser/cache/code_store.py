@@ -0,0 +1,163 @@
+"""
+Code Store Module.
+
+Out-of-band storage for the heavy text attached to vertices (code snippets and,
+optionally, the untruncated source of every declaration). Keeping it out of
+the igraph object keeps the in-memory graph and its cache small; the text is
+read lazily by vertex id when something actually needs it (hover text in
+`plot_graph`, reports, GraphML export).
+
+On disk, a store named `code` is two files in the cache directory:
+    - `code.bin`: the UTF-8 encoded strings, concatenated.
+    - `code.offsets.npy`: int64 offsets, so string i is bin[offsets[i]:offsets[i+1]].
+"""
+
+import mmap
+import os
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+SNIPPET_STORE = "code"
+FULL_CODE_STORE = "full_code"
+
+# Snippets are truncated to 1000 chars, as the inline `code` attribute used to be
+SNIPPET_CHARS = 1000
+
+
+class CodeStore:
+    """
+    Read-only, memory-mapped view of one sidecar store.
+
+    Args:
+        directory: Cache directory holding the sidecar files.
+        name: Store name, e.g. "code" (snippets) or "full_code".
+    """
+
+    def __init__(self, directory: str, name: str = SNIPPET_STORE):
+        self.bin_path = os.path.join(directory, f"{name}.bin")
+        self.offsets_path = os.path.join(directory, f"{name}.offsets.npy")
+        self._offsets: Optional[np.ndarray] = None
+        self._data: Optional[mmap.mmap] = None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.bin_path) and os.path.exists(self.offsets_path)
+
+    def _open(self) -> None:
+        if self._offsets is not None:
+            return
+        self._offsets = np.load(self.offsets_path, mmap_mode="r")
+        if os.path.getsize(self.bin_path) > 0:  # mmap refuses empty files
+            with open(self.bin_path, "rb") as f:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        self._open()
+        return len(self._offsets) - 1
+
+    def get(self, vid: int) -> str:
+        """Returns the text stored for one vertex id."""
+        self._open()
+        start, end = int(self._offsets[vid]), int(self._offsets[vid + 1])
+        if start == end:
+            return ""
+        return self._data[start:end].decode("utf-8")
+
+    def get_many(self, vids: Iterable[int]) -> List[str]:
+        return [self.get(v) for v in vids]
+
+    def close(self) -> None:
+        if self._data is not None:
+            self._data.close()
+        self._data = None
+        self._offsets = None
+
+
+class CodeStoreWriter:
+    """
+    Streams strings into a store, in vertex id order.
+
+    Writes go to temporary files that replace the store on `close()`, so a
+    store can be rewritten while a `CodeStore` on the old files is still read.
+    """
+
+    def __init__(self, directory: str, name: str = SNIPPET_STORE):
+        os.makedirs(directory, exist_ok=True)
+        self.name = name
+        self.bin_path = os.path.join(directory, f"{name}.bin")
+        self.offsets_path = os.path.join(directory, f"{name}.offsets.npy")
+        self._tmp_bin = f"{self.bin_path}.tmp"
+        self._file = open(self._tmp_bin, "wb")
+        self._offsets: List[int] = [0]
+
+    def append(self, text: str) -> None:
+        data = text.encode("utf-8") if text else b""
+        self._file.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+
+    def extend(self, texts: Iterable[str]) -> None:
+        for text in texts:
+            self.append(text)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def close(self) -> None:
+        self._file.close()
+        tmp_offsets = f"{self.offsets_path}.tmp.npy"
+        np.save(tmp_offsets, np.asarray(self._offsets, dtype=np.int64))
+        os.replace(self._tmp_bin, self.bin_path)
+        os.replace(tmp_offsets, self.offsets_path)
+
+    def abort(self) -> None:
+        self._file.close()
+        if os.path.exists(self._tmp_bin):
+            os.remove(self._tmp_bin)
+
+
+class CodeSidecarWriter:
+    """
+    Writes the snippet store and, if requested, the full-code store together.
+
+    Args:
+        directory: Cache directory.
+        full_code: Also keep the untruncated code of every declaration.
+    """
+
+    def __init__(self, directory: str, full_code: bool = False):
+        self.snippets = CodeStoreWriter(directory, SNIPPET_STORE)
+        self.full = CodeStoreWriter(directory, FULL_CODE_STORE) if full_code else None
+        self._writers = [w for w in (self.snippets, self.full) if w is not None]
+
+    def append(self, code: str) -> None:
+        self.snippets.append(code[:SNIPPET_CHARS] if code else "")
+        if self.full is not None:
+            self.full.append(code or "")
+
+    def extend(self, codes: Iterable[str]) -> None:
+        for code in codes:
+            self.append(code)
+
+    def copy_from(self, directory: str, vids: Sequence[int]) -> None:
+        """Copies existing entries (e.g. vertices that survive a patch) in the given order."""
+        for writer in self._writers:
+            store = CodeStore(directory, writer.name)
+            if store.exists():
+                writer.extend(store.get_many(vids))
+                store.close()
+            else:
+                writer.extend("" for _ in vids)
+
+    def close(self) -> None:
+        for writer in self._writers:
+            writer.close()
+        if self.full is None:
+            # A full-code store from an earlier build no longer matches the vertex ids
+            stale = CodeStore(os.path.dirname(self.snippets.bin_path), FULL_CODE_STORE)
+            for path in (stale.bin_path, stale.offsets_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def abort(self) -> None:
+        for writer in self._writers:
+            writer.abort()
@@ -0,0 +1,128 @@
+"""
+Edge Spool Module.
+
+Bounded-memory, crash-safe buffer for the edges found during Phase 2 of the
+graph build. Edges are buffered in memory up to a fixed size, then flushed to
+disk as a sorted, deduplicated chunk of int32 (source, target) pairs. A JSON
+checkpoint records how far extraction got, so a killed multi-hour run can
+resume from the last processed theorem instead of restarting.
+
+Layout of the spool directory:
+    - `chunk_00000.npy`, `chunk_00001.npy`, ...: (k, 2) int32 edge arrays.
+    - `checkpoint.json`: resume position, chunk count and a fingerprint of
+      the vertex ids the edges refer to.
+"""
+
+import json
+import os
+import shutil
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from lean_graph_analyser.utils.csr import unique_edges
+
+# Edges kept in memory before a chunk is flushed (~16 MB of int32 pairs)
+DEFAULT_CHUNK_EDGES = 2_000_000
+
+
+class EdgeSpool:
+    """
+    Args:
+        directory: Where chunks and the checkpoint are written.
+        chunk_edges: Number of buffered edges that triggers a flush.
+    """
+
+    CHECKPOINT_FILE = "checkpoint.json"
+
+    def __init__(self, directory: str, chunk_edges: int = DEFAULT_CHUNK_EDGES):
+        self.directory = directory
+        self.chunk_edges = chunk_edges
+        self._buffer: List[np.ndarray] = []
+        self._buffered = 0
+        self._n_chunks = 0
+
+    # --- Writing ---
+
+    def reset(self) -> None:
+        """Discards every chunk and checkpoint and starts an empty spool."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+        self._buffer, self._buffered, self._n_chunks = [], 0, 0
+
+    def add(self, edges: np.ndarray) -> None:
+        """Buffers an (k, 2) int32 edge array, flushing when the buffer is full."""
+        if len(edges) == 0:
+            return
+        self._buffer.append(edges)
+        self._buffered += len(edges)
+        if self._buffered >= self.chunk_edges:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the buffered edges as one sorted, deduplicated chunk."""
+        if not self._buffer:
+            return
+        path = os.path.join(self.directory, f"chunk_{self._n_chunks:05d}.npy")
+        tmp_path = f"{path}.tmp.npy"
+        np.save(tmp_path, unique_edges(np.concatenate(self._buffer)))
+        os.replace(tmp_path, path)
+        self._n_chunks += 1
+        self._buffer, self._buffered = [], 0
+
+    def checkpoint(self, state: Dict[str, Any]) -> None:
+        """
+        Flushes the buffer, then atomically records `state` (resume position,
+        fingerprints, ...) together with the number of chunks it covers.
+        """
+        self.flush()
+        data = dict(state, n_chunks=self._n_chunks)
+        path = os.path.join(self.directory, self.CHECKPOINT_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    # --- Resuming ---
+
+    def load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns the last checkpoint state and rewinds the spool to it, or None
+        if there is nothing to resume. Chunks written after the checkpoint
+        (i.e. by a run killed between two checkpoints) are discarded.
+        """
+        path = os.path.join(self.directory, self.CHECKPOINT_FILE)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        self._n_chunks = int(state.get("n_chunks", 0))
+        for name in os.listdir(self.directory):
+            if not name.startswith("chunk_"):
+                continue
+            if name.endswith(".tmp.npy") or int(name[6:11]) >= self._n_chunks:
+                os.remove(os.path.join(self.directory, name))
+        self._buffer, self._buffered = [], 0
+        return state
+
+    # --- Reading ---
+
+    def merge(self) -> np.ndarray:
+        """
+        Flushes and returns every spooled edge, deduplicated and sorted by
+        (source, target), as an (m, 2) int32 array.
+        """
+        self.flush()
+        chunks = [
+            np.load(os.path.join(self.directory, f"chunk_{i:05d}.npy"))
+            for i in range(self._n_chunks)
+        ]
+        if not chunks:
+            return np.empty((0, 2), dtype=np.int32)
+        return unique_edges(np.concatenate(chunks))
+
+    def clear(self) -> None:
+        """Removes the spool directory once its edges are safely in the graph cache."""
+        shutil.rmtree(self.directory, ignore_errors=True)
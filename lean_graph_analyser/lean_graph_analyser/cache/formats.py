@@ -0,0 +1,220 @@
+"""
+Graph Cache Formats.
+
+Pluggable on-disk formats for the graph cached by `GraphGenerator`:
+
+- `ColumnarGraphCache` (default): a directory holding the topology as an int32
+  CSR (`indptr.npy`, `indices.npy`) and the vertex attributes as one
+  uncompressed Arrow IPC table (`vertices.arrow`). Both are memory-mapped on
+  load, so a cold start costs little more than building the igraph object.
+- `GraphMLGraphCache`: the legacy XML format. Kept for exporting to external
+  tools (Gephi, Cosmograph) and for reading caches written by older versions.
+  It writes coded attributes as plain strings (see `attributes`).
+"""
+
+import json
+import os
+import shutil
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Tuple, Type
+
+import igraph as ig
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from lean_graph_analyser.attributes import decode_attributes
+from lean_graph_analyser.utils.csr import csr_from_edges, edge_array, edge_tuples, edges_from_csr
+
+COLUMNAR_FORMAT_VERSION = 1
+
+# String columns with fewer distinct values than this fraction of rows are
+# dictionary-encoded on disk (string columns of older or hand-made graphs).
+_DICTIONARY_RATIO = 0.5
+
+
+class GraphCache(ABC):
+    """Abstract base class for all graph cache formats."""
+
+    def __init__(self, location: str):
+        self.location = location
+
+    def exists(self) -> bool:
+        return os.path.exists(self.location)
+
+    @abstractmethod
+    def load(self) -> ig.Graph:
+        pass
+
+    @abstractmethod
+    def save(self, g: ig.Graph) -> None:
+        pass
+
+
+class GraphMLGraphCache(GraphCache):
+    """GraphML file. Slow to parse at scale; prefer it for export only."""
+
+    def load(self) -> ig.Graph:
+        g = ig.Graph.Read_GraphML(self.location)
+        # Read_GraphML adds the XML node ids ("n0", ...) as an attribute;
+        # drop it so the graph saves cleanly again.
+        if "id" in g.vs.attributes():
+            del g.vs["id"]
+        return g
+
+    def save(self, g: ig.Graph) -> None:
+        os.makedirs(os.path.dirname(self.location) or ".", exist_ok=True)
+        # GraphML has no list attributes: string tables become plain columns
+        decode_attributes(g).write_graphml(self.location)
+
+
+class ColumnarGraphCache(GraphCache):
+    """Directory with a CSR edge array and an Arrow table of vertex attributes."""
+
+    META_FILE = "meta.json"
+    INDPTR_FILE = "indptr.npy"
+    INDICES_FILE = "indices.npy"
+    VERTICES_FILE = "vertices.arrow"
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.location, self.META_FILE))
+
+    # --- Loading ---
+
+    def load_meta(self) -> Dict[str, Any]:
+        with open(os.path.join(self.location, self.META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != COLUMNAR_FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar cache version: {meta.get('format_version')}")
+        return meta
+
+    def load_csr(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Memory-maps the out-adjacency CSR without building an igraph object."""
+        indptr = np.load(os.path.join(self.location, self.INDPTR_FILE), mmap_mode="r")
+        indices = np.load(os.path.join(self.location, self.INDICES_FILE), mmap_mode="r")
+        return indptr, indices
+
+    def load_vertex_table(self) -> pa.Table:
+        """Memory-maps the vertex attribute table (zero-copy)."""
+        source = pa.memory_map(os.path.join(self.location, self.VERTICES_FILE), "r")
+        return pa.ipc.open_file(source).read_all()
+
+    def load(self) -> ig.Graph:
+        meta = self.load_meta()
+        indptr, indices = self.load_csr()
+
+        g = ig.Graph(
+            n=meta["vcount"],
+            edges=edge_tuples(edges_from_csr(indptr, indices)),
+            directed=meta.get("directed", True),
+        )
+        for key, value in meta.get("graph_attributes", {}).items():
+            g[key] = value
+
+        table = self.load_vertex_table()
+        for name in table.column_names:
+            g.vs[name] = column_to_list(table.column(name))
+        return g
+
+    # --- Saving ---
+
+    def save(self, g: ig.Graph) -> None:
+        indptr, indices = csr_from_edges(g.vcount(), edge_array(g))
+        table = pa.table({name: _list_to_array(g.vs[name]) for name in g.vs.attributes()})
+        meta = {
+            "format_version": COLUMNAR_FORMAT_VERSION,
+            "vcount": g.vcount(),
+            "ecount": g.ecount(),
+            "directed": g.is_directed(),
+            "graph_attributes": {key: g[key] for key in g.attributes()},
+        }
+
+        # Write into a sibling directory first and swap it in, so a crash
+        # mid-save never leaves a half-written cache behind.
+        target = Path(self.location)
+        tmp_dir = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        np.save(tmp_dir / self.INDPTR_FILE, indptr)
+        np.save(tmp_dir / self.INDICES_FILE, indices)
+        with pa.OSFile(str(tmp_dir / self.VERTICES_FILE), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        with open(tmp_dir / self.META_FILE, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=1)
+
+        _swap_directory(tmp_dir, target)
+
+
+def _swap_directory(new_dir: Path, target: Path) -> None:
+    """Replaces `target` by `new_dir`, keeping any non-cache files the target held."""
+    if target.exists():
+        # Sidecars written by other components (manifests, indexes, ...) survive
+        for entry in target.iterdir():
+            if not (new_dir / entry.name).exists():
+                os.replace(entry, new_dir / entry.name)
+        old_dir = target.with_name(f"{target.name}.old-{os.getpid()}")
+        os.replace(target, old_dir)
+        os.replace(new_dir, target)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    else:
+        os.replace(new_dir, target)
+
+
+def _list_to_array(values: List[Any]) -> pa.Array:
+    array = pa.array(values)
+    if pa.types.is_string(array.type) and len(array) > 0:
+        n_unique = len(pc.unique(array))
+        if n_unique < _DICTIONARY_RATIO * len(array):
+            array = array.dictionary_encode()
+    return array
+
+
+def column_to_list(column: pa.ChunkedArray) -> List[Any]:
+    """
+    Python values of an Arrow column, as read back into igraph. Dictionary
+    encoded string columns are decoded through their dictionary, which is
+    faster than `to_pylist()` and shares one str object per distinct value.
+    """
+    if pa.types.is_dictionary(column.type):
+        values: List[Any] = []
+        for chunk in column.chunks:
+            dictionary = np.array(chunk.dictionary.to_pylist(), dtype=object)
+            values.extend(dictionary[chunk.indices.to_numpy(zero_copy_only=False)].tolist())
+        return values
+    return column.to_pylist()
+
+
+CACHE_FORMATS: Dict[str, Type[GraphCache]] = {
+    "columnar": ColumnarGraphCache,
+    "graphml": GraphMLGraphCache,
+}
+
+
+def cache_dir_for(graph_location: str) -> str:
+    """
+    Directory holding the cache and its sidecars: the location without a
+    .graphml suffix ("graphs/dep.graphml" -> "graphs/dep").
+    """
+    stem = Path(graph_location)
+    if stem.suffix == ".graphml":
+        stem = stem.with_suffix("")
+    return str(stem)
+
+
+def cache_for(graph_location: str, cache_format: str = "columnar") -> GraphCache:
+    """
+    Resolves the cache object for a graph location.
+
+    The location is treated as a stem: "graphs/dep.graphml" (or "graphs/dep")
+    maps to the directory "graphs/dep/" for the columnar format and to the
+    file "graphs/dep.graphml" for GraphML.
+    """
+    if cache_format not in CACHE_FORMATS:
+        raise ValueError(f"Unknown cache format '{cache_format}'. Choose from {sorted(CACHE_FORMATS)}.")
+    stem = Path(cache_dir_for(graph_location))
+    if cache_format == "graphml":
+        return GraphMLGraphCache(str(stem.with_name(stem.name + ".graphml")))
+    return CACHE_FORMATS[cache_format](str(stem))
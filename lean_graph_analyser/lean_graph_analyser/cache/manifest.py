@@ -0,0 +1,83 @@
+"""
+File Manifest Module.
+
+Records a content hash for every `TracedFile` that went into a cached graph,
+so `GraphGenerator` can tell which files changed since the graph was built
+and patch only their vertices and edges.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from lean_dojo_v2.lean_dojo.data_extraction.traced_data import TracedRepo, TracedFile
+
+MANIFEST_VERSION = 1
+
+
+def hash_traced_file(tf: TracedFile) -> str:
+    """
+    Content hash of a traced file.
+
+    Hashes the Lean source on disk; if it is not available (e.g. the trace was
+    copied without its sources) the extracted definitions are hashed instead.
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(tf.abs_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    except OSError:
+        for definition in tf.get_premise_definitions():
+            digest.update(repr(sorted(definition.items())).encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass
+class FileManifest:
+    """Mapping of file path (as stored in the vertex `file_path`) -> content hash."""
+    files: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_traced_repo(cls, traced_repo: TracedRepo) -> "FileManifest":
+        return cls({str(tf.path): hash_traced_file(tf) for tf in traced_repo.traced_files})
+
+    @classmethod
+    def load(cls, path: str) -> Optional["FileManifest"]:
+        """Returns None if the manifest is missing, unreadable or from another version."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+        return cls(dict(data.get("files", {})))
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files}, f, indent=1, sort_keys=True)
+        # Atomic replace so a crash never leaves a half-written manifest behind
+        os.replace(tmp_path, path)
+
+    def diff(self, newer: "FileManifest") -> Tuple[Set[str], Set[str]]:
+        """
+        Compares this (cached) manifest against a newer one.
+
+        Returns:
+            (changed, removed): files that are new or whose hash differs, and
+            files that no longer exist in the newer manifest.
+        """
+        changed = {p for p, h in newer.files.items() if self.files.get(p) != h}
+        removed = set(self.files) - set(newer.files)
+        return changed, removed
+
+
+def manifest_path_for(graph_location: str) -> str:
+    """The manifest lives next to the cached graph: `graph.graphml` -> `graph.manifest.json`."""
+    return str(Path(graph_location).with_suffix(".manifest.json"))
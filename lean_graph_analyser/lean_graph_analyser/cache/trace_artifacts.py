@@ -0,0 +1,310 @@
+"""
+Trace Artifact Cache.
+
+LeanDojo traces are slow to produce and slow to read back: every run walks
+the traced ASTs again for the definitions and the premises of every proof.
+This cache keeps exactly what `GraphGenerator` reads from a trace, per file
+and commit, as small JSON artifacts:
+
+    <cache>/<repo>/<commit>/index.json     files in trace order, with source hashes
+    <cache>/<repo>/<commit>/files/*.json   definitions + (theorem, premises) per file
+
+Artifacts are exported from a `TracedRepo` by a process pool (one artifact
+per traced file, written atomically, so an interrupted export resumes file
+by file). `ArtifactTracedRepo` serves them back through the part of the
+LeanDojo API the graph build uses (like `utils.synthetic`), so a later run on
+the same commit skips `trace()` and the AST walk entirely.
+
+`export_stream` also hands back the Phase 1 node batch of every file as
+the pool finishes it, so `GraphGenerator.generate(node_batches=...)` builds
+the vertices while the rest of the trace is still being exported.
+
+An index is only trusted while the Lean sources on disk still hash to the
+recorded values and no new `.lean` file appeared.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from lean_dojo_v2.lean_dojo.data_extraction.traced_data import TracedFile, TracedRepo
+
+from lean_graph_analyser.cache.code_store import SNIPPET_CHARS
+from lean_graph_analyser.cache.manifest import hash_traced_file
+from lean_graph_analyser.extraction import NodeBatch, extract_file_nodes
+from lean_graph_analyser.utils.parallel import make_shards, pool_context
+from lean_graph_analyser.utils.profiling import FileStats
+from lean_graph_analyser.utils.traced_stubs import StubTracedTheorem
+
+ARTIFACT_VERSION = 1
+INDEX_FILE = "index.json"
+
+# Directories of a Lean project that hold dependencies or build output
+_SKIPPED_DIRS = {".lake", "lake-packages", "build", ".git"}
+
+
+class ArtifactTracedTheorem(StubTracedTheorem):
+    """A traced theorem read back from an artifact."""
+
+    __slots__ = ()
+
+    def __init__(self, full_name: str, premises: Optional[List[str]]):
+        super().__init__(full_name, premises)
+
+    def get_premise_full_names(self) -> List[str]:
+        if self._premises is None:
+            raise RuntimeError(f"premises of {self.theorem.full_name} failed to extract when the trace was exported")
+        return self._premises
+
+
+class ArtifactTracedFile:
+    """One traced file; its artifact is read on every call (as LeanDojo walks its AST)."""
+
+    def __init__(self, root_dir: Path, path: str, artifact_path: str):
+        self.root_dir = root_dir
+        self.path = Path(path)
+        self.artifact_path = artifact_path
+
+    @property
+    def abs_path(self) -> Path:
+        return self.root_dir / self.path
+
+    def _load(self) -> Dict[str, Any]:
+        with open(self.artifact_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def get_premise_definitions(self) -> List[Dict[str, Any]]:
+        return self._load()["definitions"]
+
+    def get_traced_theorems(self) -> List[ArtifactTracedTheorem]:
+        return [ArtifactTracedTheorem(name, premises) for name, premises in self._load()["theorems"]]
+
+
+class ArtifactTracedRepo:
+    """A traced repository served from the artifact cache."""
+
+    def __init__(self, name: str, root_dir: Path, traced_files: List[ArtifactTracedFile]):
+        self.name = name
+        self.root_dir = root_dir
+        self.traced_files = traced_files
+
+    def get_traced_theorems(self) -> List[ArtifactTracedTheorem]:
+        return [thm for tf in self.traced_files for thm in tf.get_traced_theorems()]
+
+
+def file_artifact(tf: TracedFile) -> Dict[str, Any]:
+    """Everything the graph build reads from one traced file."""
+    theorems = []
+    for traced_thm in tf.get_traced_theorems():
+        try:
+            premises = list(traced_thm.get_premise_full_names())
+        except Exception:
+            # Replayed as an error by `ArtifactTracedTheorem`, so the build
+            # counts it like an error on the live trace
+            premises = None
+        theorems.append((traced_thm.theorem.full_name, premises))
+    return {
+        "version": ARTIFACT_VERSION,
+        "path": str(tf.path),
+        "definitions": list(tf.get_premise_definitions()),
+        "theorems": theorems,
+    }
+
+
+def _json_default(value: Any) -> Any:
+    # LeanDojo positions and similar tuple-likes
+    try:
+        return list(value)
+    except TypeError:
+        return str(value)
+
+
+def lean_sources(root_dir: Path) -> List[str]:
+    """Relative paths of the project's own `.lean` files (dependencies excluded)."""
+    sources = []
+    for directory, subdirs, files in os.walk(root_dir):
+        subdirs[:] = [d for d in subdirs if d not in _SKIPPED_DIRS]
+        for name in files:
+            if name.endswith(".lean"):
+                sources.append(os.path.relpath(os.path.join(directory, name), root_dir))
+    return sorted(sources)
+
+
+# ==========================================
+# Export Workers
+# ==========================================
+
+# Worker-side state, installed by `_init_worker` (inherited under fork)
+_worker_files: Sequence[TracedFile] = ()
+_worker_artifacts: Sequence[ArtifactTracedFile] = ()
+_worker_code_chars: Optional[int] = SNIPPET_CHARS
+
+
+def _init_worker(
+    traced_files: Sequence[TracedFile],
+    artifacts: Sequence[ArtifactTracedFile],
+    max_code_chars: Optional[int],
+) -> None:
+    global _worker_files, _worker_artifacts, _worker_code_chars
+    _worker_files = traced_files
+    _worker_artifacts = artifacts
+    _worker_code_chars = max_code_chars
+
+
+def _artifact_name(path: str, source_hash: str) -> str:
+    return hashlib.sha1(f"{path}\n{source_hash}".encode("utf-8")).hexdigest()[:20] + ".json"
+
+
+def _export_shard(shard: range) -> List[Tuple[NodeBatch, FileStats]]:
+    """
+    Writes the artifacts of a shard of files (skipping ones already there)
+    and returns the node batch of every file, read from its artifact.
+    """
+    results = []
+    for i in shard:
+        target = _worker_artifacts[i].artifact_path
+        if not os.path.exists(target):
+            tmp_path = f"{target}.tmp-{os.getpid()}"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(file_artifact(_worker_files[i]), f, separators=(",", ":"), default=_json_default)
+            os.replace(tmp_path, target)
+        stats = FileStats(str(_worker_artifacts[i].path))
+        results.append((extract_file_nodes(_worker_artifacts[i], _worker_code_chars, stats), stats))
+    return results
+
+
+# ==========================================
+# Cache
+# ==========================================
+
+def _export_batches(
+    traced_files: List[TracedFile],
+    files: List[ArtifactTracedFile],
+    index: Dict[str, Any],
+    directory: str,
+    workers: int,
+    max_code_chars: Optional[int],
+) -> Iterator[Tuple[NodeBatch, FileStats]]:
+    """Runs the export pool, yielding node batches in file order, then writes the index."""
+    if workers > 1 and len(traced_files) > 1:
+        with pool_context().Pool(
+            processes=workers, initializer=_init_worker, initargs=(traced_files, files, max_code_chars)
+        ) as pool:
+            # imap keeps file order, so the batches merge like a serial build
+            for shard in pool.imap(_export_shard, make_shards(len(traced_files), workers)):
+                yield from shard
+    else:
+        _init_worker(traced_files, files, max_code_chars)
+        for i in range(len(traced_files)):
+            yield from _export_shard(range(i, i + 1))
+
+    tmp_path = os.path.join(directory, f"{INDEX_FILE}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp_path, os.path.join(directory, INDEX_FILE))
+
+
+class TraceArtifactCache:
+    """
+    Args:
+        directory: Root of the cache, shared by all repositories and commits.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def commit_dir(self, repo_name: str, commit: str) -> str:
+        return os.path.join(self.directory, repo_name, commit)
+
+    def load(self, repo_name: str, commit: str, root_dir: Path) -> Optional[ArtifactTracedRepo]:
+        """
+        The cached trace of a commit, or None if it is missing or stale (a
+        source changed, or a `.lean` file the trace does not know appeared).
+        """
+        directory = self.commit_dir(repo_name, commit)
+        try:
+            with open(os.path.join(directory, INDEX_FILE), "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get("version") != ARTIFACT_VERSION:
+            return None
+
+        root_dir = Path(root_dir)
+        files = [
+            ArtifactTracedFile(root_dir, entry["path"], os.path.join(directory, "files", entry["artifact"]))
+            for entry in index["files"]
+        ]
+        for tf, entry in zip(files, index["files"]):
+            if not os.path.exists(tf.artifact_path) or hash_traced_file(tf) != entry["hash"]:
+                return None
+        known = {entry["path"] for entry in index["files"]} | set(index.get("untraced", []))
+        if any(path not in known for path in lean_sources(root_dir)):
+            return None
+        return ArtifactTracedRepo(index.get("name", repo_name), root_dir, files)
+
+    def export(
+        self,
+        traced_repo: TracedRepo,
+        repo_name: str,
+        commit: str,
+        root_dir: Path,
+        workers: int = 1,
+    ) -> ArtifactTracedRepo:
+        """
+        Writes the artifacts of every traced file (skipping ones already
+        exported), then the index, and returns the cached repo.
+        """
+        repo, node_batches = self.export_stream(traced_repo, repo_name, commit, root_dir, workers)
+        for _ in node_batches:
+            pass
+        return repo
+
+    def export_stream(
+        self,
+        traced_repo: TracedRepo,
+        repo_name: str,
+        commit: str,
+        root_dir: Path,
+        workers: int = 1,
+        max_code_chars: Optional[int] = SNIPPET_CHARS,
+    ) -> Tuple[ArtifactTracedRepo, Iterator[Tuple[NodeBatch, FileStats]]]:
+        """
+        Starts the export and returns the cached repo right away, with an
+        iterator driving the export.
+
+        Artifact names only depend on the source hashes, so the repo lists
+        every file up front; a file's artifact exists once the iterator has
+        yielded its (`NodeBatch`, `FileStats`), in file order, as the pool
+        finishes it. The index is written when the iterator is exhausted, so
+        consume it fully before reading the repo (see
+        `GraphGenerator.generate(node_batches=...)`).
+
+        Args:
+            max_code_chars: Code truncation of the node batches (None: full code).
+        """
+        directory = self.commit_dir(repo_name, commit)
+        os.makedirs(os.path.join(directory, "files"), exist_ok=True)
+        traced_files = list(traced_repo.traced_files)
+        entries = []
+        for tf in traced_files:
+            path, source_hash = str(tf.path), hash_traced_file(tf)
+            entries.append((path, source_hash, _artifact_name(path, source_hash)))
+        files = [
+            ArtifactTracedFile(Path(root_dir), path, os.path.join(directory, "files", name))
+            for path, _, name in entries
+        ]
+        repo = ArtifactTracedRepo(traced_repo.name, Path(root_dir), files)
+        traced_paths = {path for path, _, _ in entries}
+        index = {
+            "version": ARTIFACT_VERSION,
+            "name": traced_repo.name,
+            "commit": commit,
+            "files": [{"path": path, "hash": h, "artifact": name} for path, h, name in entries],
+            # Lean files the trace skipped, so they do not look new next time
+            "untraced": [p for p in lean_sources(Path(root_dir)) if p not in traced_paths],
+        }
+        return repo, _export_batches(traced_files, files, index, directory, workers, max_code_chars)
+
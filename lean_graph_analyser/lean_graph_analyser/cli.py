@@ -0,0 +1,91 @@
+"""
+Command-line interface: `lean-graph`.
+
+Commands:
+    lean-graph build <project>    trace, build, measure and plot a Lean project
+                                  (see `pipeline.run_build`)
+    lean-graph serve <graph>      serve queries on a built graph over local HTTP
+                                  (see `server`)
+"""
+
+import argparse
+from typing import List, Optional
+
+from lean_graph_analyser.metrics.engine import DEFAULT_METRICS
+from lean_graph_analyser.pipeline import DEFAULT_ARTIFACT_DIR, run_build
+from lean_graph_analyser.server import DEFAULT_PORT, GraphQueryService, serve
+from lean_graph_analyser.utils.plot_graph import PLOT_MODES
+
+
+def _build(args: argparse.Namespace) -> None:
+    run_build(
+        args.project,
+        output_dir=args.output_dir,
+        name=args.name,
+        workers=args.workers,
+        metrics=args.metrics,
+        size_metric=args.size_metric,
+        plot_mode=None if args.plot_mode == "none" else args.plot_mode,
+        artifact_dir=args.artifact_dir,
+        build_deps=args.build_deps,
+        retrace=args.retrace,
+        open_browser=args.open,
+        seed=args.seed,
+    )
+
+
+def _serve(args: argparse.Namespace) -> None:
+    service = GraphQueryService.from_cache(args.graph, metrics=args.metrics, seed=args.seed)
+    serve(service, host=args.host, port=args.port, workers=args.workers, cache_size=args.cache_size)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="lean-graph", description="Dependency graphs of Lean projects.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Trace a Lean project and build, measure and plot its graph.")
+    build.add_argument("project", help="Root of the Lean project (a git checkout).")
+    build.add_argument("-o", "--output-dir", help="Output directory (default: <project>/graphs).")
+    build.add_argument("--name", help="Graph name (default: the project directory name).")
+    build.add_argument("-j", "--workers", type=int, default=1, help="Worker processes (default: 1).")
+    build.add_argument(
+        "--metrics", nargs="+", default=list(DEFAULT_METRICS),
+        help=f"Metrics to compute (default: {' '.join(DEFAULT_METRICS)}).",
+    )
+    build.add_argument("--size-metric", help="Metric sizing the plotted nodes (default: the first metric).")
+    build.add_argument(
+        "--plot-mode", choices=[*PLOT_MODES, "none"], default="full", help="plot_graph mode, or none (default: full).",
+    )
+    build.add_argument(
+        "--artifact-dir", default=DEFAULT_ARTIFACT_DIR, help=f"Trace artifact cache (default: {DEFAULT_ARTIFACT_DIR}).",
+    )
+    build.add_argument("--build-deps", action="store_true", help="Trace the project's dependencies too.")
+    build.add_argument("--retrace", action="store_true", help="Ignore cached trace artifacts.")
+    build.add_argument("--open", action="store_true", help="Open the plot in a browser.")
+    build.add_argument("--seed", type=int, default=0, help="Layout seed (default: 0).")
+    build.set_defaults(func=_build)
+
+    server = commands.add_parser("serve", help="Serve queries on a built graph over a local HTTP/JSON API.")
+    server.add_argument("graph", help="Graph location, e.g. <project>/graphs/<name>_dependency_graph.graphml.")
+    server.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1).")
+    server.add_argument("-p", "--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT}).")
+    server.add_argument(
+        "-j", "--workers", type=int, default=1, help="Server processes sharing the graph in shared memory (default: 1).",
+    )
+    server.add_argument(
+        "--metrics", nargs="+", default=list(DEFAULT_METRICS),
+        help=f"Metrics to serve (default: {' '.join(DEFAULT_METRICS)}).",
+    )
+    server.add_argument("--cache-size", type=int, default=4096, help="Cached responses per worker (default: 4096).")
+    server.add_argument("--seed", type=int, default=0, help="Layout seed (default: 0).")
+    server.set_defaults(func=_serve)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Extraction Module
+=================
+
+Per-file node and edge extraction used by `GraphGenerator`.
+
+Everything here is module-level so it can be shipped to a process pool: the
+parent hands each worker a shard of file indices, and the worker answers with
+compact per-file batches (one `NodeBatch` per file in Phase 1, one int32 edge
+array per file in Phase 2), each paired with the `FileStats` of that file.
+The serial build runs the very same functions in-process, so both paths merge
+identical batches in identical order.
+"""
+
+import itertools
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from lean_dojo_v2.lean_dojo.data_extraction.traced_data import TracedFile
+
+from lean_graph_analyser.cache.code_store import SNIPPET_CHARS
+from lean_graph_analyser.utils.parallel import make_shards, pool_context
+from lean_graph_analyser.utils.profiling import FileStats
+
+
+class NodeBatch(NamedTuple):
+    """Columnar node data for every definition found in one traced file."""
+    file_path: str
+    names: List[str]
+    start_lines: List[int]
+    end_lines: List[int]
+    codes: List[str]
+    kinds: List[str]
+
+
+def extract_file_nodes(
+    tf: TracedFile,
+    max_code_chars: Optional[int] = SNIPPET_CHARS,
+    stats: Optional[FileStats] = None,
+) -> NodeBatch:
+    """
+    Collects every named definition of a file (theorems, defs, inductives, ...).
+
+    Code is truncated to `max_code_chars` before it leaves the worker
+    (None keeps the full source, for the optional full-code store). If
+    `stats` is given, the time spent and the number of definitions are added.
+
+    Duplicates *within* the file are kept here; the parent applies the global
+    "first definition wins" rule while merging, so it sees the same sequence
+    of names as a single-threaded walk would.
+    """
+    start_time = time.perf_counter()
+    batch = NodeBatch(str(tf.path), [], [], [], [], [])
+
+    # get_premise_definitions returns dicts of EVERYTHING defined in the file
+    for definition in tf.get_premise_definitions():
+        full_name = definition.get("full_name")
+        if not full_name:
+            continue
+
+        raw_code = definition.get("code", "")
+        batch.names.append(full_name)
+        batch.start_lines.append(definition.get("start", [0, 0])[0])
+        batch.end_lines.append(definition.get("end", [0, 0])[0])
+        batch.codes.append(raw_code[:max_code_chars] if raw_code else "")
+        batch.kinds.append(definition.get("kind", "unknown"))  # Theorem, Def, etc.
+
+    if stats is not None:
+        stats.node_seconds += time.perf_counter() - start_time
+        stats.n_nodes += len(batch.names)
+    return batch
+
+
+def iter_theorem_edges(
+    tf: TracedFile,
+    node_lookup: Dict[str, int],
+    start: int = 0,
+    stats: Optional[FileStats] = None,
+    external: Optional[List[Tuple[int, str]]] = None,
+) -> Iterator[List[Tuple[int, int]]]:
+    """
+    Resolves the premises used by the traced theorems of a file, one theorem at a time.
+
+    Args:
+        tf: The traced file.
+        node_lookup: Mapping full_name -> vertex id (`SymbolTable.ids`).
+        start: Index of the first theorem to process (to resume a killed run).
+        stats: If given, receives the premise-resolution time of every
+            theorem and counts of the premises that were dropped.
+        external: If given, receives (source, premise name) for every
+            premise outside the graph, e.g. to resolve it against another
+            repository's graph later (see `federation`).
+
+    Yields:
+        For every theorem from `start` on (including skipped ones, so callers
+        can count positions), the list of (source, target) vertex ids it adds.
+        Self-loops and premises outside the graph (e.g. Lean core internals)
+        are dropped.
+    """
+    # Premises are resolved to vertex ids with one dict probe each; from then
+    # on (self-loop test, edge tuples) they are plain ints.
+    lookup = node_lookup.get
+    # We iterate over TRACED THEOREMS because they contain the proof ASTs
+    # required to find what premises were used.
+    for traced_thm in itertools.islice(tf.get_traced_theorems(), start, None):
+        edges: List[Tuple[int, int]] = []
+        source_name = traced_thm.theorem.full_name
+        source_idx = lookup(source_name)
+        if source_idx is None:
+            if stats is not None:
+                stats.missing_sources += 1
+            yield edges  # Should not happen often
+            continue
+
+        # get_premise_full_names() finds identifiers resolved in the proof
+        thm_start = time.perf_counter()
+        dropped = self_loops = 0
+        try:
+            for target_name in traced_thm.get_premise_full_names():
+                target_idx = lookup(target_name)
+                if target_idx is None:
+                    dropped += 1
+                    if external is not None:
+                        external.append((source_idx, target_name))
+                elif target_idx == source_idx:
+                    self_loops += 1
+                else:
+                    edges.append((source_idx, target_idx))
+        except Exception as e:
+            # Occasional AST traversal errors shouldn't stop the whole build
+            logger.warning(f"Error extracting edges for {source_name}: {e}")
+            if stats is not None:
+                stats.errors += 1
+        if stats is not None:
+            stats.add_theorem(source_name, time.perf_counter() - thm_start)
+            stats.dropped_premises += dropped
+            stats.self_loops += self_loops
+            stats.n_edges += len(edges)
+        yield edges
+
+
+def extract_file_external_premises(
+    tf: TracedFile, node_lookup: Dict[str, int], stats: Optional[FileStats] = None
+) -> List[Tuple[int, str]]:
+    """
+    Premises of a file's theorems that are not vertices of the graph.
+
+    Returns:
+        (source vertex id, premise full name) pairs in discovery order.
+    """
+    start_time = time.perf_counter()
+    external: List[Tuple[int, str]] = []
+    for _ in iter_theorem_edges(tf, node_lookup, stats=stats, external=external):
+        pass
+    if stats is not None:
+        stats.edge_seconds += time.perf_counter() - start_time
+    return external
+
+
+def extract_file_edges(
+    tf: TracedFile, node_lookup: Dict[str, int], stats: Optional[FileStats] = None
+) -> np.ndarray:
+    """
+    Resolves the premises used by every traced theorem of a file.
+
+    Returns:
+        An int32 array of shape (k, 2) holding (source, target) vertex ids in
+        discovery order.
+    """
+    start_time = time.perf_counter()
+    edges = [edge for thm_edges in iter_theorem_edges(tf, node_lookup, stats=stats) for edge in thm_edges]
+    if stats is not None:
+        stats.edge_seconds += time.perf_counter() - start_time
+    return np.array(edges, dtype=np.int32).reshape(-1, 2)
+
+
+# ==========================================
+# Process Pool Plumbing
+# ==========================================
+
+# Worker-side state, installed once per process by `_init_worker`. Under the
+# "fork" start method these are inherited from the parent without pickling.
+_worker_files: Sequence[TracedFile] = ()
+_worker_lookup: Dict[str, int] = {}
+_worker_code_chars: Optional[int] = SNIPPET_CHARS
+
+
+def _init_worker(
+    traced_files: Sequence[TracedFile],
+    node_lookup: Dict[str, int],
+    max_code_chars: Optional[int],
+) -> None:
+    global _worker_files, _worker_lookup, _worker_code_chars
+    _worker_files = traced_files
+    _worker_lookup = node_lookup
+    _worker_code_chars = max_code_chars
+
+
+def _nodes_for_shard(shard: range) -> List[Tuple[NodeBatch, FileStats]]:
+    results = []
+    for i in shard:
+        stats = FileStats(str(_worker_files[i].path))
+        results.append((extract_file_nodes(_worker_files[i], _worker_code_chars, stats), stats))
+    return results
+
+
+def _edges_for_shard(shard: range) -> List[Tuple[np.ndarray, FileStats]]:
+    results = []
+    for i in shard:
+        stats = FileStats(str(_worker_files[i].path))
+        results.append((extract_file_edges(_worker_files[i], _worker_lookup, stats), stats))
+    return results
+
+
+def _external_for_shard(shard: range) -> List[Tuple[List[Tuple[int, str]], FileStats]]:
+    results = []
+    for i in shard:
+        stats = FileStats(str(_worker_files[i].path))
+        results.append((extract_file_external_premises(_worker_files[i], _worker_lookup, stats), stats))
+    return results
+
+
+def parallel_map_files(
+    traced_files: Sequence[TracedFile],
+    workers: int,
+    phase: str,
+    node_lookup: Optional[Dict[str, int]] = None,
+    max_code_chars: Optional[int] = SNIPPET_CHARS,
+) -> Iterator[List]:
+    """
+    Runs one extraction phase over all files in a process pool.
+
+    Args:
+        traced_files: Files of the traced repo, in repo order.
+        workers: Number of worker processes.
+        phase: "nodes" (per-file results are `NodeBatch`es), "edges"
+            (per-file results are int32 edge arrays; requires `node_lookup`)
+            or "external" (per-file lists of premises outside the graph, see
+            `extract_file_external_premises`; requires `node_lookup`).
+        node_lookup: Mapping full_name -> vertex id built by the nodes phase.
+        max_code_chars: Code truncation applied by the nodes phase.
+
+    Yields:
+        One list of (per-file result, `FileStats`) pairs per shard, in file order.
+    """
+    shard_fn = {"nodes": _nodes_for_shard, "edges": _edges_for_shard, "external": _external_for_shard}[phase]
+    # Several shards per worker: Mathlib has files with a handful of lemmas
+    # next to files with thousands.
+    shards = make_shards(len(traced_files), workers)
+
+    with pool_context().Pool(
+        processes=workers,
+        initializer=_init_worker,
+        initargs=(traced_files, node_lookup or {}, max_code_chars),
+    ) as pool:
+        # imap (not imap_unordered) so batches are merged in file order,
+        # which keeps vertex ids identical to the serial path.
+        yield from pool.imap(shard_fn, shards)
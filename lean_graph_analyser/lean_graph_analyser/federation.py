@@ -0,0 +1,404 @@
+"""
+Graph Federation Module
+=======================
+
+One dependency graph over several repositories (Mathlib, homework sets,
+NNG-style projects such as `experiments/MyNNG`), without ever rebuilding
+the large ones.
+
+Every repository is built into its own shard by `GraphGenerator` (a
+columnar graph cache under `<federation>/shards/<name>/`), with incremental
+builds and all the usual sidecars. Premises a shard cannot resolve inside
+its own repository (e.g. a homework proof using `Nat.succ_le_of_lt` from
+Mathlib) are kept in the shard's `external_premises.arrow` as
+(source vertex, premise name) pairs instead of being dropped.
+
+Shards are combined on demand:
+
+    - `merge()` interns the vertex names of the selected shards, in shard
+      order, into one `SymbolTable`, so a name defined by several shards is
+      one vertex (the first shard wins, like duplicate definitions within a
+      build). Shard edges are remapped through it, and external premises
+      are resolved against it, which gives the cross-repo edges.
+    - `cross_references()` resolves one shard's external premises against
+      the names of the others only, without building a graph.
+
+Shard topologies and vertex tables are memory-mapped, so adding a small
+project costs a build of that project plus a read of the other shards' name
+columns at merge time (other attribute columns are only read when `merge`
+is asked for them).
+
+Example:
+    federation = GraphFederation("graphs/federation")
+    federation.add_repo(traced_mathlib, name="mathlib", workers=16)
+    federation.add_repo(traced_nng, name="MyNNG")
+    merged = federation.merge()
+    merged.graph.vs["repo"]   # shard of every vertex
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import igraph as ig
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from lean_dojo_v2.lean_dojo.data_extraction.traced_data import TracedRepo
+
+from lean_graph_analyser.attributes import CODED_COLUMNS, STRING_ATTRIBUTES, intern_table
+from lean_graph_analyser.cache.formats import ColumnarGraphCache, cache_dir_for, column_to_list
+from lean_graph_analyser.cache.manifest import FileManifest
+from lean_graph_analyser.extraction import extract_file_external_premises, parallel_map_files
+from lean_graph_analyser.graph_generator import GraphGenerator
+from lean_graph_analyser.symbols import SymbolTable
+from lean_graph_analyser.utils.csr import edge_tuples, edges_from_csr, unique_edges
+from lean_graph_analyser.utils.fingerprint import fingerprint_names
+from lean_graph_analyser.utils.notifier import ConsoleNotifier, Notifier
+
+FEDERATION_FILE = "federation.json"
+FEDERATION_VERSION = 1
+EXTERNAL_PREMISES_FILE = "external_premises.arrow"
+
+
+class Shard(NamedTuple):
+    """One repository's graph inside a federation."""
+    name: str
+    graph_location: str     # Relative to the federation directory
+    vcount: int
+    ecount: int
+    n_external: int         # Premises kept for cross-repo resolution
+
+
+class FederatedGraph(NamedTuple):
+    """Result of `GraphFederation.merge`."""
+    graph: ig.Graph
+    symbols: SymbolTable    # Symbol id == vertex id of `graph`
+    shards: List[str]
+    shard_of: np.ndarray    # Shard index (into `shards`) of every vertex
+    local_ids: np.ndarray   # Vertex id of every vertex inside its shard
+    n_cross_edges: int      # Edges resolved from external premises
+
+
+class GraphFederation:
+    """
+    A directory of per-repository graph shards that merge into one graph.
+
+    Args:
+        directory: Where the shards and `federation.json` live.
+        notifier: Where progress messages go (also passed to the shard builds).
+    """
+
+    def __init__(self, directory: str, notifier: Notifier = ConsoleNotifier()):
+        self.directory = directory
+        self.notifier = notifier
+        self._shards: Dict[str, Shard] = self._load_index()
+
+    # ==========================================
+    # Shards
+    # ==========================================
+
+    @property
+    def shards(self) -> List[Shard]:
+        """Shards in merge order (the order they were first added)."""
+        return list(self._shards.values())
+
+    def shard(self, name: str) -> Shard:
+        if name not in self._shards:
+            raise KeyError(f"No shard `{name}` in federation `{self.directory}`.")
+        return self._shards[name]
+
+    def add_repo(
+        self,
+        traced_repo: TracedRepo,
+        name: Optional[str] = None,
+        keep_external: bool = True,
+        **generator_kwargs,
+    ) -> Shard:
+        """
+        Builds (or updates) the shard of one repository.
+
+        The shard is an ordinary `GraphGenerator` cache, so re-adding a repo
+        reuses it, and `incremental=True` patches only changed files. Other
+        shards are not touched.
+
+        Args:
+            traced_repo: The traced repository.
+            name: Shard name; defaults to the repository name.
+            keep_external: Collect the premises outside this repository for
+                cross-repo edges. This walks the proofs of this repository a
+                second time (only when its content changed), so it can be
+                turned off for a base library whose outside premises are
+                only Lean core.
+            generator_kwargs: Passed to `GraphGenerator` (workers, incremental, ...).
+        """
+        name = name or traced_repo.name
+        if name in (".", "..") or os.sep in name or "/" in name:
+            raise ValueError(f"Invalid shard name `{name}`.")
+        graph_location = os.path.join("shards", name, "graph.graphml")
+        generator = GraphGenerator(
+            traced_repo,
+            notifier=self.notifier,
+            graph_location=os.path.join(self.directory, graph_location),
+            cache_format="columnar",
+            **generator_kwargs,
+        )
+        graph = generator.generate()
+
+        n_external = 0
+        external_path = self._external_path(graph_location)
+        if keep_external:
+            n_external = self._update_external_premises(generator, external_path)
+        elif os.path.exists(external_path):
+            os.remove(external_path)
+
+        shard = Shard(name, graph_location, graph.vcount(), graph.ecount(), n_external)
+        self._shards[name] = shard
+        self._save_index()
+        self.notifier.send(
+            f"🧩 Shard `{name}`: {shard.vcount} nodes, {shard.ecount} edges, "
+            f"{shard.n_external} external premises.",
+            important=True,
+        )
+        return shard
+
+    def remove(self, name: str) -> None:
+        """Deletes a shard and its files."""
+        shard = self.shard(name)
+        del self._shards[name]
+        self._save_index()
+        shutil.rmtree(os.path.join(self.directory, os.path.dirname(shard.graph_location)), ignore_errors=True)
+
+    def _cache(self, shard: Shard) -> ColumnarGraphCache:
+        return ColumnarGraphCache(cache_dir_for(os.path.join(self.directory, shard.graph_location)))
+
+    def _external_path(self, graph_location: str) -> str:
+        return os.path.join(self.directory, cache_dir_for(graph_location), EXTERNAL_PREMISES_FILE)
+
+    # ==========================================
+    # External Premises
+    # ==========================================
+
+    def _update_external_premises(self, generator: GraphGenerator, path: str) -> int:
+        """
+        Writes the shard's external premises, unless the saved ones belong to
+        the same vertices and file contents. Returns their number.
+        """
+        symbols = generator.symbol_table()
+        manifest = FileManifest.load(generator.manifest_location)
+        key = hashlib.sha1(
+            (fingerprint_names(symbols.names) + json.dumps(manifest.files if manifest else None, sort_keys=True))
+            .encode("utf-8")
+        ).hexdigest()
+        saved = _read_external_premises(path)
+        if saved is not None and saved[2] == key:
+            return len(saved[0])
+
+        self.notifier.send("🔗 Collecting premises outside the repository...")
+        traced_files = list(generator.traced_repo.traced_files)
+        external: List[Tuple[int, str]] = []
+        if generator.workers > 1 and len(traced_files) > 1:
+            for batch in parallel_map_files(traced_files, generator.workers, "external", symbols.ids):
+                for pairs, _ in batch:
+                    external.extend(pairs)
+        else:
+            for tf in traced_files:
+                external.extend(extract_file_external_premises(tf, symbols.ids))
+
+        sources = np.array([source for source, _ in external], dtype=np.int32)
+        premises = pa.array([premise for _, premise in external], type=pa.string()).dictionary_encode()
+        table = pa.table({"source": sources, "premise": premises}).replace_schema_metadata({"key": key})
+        tmp_path = f"{path}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        return len(external)
+
+    def external_premises(self, name: str) -> Tuple[np.ndarray, List[str]]:
+        """(source vertex ids inside the shard, premise names) of a shard."""
+        saved = _read_external_premises(self._external_path(self.shard(name).graph_location))
+        if saved is None:
+            return np.zeros(0, dtype=np.int32), []
+        return saved[0], saved[1]
+
+    def cross_references(self, name: str, against: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Resolves one shard's external premises against other shards, reading
+        only their name columns.
+
+        Args:
+            name: The shard whose premises are resolved (e.g. "MyNNG").
+            against: Shards to resolve against; defaults to all others, in
+                federation order (the first defining shard wins).
+
+        Returns:
+            One row per resolved premise use: source (name), premise, and
+            the shard that defines it.
+        """
+        against = [s for s in self._shards if s != name] if against is None else list(against)
+        sources, premises = self.external_premises(name)
+        wanted = set(premises)
+        defined_in: Dict[str, str] = {}
+        for other in against:
+            for premise in column_to_list(self._cache(self.shard(other)).load_vertex_table().column("name")):
+                if premise in wanted and premise not in defined_in:
+                    defined_in[premise] = other
+        own_names = self._cache(self.shard(name)).load_vertex_table().column("name")
+        rows = [(int(s), p, defined_in[p]) for s, p in zip(sources.tolist(), premises) if p in defined_in]
+        source_names = own_names.take(pa.array([s for s, _, _ in rows], type=pa.int64())).to_pylist() if rows else []
+        return pd.DataFrame({
+            "source": source_names,
+            "premise": [p for _, p, _ in rows],
+            "shard": [s for _, _, s in rows],
+        })
+
+    # ==========================================
+    # Merging
+    # ==========================================
+
+    def merge(
+        self,
+        names: Optional[Sequence[str]] = None,
+        attributes: Optional[Sequence[str]] = ("name",),
+    ) -> FederatedGraph:
+        """
+        Combines shards into one graph with cross-repo edges.
+
+        Vertices get the requested attributes plus a `repo` attribute (the
+        shard name). Code snippets stay in the shard sidecars; use `shard_of`
+        and `local_ids` with the shard's `CodeStore`.
+
+        Args:
+            names: Shards to merge, in priority order; defaults to all.
+            attributes: Vertex attribute columns read from the shards ("name"
+                is always read). Only these are converted to Python objects,
+                so the default keeps merging with a large shard cheap; None
+                reads every column. String attributes such as "file_path"
+                select their coded column (see `attributes`), whose shard
+                string tables are merged into one.
+        """
+        selected = [self.shard(n) for n in names] if names is not None else self.shards
+        requested = None
+        if attributes is not None:
+            requested = set(attributes) | {STRING_ATTRIBUTES[a] for a in attributes if STRING_ATTRIBUTES.get(a)}
+        symbols = SymbolTable()
+        columns: Dict[str, List] = {}
+        string_tables: Dict[str, Dict[str, int]] = {}
+        shard_of, local_ids, edges = [], [], []
+        unresolved: List[Tuple[np.ndarray, List[str]]] = []
+
+        for k, shard in enumerate(selected):
+            cache = self._cache(shard)
+            table = cache.load_vertex_table()
+            before = len(symbols)
+            remap = np.fromiter(
+                (symbols.intern(n) for n in column_to_list(table.column("name"))),
+                dtype=np.int64, count=table.num_rows,
+            )
+            # Names already defined by an earlier shard become that vertex
+            new = remap >= before
+            n_new = int(new.sum())
+            mask = pa.array(new)
+            wanted = [
+                attr for attr in table.column_names
+                if requested is None or attr == "name" or attr in requested
+            ]
+            coded = set(wanted) & set(CODED_COLUMNS)
+            shard_tables = cache.load_meta().get("graph_attributes", {}) if coded else {}
+            for attr in wanted:
+                column = columns.setdefault(attr, [_missing(attr)] * before)
+                if attr == "namespace_id":
+                    continue  # Filled from the merged symbol table below
+                values = column_to_list(table.column(attr).filter(mask))
+                if attr in CODED_COLUMNS:
+                    # Shard codes -> codes into the merged string table (-1 stays -1)
+                    shard_table = shard_tables.get(CODED_COLUMNS[attr], [])
+                    merged_codes = np.append(intern_table(string_tables.setdefault(attr, {}), shard_table), -1)
+                    values = merged_codes[np.asarray(values, dtype=np.int64)].tolist()
+                column.extend(values)
+            columns.setdefault("repo", []).extend([sys.intern(shard.name)] * n_new)
+            for attr, column in columns.items():
+                # Attributes this shard does not have
+                column.extend([_missing(attr)] * (before + n_new - len(column)))
+            shard_of.append(np.full(n_new, k, dtype=np.int32))
+            local_ids.append(np.flatnonzero(new).astype(np.int32))
+
+            local_edges = edges_from_csr(*cache.load_csr())
+            edges.append(remap[local_edges])
+            sources, premises = self.external_premises(shard.name)
+            unresolved.append((remap[sources], premises))
+
+        # Cross-repo edges: external premises against every merged name
+        n_cross = 0
+        for sources, premises in unresolved:
+            targets = np.array([symbols.ids.get(p, -1) for p in premises], dtype=np.int64)
+            found = targets >= 0
+            edges.append(np.column_stack([sources[found], targets[found]]))
+            n_cross += int(found.sum())
+
+        merged = unique_edges(np.concatenate(edges)) if edges else np.zeros((0, 2), dtype=np.int32)
+        merged = merged[merged[:, 0] != merged[:, 1]]
+        graph = ig.Graph(n=len(symbols), edges=edge_tuples(merged), directed=True)
+        for attr, values in columns.items():
+            graph.vs[attr] = values
+        for attr, string_table in string_tables.items():
+            graph[CODED_COLUMNS[attr]] = list(string_table)
+        if "namespace_id" in columns:
+            # The merged symbol table already holds every namespace
+            graph.vs["namespace_id"] = symbols.namespace_ids().tolist()
+            graph["namespaces"] = list(symbols.namespaces.names)
+        self.notifier.send(
+            f"🧩 Merged {len(selected)} shards: {graph.vcount()} nodes, {graph.ecount()} edges "
+            f"({n_cross} from cross-repo premises)."
+        )
+        return FederatedGraph(
+            graph=graph,
+            symbols=symbols,
+            shards=[s.name for s in selected],
+            shard_of=np.concatenate(shard_of) if shard_of else np.zeros(0, dtype=np.int32),
+            local_ids=np.concatenate(local_ids) if local_ids else np.zeros(0, dtype=np.int32),
+            n_cross_edges=n_cross,
+        )
+
+    # ==========================================
+    # Index File
+    # ==========================================
+
+    def _load_index(self) -> Dict[str, Shard]:
+        path = os.path.join(self.directory, FEDERATION_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != FEDERATION_VERSION:
+            raise ValueError(f"Unsupported federation version: {data.get('version')}")
+        return {entry["name"]: Shard(**entry) for entry in data["shards"]}
+
+    def _save_index(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, FEDERATION_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": FEDERATION_VERSION, "shards": [s._asdict() for s in self.shards]}, f, indent=1)
+        os.replace(tmp_path, path)
+
+
+def _missing(attr: str):
+    """Value of an attribute on vertices whose shard lacks it."""
+    return -1 if attr in CODED_COLUMNS else None
+
+
+def _read_external_premises(path: str) -> Optional[Tuple[np.ndarray, List[str], Optional[str]]]:
+    """(sources, premise names, key) saved at `path`, or None if missing."""
+    if not os.path.exists(path):
+        return None
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    metadata = table.schema.metadata or {}
+    key = metadata.get(b"key", b"").decode("utf-8") or None
+    sources = table.column("source").to_numpy().astype(np.int32)
+    return sources, column_to_list(table.column("premise")), key
@@ -6,11 +6,18 @@ This module extracts fine-grained theorem-dependency graphs from a LeanDojo Trac
 It enriches nodes with metadata (namespaces, code, file paths) suitable for 
 high-performance visualization (Cosmograph, Gephi, Plotly).
 
+Code snippets are kept out of the in-memory graph, in a sidecar `CodeStore`
+next to the cache, and are read lazily by vertex id. File paths, kinds and
+namespaces are int codes into per-graph string tables (see `attributes`),
+resolved on demand with `vertex_attribute`.
+
 """
 
 import os
+import time
 import igraph as ig
-from typing import Optional, Dict, Any, List, Tuple, Set
+import numpy as np
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Sequence, Tuple, Set
 from pathlib import Path
 from loguru import logger
 
@@ -18,6 +25,32 @@ from loguru import logger
 from lean_dojo_v2.lean_dojo.data_extraction.traced_data import TracedRepo, TracedFile
 
 # Local Imports
+from lean_graph_analyser.attributes import encode_attributes, intern_table, vertex_strings
+from lean_graph_analyser.extraction import (
+    NodeBatch,
+    extract_file_edges,
+    extract_file_nodes,
+    iter_theorem_edges,
+    parallel_map_files,
+)
+from lean_graph_analyser.cache.code_store import (
+    FULL_CODE_STORE,
+    SNIPPET_CHARS,
+    SNIPPET_STORE,
+    CodeSidecarWriter,
+    CodeStore,
+)
+from lean_graph_analyser.cache.edge_spool import EdgeSpool
+from lean_graph_analyser.cache.formats import GraphCache, GraphMLGraphCache, cache_dir_for, cache_for
+from lean_graph_analyser.cache.manifest import FileManifest, manifest_path_for
+from lean_graph_analyser.metrics.engine import MetricSpec
+from lean_graph_analyser.reachability import REACHABILITY_FILE, ReachabilityIndex
+from lean_graph_analyser.summaries import GraphSummary, summarize
+from lean_graph_analyser.symbols import SymbolTable
+from lean_graph_analyser.utils.csr import edge_tuples
+from lean_graph_analyser.utils.fingerprint import fingerprint_names, graph_fingerprint
+from lean_graph_analyser.utils.profiling import BuildProfiler, FileStats
+from lean_graph_analyser.views import GraphViews
 # (Assuming you have a notifier class, otherwise can be replaced with print)
 try:
     from lean_graph_analyser.utils.notifier import Notifier, ConsoleNotifier
@@ -27,6 +60,15 @@ except ImportError:
         def send(self, msg, important=False): print(msg)
     class ConsoleNotifier(Notifier): pass
 
+# Vertex attributes, in the column order they are created. The `*_id`
+# columns are codes into string tables kept as graph attributes, and
+# `namespace_id` is filled from the symbol table (see `attributes`).
+VERTEX_ATTRIBUTES = (
+    "name",                                             # 1. Identity
+    "file_id", "start_line", "end_line",                # 2. Source Location
+    "kind_id",                                          # 3. Theorem, Def, etc.
+)
+
 class GraphGenerator:
     """
     Converts a LeanDojo TracedRepo into a structured igraph object.
@@ -37,8 +79,31 @@ class GraphGenerator:
     - Annotates Nodes with:
       - Namespace (e.g., 'Mathlib.Algebra') for coloring.
       - File path for filtering.
+        (both stored as int codes, see `vertex_attribute`)
       - PageRank for node sizing.
-      - Code snippets for tooltips.
+      - Code snippets for tooltips (stored out of band, see `get_code`).
+
+    Args:
+        traced_repo: The traced Lean repository.
+        notifier: Where progress messages go.
+        graph_location: Path of the cached graph. The suffix is ignored: the
+            columnar cache for "graphs/dep.graphml" is the directory "graphs/dep/".
+        cache_format: On-disk format of the cache, "columnar" (default, fast
+            memory-mapped load) or "graphml". Use `export_graphml` to hand the
+            graph to external tools.
+        workers: Number of processes used to extract nodes and edges.
+            1 (default) runs serially; None uses every available CPU.
+        incremental: If True, a cached graph is checked against the per-file
+            content hashes in its manifest, and only the files that changed
+            are re-extracted and patched into it.
+        store_full_code: Also keep the untruncated source of every declaration
+            in the sidecar (`get_code(vid, full=True)`). Snippets are always kept.
+        checkpoint_interval: Seconds between edge-extraction checkpoints. A
+            killed build resumes from the last checkpoint on the next
+            `generate()` instead of starting Phase 2 over.
+        profile_location: Where the build profile (phase timings, per-file
+            costs, slowest theorems, dropped premises) is written as JSON
+            after a build or patch. Defaults to "<cache dir>.profile.json".
     """
 
     def __init__(
@@ -46,129 +111,619 @@ class GraphGenerator:
         traced_repo: TracedRepo,
         notifier: Notifier = ConsoleNotifier(),
         graph_location: str = "graphs/dependency_graph.graphml",
+        workers: Optional[int] = 1,
+        incremental: bool = False,
+        cache_format: str = "columnar",
+        store_full_code: bool = False,
+        checkpoint_interval: float = 300.0,
+        profile_location: Optional[str] = None,
     ):
         self.graph_location = graph_location
+        self.cache: GraphCache = cache_for(graph_location, cache_format)
+        self.cache_dir = cache_dir_for(graph_location)
+        self.store_full_code = store_full_code
+        self.checkpoint_interval = checkpoint_interval
+        # Phase 2 spool lives beside the cache so cache saves never touch it
+        self.spool = EdgeSpool(f"{self.cache_dir}.spool")
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.incremental = incremental
+        self.manifest_location = manifest_path_for(graph_location)
         self.notifier = notifier
+        self.profiler = BuildProfiler()
+        self.profile_location = profile_location or f"{self.cache_dir}.profile.json"
         self.graph: Optional[ig.Graph] = None
+        self._symbols: Optional[SymbolTable] = None
+        self._views: Optional[GraphViews] = None
         self.traced_repo = traced_repo
 
-    def generate(self) -> ig.Graph:
+    def generate(self, node_batches: Optional[Iterable[Tuple[NodeBatch, FileStats]]] = None) -> ig.Graph:
         """
-        Main pipeline: Load Cache -> Or Build New -> Save -> Return.
+        Main pipeline: Load Cache -> (Patch Changed Files) -> Or Build New -> Save -> Return.
+
+        Args:
+            node_batches: Phase 1 input already being produced elsewhere, one
+                (NodeBatch, FileStats) per traced file in file order, e.g.
+                from `TraceArtifactCache.export_stream`. A fresh build adds
+                the vertices as they arrive; otherwise they are drained first.
         """
-        # 1. Check Cache
-        if os.path.exists(self.graph_location):
-            self.notifier.send(f"📂 Found cached graph at `{self.graph_location}`. Loading...")
+        self.profiler = BuildProfiler()
+        self._symbols = None
+
+        # 1. Check Cache (falling back to a GraphML file left by older versions)
+        cache = self.cache
+        legacy = cache_for(self.graph_location, "graphml")
+        if not cache.exists() and legacy.exists():
+            cache = legacy
+
+        if cache.exists() and node_batches is not None:
+            # The traced files may only be complete once their producer is
+            with self.profiler.phase("node_extraction"):
+                for _ in node_batches:
+                    pass
+            node_batches = None
+
+        if cache.exists():
+            self.notifier.send(f"📂 Found cached graph at `{cache.location}`. Loading...")
             try:
-                self.graph = ig.Graph.Read_GraphML(self.graph_location)
+                with self.profiler.phase("cache_load"):
+                    self.graph = cache.load()
+                if "code" in self.graph.vs.attributes():
+                    self._externalize_code(self.graph)  # Cache from before the sidecar
+                if "file_id" not in self.graph.vs.attributes():
+                    encode_attributes(self.graph)  # String columns (GraphML or older caches)
+                if cache is not self.cache:
+                    self._save_graph()  # Migrate to the configured format
                 if self.graph.vcount() > 0:
                     self.notifier.send(f"✅ Loaded {self.graph.vcount()} nodes, {self.graph.ecount()} edges.")
-                    return self.graph
+                    if not self.incremental:
+                        return self.graph
+                    if self._refresh_cached_graph():
+                        self._report_profile()
+                        return self.graph
             except Exception as e:
                 self.notifier.send(f"⚠️ Cache corrupted ({e}). Regenerating...")
 
         # 2. Build Graph
         self.notifier.send(f"🏗️ Building graph from repo: `{self.traced_repo.name}`...", important=True)
-        self.graph = self._build_igraph_from_trace(self.traced_repo)
+        self.graph = self._build_igraph_from_trace(self.traced_repo, node_batches)
 
-        # 3. Save
-        self._save_graph()
-        
+        # 3. Save (the edge spool is only dropped once the graph is safely on disk)
+        if self._save_graph():
+            self.spool.clear()
+        with self.profiler.phase("manifest"):
+            self._save_manifest(FileManifest.from_traced_repo(self.traced_repo))
+
+        self._report_profile()
         return self.graph
 
-    def _build_igraph_from_trace(self, traced_repo: TracedRepo) -> ig.Graph:
-        """Core logic to convert LeanDojo ASTs into a Graph."""
+    def _report_profile(self) -> None:
+        """Writes the build profile as JSON and sends its summary."""
+        self.profiler.notify(self.notifier)
+        try:
+            self.profiler.save(self.profile_location)
+        except Exception as e:
+            self.notifier.send(f"⚠️ Failed to save build profile: {e}", important=True)
+
+    def _refresh_cached_graph(self) -> bool:
+        """
+        Brings the loaded cache up to date with the traced repo.
+
+        Returns:
+            False if the cache cannot be trusted (no usable manifest) and a
+            full rebuild is needed; True once the graph is current.
+        """
+        cached = FileManifest.load(self.manifest_location)
+        if cached is None:
+            self.notifier.send("⚠️ No file manifest next to the cached graph. Rebuilding...", important=True)
+            return False
+
+        current = FileManifest.from_traced_repo(self.traced_repo)
+        changed, removed = cached.diff(current)
+        if not changed and not removed:
+            self.notifier.send("✅ Cached graph is up to date.")
+            return True
+
+        self.notifier.send(
+            f"♻️ {len(changed)} changed and {len(removed)} removed file(s). Patching cached graph...",
+            important=True,
+        )
+        with self.profiler.phase("patch"):
+            self._patch_graph(self.graph, changed, removed)
+        self._save_graph()
+        with self.profiler.phase("manifest"):
+            self._save_manifest(current)
+        return True
+
+    def _build_igraph_from_trace(
+        self,
+        traced_repo: TracedRepo,
+        node_batches: Optional[Iterable[Tuple[NodeBatch, FileStats]]] = None,
+    ) -> ig.Graph:
+        """
+        Core logic to convert LeanDojo ASTs into a Graph.
+
+        With `workers > 1` both phases shard the traced files across a process
+        pool; the per-file batches are merged here in file order with the same
+        deduplication rules, so the result is identical to the serial build.
+        `node_batches`, if given, replaces the Phase 1 extraction.
+        """
         G = ig.Graph(directed=True)
-        node_lookup: Dict[str, int] = {}
-        
+        # Names are interned to vertex ids; `symbols.ids` is the name lookup
+        # both phases resolve against.
+        symbols = SymbolTable()
+        traced_files = list(traced_repo.traced_files)
+
         # --- Phase 1: Node Extraction (Theorems, Defs, Inductives) ---
         self.notifier.send("🔍 Phase 1: Extracting nodes & metadata...", important=False)
-        
-        # We iterate over FILES to get everything defined in them (not just theorems)
-        for tf in traced_repo.traced_files:
-            # get_premise_definitions returns dicts of EVERYTHING defined in the file
-            definitions = tf.get_premise_definitions()
-            
-            for definition in definitions:
-                full_name = definition.get('full_name')
-                if not full_name or full_name in node_lookup:
-                    continue
-
-                v = G.add_vertex()
-                node_lookup[full_name] = v.index
-                
-                # --- Metadata Injection ---
-                # 1. Identity
-                v["name"] = full_name
-                v["label"] = full_name.split('.')[-1] # Short name for display
-                
-                # 2. Taxonomy (Namespaces) - Crucial for Coloring
-                # Example: "Mathlib.Algebra.Group.Defs" -> root="Mathlib", group="Algebra"
-                parts = full_name.split('.')
-                v["root_namespace"] = parts[0] if parts else "Root"
-                v["namespace"] = parts[1] if len(parts) > 1 else parts[0]
-                v["full_namespace"] = ".".join(parts[:-1]) if len(parts) > 1 else "Root"
-
-                # 3. Source Location
-                v["file_path"] = str(tf.path)
-                v["start_line"] = definition.get("start", [0, 0])[0]
-                v["end_line"] = definition.get("end", [0, 0])[0]
-                
-                # 4. Content (Code)
-                # Truncate code to 1000 chars to keep graphml size manageable
-                raw_code = definition.get("code", "")
-                v["code"] = raw_code[:1000] if raw_code else ""
-                v["kind"] = definition.get("kind", "unknown") # Theorem, Def, etc.
-
-        self.notifier.send(f"✅ Extracted {len(node_lookup)} nodes.", important=True)
+
+        # We iterate over FILES to get everything defined in them (not just theorems).
+        # Attributes are gathered as plain column lists and the vertices are
+        # created in one add_vertices call: per-vertex add_vertex + attribute
+        # assignment gets very slow on large graphs.
+        profiler = self.profiler
+        with profiler.phase("node_extraction"):
+            columns = self._empty_columns()
+            tables = self._empty_tables()
+            code_writer = CodeSidecarWriter(self.cache_dir, self.store_full_code)
+            try:
+                for batch in self._iter_node_batches(traced_files, node_batches):
+                    self._add_node_batch(columns, tables, symbols, batch, code_writer)
+            except BaseException:
+                code_writer.abort()
+                raise
+            code_writer.close()
+
+        with profiler.phase("add_vertices"):
+            G.add_vertices(len(columns["name"]), attributes=columns)
+            self._set_string_tables(G, tables, symbols)
+
+        self.notifier.send(f"✅ Extracted {len(symbols)} nodes.", important=True)
+        self.notifier.send(
+            f"⏱️ Phase 1: extraction {profiler.phases[-2].wall_seconds:.2f}s, "
+            f"vertex insertion {profiler.phases[-1].wall_seconds:.2f}s",
+            important=True,
+        )
 
         # --- Phase 2: Edge Extraction (Dependencies) ---
         self.notifier.send("🔗 Phase 2: Extracting dependency edges...", important=False)
-        
-        edges_to_add: Set[Tuple[int, int]] = set()
-        
-        # We iterate over TRACED THEOREMS because they contain the proof ASTs 
-        # required to find what premises were used.
-        all_traced_theorems = traced_repo.get_traced_theorems()
-        count = 0
-        total = len(all_traced_theorems)
-
-        for traced_thm in all_traced_theorems:
-            count += 1
-            if count % 1000 == 0:
-                print(f"   Processing {count}/{total} theorems...", end='\r')
-
-            source_name = traced_thm.theorem.full_name
-            if source_name not in node_lookup:
-                continue # Should not happen often
-            
-            source_idx = node_lookup[source_name]
-
-            # Extract dependencies from the proof AST
-            # get_premise_full_names() finds identifiers resolved in the proof
-            try:
-                used_premises = traced_thm.get_premise_full_names()
-                
-                for target_name in used_premises:
-                    # Filter: Self-loops and references to things not in our graph (e.g. Lean core internals)
-                    if target_name in node_lookup and target_name != source_name:
-                        target_idx = node_lookup[target_name]
-                        edges_to_add.add((source_idx, target_idx))
-            except Exception as e:
-                # Occasional AST traversal errors shouldn't stop the whole build
-                logger.warning(f"Error extracting edges for {source_name}: {e}")
 
-        G.add_edges(list(edges_to_add))
+        # Edges stream through an on-disk spool, so memory stays bounded and a
+        # killed run can resume. The spool returns them deduplicated and sorted
+        # by (source, target), independent of how the work was sharded.
+        with profiler.phase("edge_extraction"):
+            edges = self._stream_edges(traced_files, symbols.ids)
+
+        with profiler.phase("add_edges"):
+            G.add_edges(edge_tuples(edges))
+
         self.notifier.send(f"✅ Edges extracted. Total Edges: {G.ecount()}", important=True)
-        
+        self.notifier.send(
+            f"⏱️ Phase 2: extraction {profiler.phases[-2].wall_seconds:.2f}s, "
+            f"edge insertion {profiler.phases[-1].wall_seconds:.2f}s",
+            important=True,
+        )
+
+        self._symbols = symbols
         return G
 
-    def _save_graph(self) -> None:
-        """Saves graph to disk."""
-        if not self.graph: return
+    def _stream_edges(self, traced_files: List[TracedFile], node_lookup: Dict[str, int]) -> Any:
+        """
+        Runs Phase 2 through the edge spool, resuming from its last checkpoint
+        when it belongs to the same set of vertices.
+
+        Returns:
+            All edges as an (m, 2) int32 array, sorted and deduplicated.
+        """
+        spool = self.spool
+        state = {"nodes": fingerprint_names(node_lookup), "n_files": len(traced_files)}
+        file_idx, thm_idx = 0, 0
+
+        previous = spool.load_checkpoint()
+        if previous is not None and all(previous.get(k) == v for k, v in state.items()):
+            file_idx, thm_idx = previous["file_index"], previous["theorem_index"]
+            self.notifier.send(
+                f"♻️ Resuming edge extraction at file {file_idx}/{len(traced_files)}, theorem {thm_idx}.",
+                important=True,
+            )
+        else:
+            spool.reset()
+
+        last_checkpoint = time.monotonic()
+
+        def checkpoint(next_file: int, next_theorem: int, force: bool = False) -> None:
+            nonlocal last_checkpoint
+            if force or time.monotonic() - last_checkpoint >= self.checkpoint_interval:
+                spool.checkpoint(dict(state, file_index=next_file, theorem_index=next_theorem))
+                last_checkpoint = time.monotonic()
+
+        def extract_serially(tf: TracedFile, f_idx: int, start: int) -> None:
+            # Theorem-level checkpoints: pending edges reach the spool before
+            # a checkpoint claims the theorems that produced them.
+            pending: List[Tuple[int, int]] = []
+            stats = FileStats(str(tf.path))
+            start_time = time.perf_counter()
+            for t_idx, thm_edges in enumerate(iter_theorem_edges(tf, node_lookup, start, stats), start=start + 1):
+                pending.extend(thm_edges)
+                if time.monotonic() - last_checkpoint >= self.checkpoint_interval:
+                    spool.add(np.array(pending, dtype=np.int32).reshape(-1, 2))
+                    pending = []
+                    checkpoint(f_idx, t_idx, force=True)
+            spool.add(np.array(pending, dtype=np.int32).reshape(-1, 2))
+            stats.edge_seconds = time.perf_counter() - start_time
+            self.profiler.add_file(stats)
+
+        # A file left half-done by a killed serial run is finished in-process first
+        if thm_idx > 0:
+            extract_serially(traced_files[file_idx], file_idx, thm_idx)
+            file_idx += 1
+            checkpoint(file_idx, 0, force=True)
+
+        total = len(traced_files)
+        remaining = traced_files[file_idx:]
+
+        def progress(done: int) -> None:
+            if done % 100 == 0:
+                self.notifier.send(f"⏳ Phase 2: {done}/{total} files processed...", important=False)
+
+        if self.workers > 1 and len(remaining) > 1:
+            for edges in self._iter_edge_batches(remaining, node_lookup):
+                spool.add(edges)
+                file_idx += 1
+                checkpoint(file_idx, 0)
+                progress(file_idx)
+        else:
+            for tf in remaining:
+                extract_serially(tf, file_idx, 0)
+                file_idx += 1
+                checkpoint(file_idx, 0)
+                progress(file_idx)
+
+        checkpoint(file_idx, 0, force=True)
+        return spool.merge()
+
+    def _patch_graph(self, G: ig.Graph, changed: Set[str], removed: Set[str]) -> None:
+        """
+        Re-extracts only the changed files and patches them into `G` in place.
+
+        Vertices of changed/removed files are dropped together with their
+        outgoing edges. Incoming edges from untouched files are remembered by
+        name and restored if their target still exists after re-extraction.
+        Patched vertices are appended, so vertex ids differ from a full rebuild
+        while the set of named vertices and edges is the same.
+
+        Note: premises of untouched files are not re-resolved, so a proof in an
+        untouched file that starts using a newly added name only gains that
+        edge on a full rebuild.
+        """
+        dirty = changed | removed
+        dirty_files = [i for i, path in enumerate(G["file_paths"]) if path in dirty]
+        names = G.vs["name"]
+        dirty_ids = set(np.flatnonzero(np.isin(G.vs["file_id"], dirty_files)).tolist())
+
+        # 1. Remember edges that point INTO dirty files from clean ones
+        kept_incoming = [
+            (names[s], names[t])
+            for s, t in G.get_edgelist()
+            if t in dirty_ids and s not in dirty_ids
+        ]
+
+        # 2. Drop the stale vertices (igraph removes their edges too)
+        kept_ids = [i for i in range(G.vcount()) if i not in dirty_ids]
+        G.delete_vertices(sorted(dirty_ids))
+        symbols = SymbolTable.from_names(G.vs["name"])
+        n_kept = len(symbols)
+
+        # 3. Re-extract the changed files, in repo order. The code sidecar is
+        #    rewritten to follow the new vertex ids.
+        changed_files = [tf for tf in self.traced_repo.traced_files if str(tf.path) in changed]
+        #    Kept vertices keep their file and kind codes; the namespace
+        #    codes follow the rebuilt symbol table.
+        columns = self._empty_columns()
+        tables = {
+            "file_id": {path: i for i, path in enumerate(G["file_paths"])},
+            "kind_id": {kind: i for i, kind in enumerate(G["kinds"])},
+        }
+        code_writer = CodeSidecarWriter(self.cache_dir, self.store_full_code)
+        try:
+            code_writer.copy_from(self.cache_dir, kept_ids)
+            for batch in self._iter_node_batches(changed_files):
+                self._add_node_batch(columns, tables, symbols, batch, code_writer)
+        except BaseException:
+            code_writer.abort()
+            raise
+        code_writer.close()
+        G.add_vertices(len(columns["name"]), attributes=columns)
+        self._set_string_tables(G, tables, symbols)
+
+        node_lookup = symbols.ids
+        edges_to_add: Dict[Tuple[int, int], None] = {}
+        for edges in self._iter_edge_batches(changed_files, node_lookup):
+            edges_to_add.update(dict.fromkeys(map(tuple, edges.tolist())))
+        for source_name, target_name in kept_incoming:
+            if target_name in node_lookup:
+                edges_to_add[(node_lookup[source_name], node_lookup[target_name])] = None
+        self._symbols = symbols
+
+        G.add_edges(list(edges_to_add))
+        self.notifier.send(
+            f"✅ Patched {len(dirty_ids)} stale nodes -> {G.vcount()} nodes, {G.ecount()} edges.",
+            important=True,
+        )
+
+    def _iter_node_batches(
+        self,
+        traced_files: Sequence[TracedFile],
+        produced: Optional[Iterable[Tuple[NodeBatch, FileStats]]] = None,
+    ) -> Iterator[NodeBatch]:
+        """Yields one NodeBatch per file, in file order: from `produced`, serially or from the pool."""
+        if produced is not None:
+            for batch, stats in produced:
+                self.profiler.add_file(stats)
+                yield batch
+        elif self.workers > 1 and len(traced_files) > 1:
+            for shard in parallel_map_files(
+                traced_files, self.workers, "nodes", max_code_chars=self._max_code_chars
+            ):
+                for batch, stats in shard:
+                    self.profiler.add_file(stats)
+                    yield batch
+        else:
+            for tf in traced_files:
+                stats = FileStats(str(tf.path))
+                batch = extract_file_nodes(tf, self._max_code_chars, stats)
+                self.profiler.add_file(stats)
+                yield batch
+
+    def _iter_edge_batches(
+        self, traced_files: Sequence[TracedFile], node_lookup: Dict[str, int]
+    ) -> Iterator[Any]:
+        """Yields one int32 (k, 2) edge array per file, in file order."""
+        if self.workers > 1 and len(traced_files) > 1:
+            for shard in parallel_map_files(traced_files, self.workers, "edges", node_lookup):
+                for edges, stats in shard:
+                    self.profiler.add_file(stats)
+                    yield edges
+        else:
+            for tf in traced_files:
+                stats = FileStats(str(tf.path))
+                edges = extract_file_edges(tf, node_lookup, stats)
+                self.profiler.add_file(stats)
+                yield edges
+
+    @property
+    def _max_code_chars(self) -> Optional[int]:
+        # The full-code store needs the untruncated source from the extractor
+        return None if self.store_full_code else SNIPPET_CHARS
+
+    @staticmethod
+    def _empty_columns() -> Dict[str, List[Any]]:
+        return {attr: [] for attr in VERTEX_ATTRIBUTES}
+
+    @staticmethod
+    def _empty_tables() -> Dict[str, Dict[str, int]]:
+        """String -> code tables of the `file_id` and `kind_id` columns."""
+        return {"file_id": {}, "kind_id": {}}
+
+    @staticmethod
+    def _set_string_tables(G: ig.Graph, tables: Dict[str, Dict[str, int]], symbols: SymbolTable) -> None:
+        """Stores the string tables on `G` and fills `namespace_id` (symbol id == vertex id)."""
+        G["file_paths"] = list(tables["file_id"])
+        G["kinds"] = list(tables["kind_id"])
+        G["namespaces"] = list(symbols.namespaces.names)
+        G.vs["namespace_id"] = symbols.namespace_ids().tolist()
+
+    @staticmethod
+    def _add_node_batch(
+        columns: Dict[str, List[Any]],
+        tables: Dict[str, Dict[str, int]],
+        symbols: SymbolTable,
+        batch: NodeBatch,
+        code_writer: CodeSidecarWriter,
+    ) -> None:
+        """
+        Appends one file's definitions to the attribute columns, skipping names
+        already seen. New names are interned in `symbols`, so vertex ids
+        continue after the symbols already there.
+
+        The file path and kinds are stored as codes into `tables`; namespaces
+        are not filled here but taken from the symbol table once all batches
+        are in. Code goes to the sidecar in vertex id order.
+        """
+        file_id = int(intern_table(tables["file_id"], [batch.file_path])[0])
+        for full_name, start_line, end_line, code, kind in zip(
+            batch.names, batch.start_lines, batch.end_lines, batch.codes, batch.kinds
+        ):
+            if full_name in symbols.ids:
+                continue
+            symbols.intern(full_name)
+
+            # --- Metadata Injection ---
+            # 1. Identity (the namespace comes from the symbol table)
+            columns["name"].append(full_name)
+
+            # 2. Source Location
+            columns["file_id"].append(file_id)
+            columns["start_line"].append(start_line)
+            columns["end_line"].append(end_line)
+
+            # 3. Content (Code) lives in the sidecar, indexed by vertex id
+            code_writer.append(code)
+            columns["kind_id"].append(tables["kind_id"].setdefault(kind, len(tables["kind_id"])))
+
+    def symbol_table(self) -> SymbolTable:
+        """
+        Interned names of the current graph: symbol id == vertex id.
+
+        Kept from the last build or patch; rebuilt from the vertex names
+        after a plain cache load.
+        """
+        if self.graph is None:
+            raise ValueError("No graph to index. Call generate() first.")
+        if self._symbols is None or len(self._symbols) != self.graph.vcount():
+            self._symbols = SymbolTable.from_names(self.graph.vs["name"])
+        return self._symbols
+
+    def _externalize_code(self, G: ig.Graph) -> None:
+        """Moves an inline `code` attribute (older caches) into the sidecar."""
+        code_writer = CodeSidecarWriter(self.cache_dir, full_code=False)
+        code_writer.extend(G.vs["code"])
+        code_writer.close()
+        del G.vs["code"]
+
+    # ==========================================
+    # Code Access
+    # ==========================================
+
+    def code_store(self, full: bool = False) -> CodeStore:
+        """
+        Lazy, memory-mapped access to vertex code by vertex id.
+
+        Args:
+            full: Return the untruncated-code store (requires `store_full_code`).
+        """
+        store = CodeStore(self.cache_dir, FULL_CODE_STORE if full else SNIPPET_STORE)
+        if not store.exists():
+            raise FileNotFoundError(f"No {'full ' if full else ''}code store in `{self.cache_dir}`.")
+        return store
+
+    def get_code(self, vid: int, full: bool = False) -> str:
+        """Code of one vertex: a snippet by default, the whole declaration with `full=True`."""
+        store = self.code_store(full)
+        try:
+            return store.get(vid)
+        finally:
+            store.close()
+
+    # ==========================================
+    # Attribute Access
+    # ==========================================
+
+    def vertex_attribute(self, attribute: str, vids: Optional[Sequence[int]] = None) -> List[Optional[str]]:
+        """
+        String attribute ("file_path", "kind", "label", "full_namespace",
+        "namespace", "root_namespace") of some or all vertices, resolved from
+        the coded columns only when asked for.
+        """
+        if self.graph is None:
+            raise ValueError("No graph loaded. Call generate() first.")
+        return vertex_strings(self.graph, attribute, vids)
+
+    # ==========================================
+    # Reachability
+    # ==========================================
+
+    def reachability_index(self, rebuild: bool = False) -> ReachabilityIndex:
+        """
+        Transitive-dependency index of the current graph, stored next to the
+        cache and reused while the graph fingerprint matches.
+
+        Args:
+            rebuild: Ignore a saved index and rebuild it.
+        """
+        if self.graph is None:
+            raise ValueError("No graph to index. Call generate() first.")
+        path = os.path.join(self.cache_dir, REACHABILITY_FILE)
+        fingerprint = graph_fingerprint(self.graph)
+        index = None if rebuild else ReachabilityIndex.load(path, fingerprint)
+        if index is None:
+            self.notifier.send("🧭 Building reachability index...")
+            start = time.time()
+            index = ReachabilityIndex.build(self.graph)
+            self.notifier.send(f"⏱️ Reachability index built in {time.time() - start:.1f}s")
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                index.save(path)
+            except Exception as e:
+                self.notifier.send(f"⚠️ Failed to save reachability index: {e}", important=True)
+        index.set_names(self.graph.vs["name"])
+        return index
+
+    # ==========================================
+    # Views & Summaries
+    # ==========================================
+
+    def views(self) -> GraphViews:
+        """
+        Shared state for subgraph and ego-network views of the current graph
+        (see `views`), rebuilt when the graph changes.
+        """
+        if self.graph is None:
+            raise ValueError("No graph to view. Call generate() first.")
+        if self._views is None or not self._views.is_current(self.graph):
+            self._views = GraphViews(self.graph)
+        return self._views
+
+    def summary(self, level: str = "file", metrics: Sequence[MetricSpec] = ("pagerank",)) -> GraphSummary:
+        """
+        Quotient graph of the current graph at "file", "module" or "namespace"
+        level (see `summaries`), cached in `<cache dir>/summaries/`. Metrics
+        are cached in the `metrics/` directory beside the graph cache.
+        """
+        if self.graph is None:
+            raise ValueError("No graph to summarize. Call generate() first.")
+        return summarize(
+            self.graph,
+            level,
+            metrics,
+            cache_dir=os.path.join(self.cache_dir, "summaries"),
+            metric_cache_dir=os.path.join(os.path.dirname(self.cache_dir), "metrics"),
+        )
+
+    def _save_graph(self) -> bool:
+        """Saves graph to disk. Returns True on success."""
+        if not self.graph: return False
+        try:
+            with self.profiler.phase("save"):
+                self.cache.save(self.graph)
+            self.notifier.send(f"💾 Graph saved to `{self.cache.location}`", important=True)
+            return True
+        except Exception as e:
+            self.notifier.send(f"⚠️ Failed to save: {e}", important=True)
+            return False
+
+    def export_graphml(self, path: Optional[str] = None, include_code: bool = True) -> str:
+        """
+        Writes the current graph as GraphML for external tools (Gephi, Cosmograph).
+
+        Args:
+            path: Output file. Defaults to the graph location with a .graphml suffix.
+            include_code: Join the code snippets from the sidecar back in as
+                a `code` vertex attribute.
+
+        Returns:
+            The path written to.
+        """
+        if self.graph is None:
+            raise ValueError("No graph to export. Call generate() first.")
+        exported = self.graph
+        if include_code:
+            store = CodeStore(self.cache_dir, SNIPPET_STORE)
+            if not store.exists():
+                self.notifier.send(
+                    f"⚠️ No code sidecar in `{self.cache_dir}`; exporting without `code`.", important=True
+                )
+            else:
+                try:
+                    n_stored = len(store)
+                    if n_stored == self.graph.vcount():
+                        exported = self.graph.copy()
+                        exported.vs["code"] = store.get_many(range(exported.vcount()))
+                    else:
+                        self.notifier.send(
+                            f"⚠️ Code sidecar holds {n_stored} entries for {self.graph.vcount()} nodes; "
+                            "exporting without `code`.",
+                            important=True,
+                        )
+                finally:
+                    store.close()
+        exporter = GraphMLGraphCache(path) if path else cache_for(self.graph_location, "graphml")
+        exporter.save(exported)
+        self.notifier.send(f"📤 Graph exported to `{exporter.location}`", important=True)
+        return exporter.location
+
+    def _save_manifest(self, manifest: FileManifest) -> None:
+        """Writes the per-file hashes that describe the graph on disk."""
         try:
-            os.makedirs(os.path.dirname(self.graph_location), exist_ok=True)
-            self.graph.write_graphml(self.graph_location)
-            self.notifier.send(f"💾 Graph saved to `{self.graph_location}`", important=True)
+            manifest.save(self.manifest_location)
         except Exception as e:
-            self.notifier.send(f"⚠️ Failed to save: {e}", important=True)
\ No newline at end of file
+            self.notifier.send(f"⚠️ Failed to save manifest: {e}", important=True)
\ No newline at end of file
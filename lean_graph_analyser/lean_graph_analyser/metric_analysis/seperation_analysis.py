@@ -13,4 +13,228 @@ Output:
       Mathlib theorems from homework problems or other theorem classes.
 
 The module supports human-labeled important theorems for more nuanced analysis.
+
+The engine works on metric arrays (one score per vertex, as returned by
+`metrics.engine.MetricEngine`) for many metrics at once. Each metric is sorted
+once; AUC, precision@k, average precision and the KS statistic are then read
+off cumulative label counts over that order. Bootstrap confidence intervals
+reuse the same order: a resample is a vector of multiplicities over the
+original items, so resamples are evaluated in vectorized blocks without
+sorting again.
 """
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Mapping, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+Scores = Union[Mapping[str, Sequence[float]], pd.DataFrame]
+
+
+class _SortedMetric:
+    """One metric's labelled items in descending score order, with tie groups."""
+
+    def __init__(self, scores: np.ndarray, labels: np.ndarray):
+        order = np.argsort(-scores, kind="stable")
+        self.order = order
+        self.labels = labels[order]
+        sorted_scores = scores[order]
+        # Last position of every group of equal scores (None: no ties)
+        ends = np.flatnonzero(sorted_scores[1:] != sorted_scores[:-1])
+        self.group_ends = None if len(ends) == len(scores) - 1 else np.append(ends, len(scores) - 1)
+        self.positives = np.flatnonzero(self.labels)
+
+
+def _prepare(scores: Scores, labels: Sequence[float], positive: float) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Drops unlabelled items (label NaN or negative) and maps labels to {0, 1}."""
+    labels = np.asarray(labels, dtype=float)
+    labelled = np.isfinite(labels) & (labels >= 0)
+    y = (labels[labelled] == positive).astype(np.int64)
+    arrays = {}
+    for name in scores:
+        values = np.asarray(scores[name], dtype=float)
+        if len(values) != len(labels):
+            raise ValueError(f"Metric '{name}' has {len(values)} scores for {len(labels)} labels")
+        # Missing scores rank last
+        arrays[name] = np.nan_to_num(values[labelled], nan=-np.inf)
+    return arrays, y
+
+
+def _evaluate(
+    metric: _SortedMetric, weights: np.ndarray, ks: Sequence[int]
+) -> Dict[str, np.ndarray]:
+    """
+    Separation statistics for a block of resamples.
+
+    Args:
+        metric: The sorted metric.
+        weights: (B, n) int32 multiplicity of every sorted item in each
+            resample (all ones for the plain, non-resampled statistics).
+        ks: Cut-offs of precision@k.
+
+    Returns:
+        Mapping statistic -> (B,) array.
+    """
+    pos = weights * metric.labels.astype(np.int32)
+    cum_w = np.cumsum(weights, axis=1, dtype=np.int32)
+    cum_tp = np.cumsum(pos, axis=1, dtype=np.int32)
+    n_pos = cum_tp[:, -1].astype(float)
+    n_neg = cum_w[:, -1] - n_pos
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if metric.group_ends is None:
+            # No ties: AUC and AP only need the columns of positive items,
+            # where tp grows by the item's multiplicity
+            cols = metric.positives
+            w = weights[:, cols]
+            tp = cum_tp[:, cols]
+            seen = cum_w[:, cols]
+            # Each positive copy beats the negatives ranked after it
+            auc = n_pos * n_neg - np.einsum("ij,ij->i", w, seen - tp, dtype=float)
+            average_precision = np.einsum("ij,ij->i", w, tp / np.maximum(seen, 1).astype(np.float32), dtype=float)
+            tp_all, seen_all = cum_tp, cum_w
+        else:
+            # Counts at the end of every tie group (i.e. at every distinct threshold)
+            tp_all = cum_tp[:, metric.group_ends]
+            seen_all = cum_w[:, metric.group_ends]
+            tp_in = np.diff(tp_all, axis=1, prepend=0).astype(np.float32)
+            fp_in = np.diff(seen_all - tp_all, axis=1, prepend=0).astype(np.float32)
+            fp = (seen_all - tp_all).astype(np.float32)
+            # P(score_pos > score_neg) + P(tie) / 2
+            auc = (tp_in * (n_neg[:, None] - fp + 0.5 * fp_in)).sum(axis=1, dtype=float)
+            # Sum over thresholds of recall gain times precision
+            average_precision = (tp_in * tp_all / np.maximum(seen_all, 1)).sum(axis=1, dtype=float)
+        auc /= n_pos * n_neg
+        average_precision /= n_pos
+
+        # KS: largest gap between TPR and FPR, with TPR - FPR = tp * (1/P + 1/N) - seen / N
+        gap = tp_all * (1 / n_pos + 1 / n_neg)[:, None].astype(np.float32)
+        gap -= seen_all * (1 / n_neg)[:, None].astype(np.float32)
+        ks_stat = np.maximum(gap.max(axis=1), -gap.min(axis=1))
+
+    results = {"auc": auc, "average_precision": average_precision, "ks": ks_stat.astype(float)}
+
+    # precision@k: the k-th position of the resampled ranking falls inside
+    # item j, whose copies occupy positions cum_w[j - 1] + 1 .. cum_w[j]
+    B, n = weights.shape
+    rows = np.arange(B)
+    flat_cum_w = (cum_w + (rows * (n + 1))[:, None]).ravel()
+    total = cum_w[:, -1]
+    for k in ks:
+        j = np.searchsorted(flat_cum_w, np.minimum(k, total) + rows * (n + 1)) - rows * n
+        before_w = np.where(j > 0, cum_w[rows, j - 1], 0)
+        before_tp = np.where(j > 0, cum_tp[rows, j - 1], 0)
+        taken = np.minimum(k, total) - before_w
+        results[f"precision@{k}"] = (before_tp + metric.labels[j] * taken) / np.minimum(k, total)
+    return results
+
+
+def separation_analysis(
+    scores: Scores,
+    labels: Sequence[float],
+    ks: Sequence[int] = (10, 100, 1000),
+    positive: float = 1,
+) -> pd.DataFrame:
+    """
+    Separation quality of many metrics at once.
+
+    Args:
+        scores: Mapping metric name -> score per item (higher ranks first),
+            e.g. the output of `MetricEngine.compute`, or a DataFrame.
+        labels: Class of every item (e.g. 1 Mathlib, 0 homework). NaN or
+            negative labels mark unlabelled items, which are ignored.
+        ks: Cut-offs for precision@k.
+        positive: Label value of the positive class.
+
+    Returns:
+        DataFrame indexed by metric with columns auc, average_precision, ks,
+        precision@k for every k, n_pos and n_neg.
+    """
+    arrays, y = _prepare(scores, labels, positive)
+    ones = np.ones((1, len(y)), dtype=np.int32)
+    rows = {}
+    for name, values in arrays.items():
+        stats = _evaluate(_SortedMetric(values, y), ones, ks)
+        rows[name] = {stat: float(value[0]) for stat, value in stats.items()}
+        rows[name].update(n_pos=int(y.sum()), n_neg=int(len(y) - y.sum()))
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def bootstrap_separation(
+    scores: Scores,
+    labels: Sequence[float],
+    ks: Sequence[int] = (10, 100, 1000),
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    seed: int = 0,
+    workers: int = 1,
+    positive: float = 1,
+    max_bytes: int = 256 * 2**20,
+) -> pd.DataFrame:
+    """
+    Separation statistics with percentile bootstrap confidence intervals.
+
+    Every metric is evaluated on the same resamples, so intervals of
+    different metrics are comparable. Resamples are drawn as multiplicity
+    vectors over the items and evaluated in blocks of (resamples x items)
+    arrays bounded by `max_bytes`; blocks run on `workers` threads.
+
+    Returns:
+        The `separation_analysis` table plus `<stat>_low` / `<stat>_high`
+        columns for every statistic.
+    """
+    arrays, y = _prepare(scores, labels, positive)
+    n = len(y)
+    point = separation_analysis(scores, labels, ks, positive)
+
+    # Several (B, n) 4-byte temporaries live at once per block
+    block = max(1, min(n_resamples, max_bytes // (8 * 4 * max(n, 1))))
+    rng = np.random.default_rng(seed)
+    seeds = rng.integers(0, 2**63, size=-(-n_resamples // block))
+    sizes = [min(block, n_resamples - i * block) for i in range(len(seeds))]
+    sorted_metrics = {name: _SortedMetric(values, y) for name, values in arrays.items()}
+
+    def run_block(args: Tuple[int, int]) -> Dict[str, Dict[str, np.ndarray]]:
+        block_seed, size = args
+        draws = np.random.default_rng(block_seed).integers(0, n, size=(size, n))
+        # Multiplicity of every item in each resample
+        counts = np.bincount((draws + (np.arange(size) * n)[:, None]).ravel(), minlength=size * n)
+        weights = counts.reshape(size, n).astype(np.int32)
+        return {
+            name: _evaluate(metric, weights.take(metric.order, axis=1), ks)
+            for name, metric in sorted_metrics.items()
+        }
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        blocks = list(executor.map(run_block, zip(seeds.tolist(), sizes)))
+
+    alpha = (1 - confidence) / 2
+    for name in sorted_metrics:
+        for stat in blocks[0][name]:
+            samples = np.concatenate([b[name][stat] for b in blocks])
+            low, high = np.nanquantile(samples, [alpha, 1 - alpha]) if np.isfinite(samples).any() else (np.nan, np.nan)
+            point.loc[name, f"{stat}_low"] = low
+            point.loc[name, f"{stat}_high"] = high
+    return point
+
+
+def separation_from_ranking(
+    rank_list: Sequence[str],
+    theorem_list: Union[Mapping[str, float], Sequence[Tuple[str, float]]],
+    ks: Sequence[int] = (10, 100, 1000),
+    positive: float = 1,
+) -> pd.DataFrame:
+    """
+    Separation quality of a single ranked list of theorem names.
+
+    Args:
+        rank_list: Theorem names, best first. Labelled theorems missing from
+            the list rank last.
+        theorem_list: Mapping (or pairs) name -> class label.
+    """
+    labelled = dict(theorem_list)
+    names = list(labelled)
+    position = {name: i for i, name in enumerate(rank_list)}
+    scores = np.array([-position.get(name, np.inf) for name in names], dtype=float)
+    return separation_analysis({"ranking": scores}, [labelled[name] for name in names], ks, positive)
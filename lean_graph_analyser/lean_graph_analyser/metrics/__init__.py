@@ -3,6 +3,7 @@ Graph Metrics Module.
 
 This package contains various graph algorithms for computing metrics on dependency graphs.
 
-Each metric module takes a graph as input and outputs a dictionary that assigns
-a real number (metric value) to each node in the graph.
+Each metric takes a graph as input and outputs a NumPy array that assigns a real
+number (metric value) to each node, indexed by vertex id. Metrics are registered
+by name in `registry` and computed, shared and cached by `engine.MetricEngine`.
 """
@@ -0,0 +1,55 @@
+"""
+Built-in Node Metrics.
+
+Edges point from a theorem to the premises its proof uses, so "in" quantities
+(in-degree, PageRank) reward foundational declarations and "out" quantities
+(out-degree, reverse PageRank, transitive dependencies) reward declarations
+that build on a lot of the library.
+"""
+
+import numpy as np
+
+from lean_graph_analyser.metrics.registry import MetricContext, register_metric
+from lean_graph_analyser.utils.dag import descendant_counts
+
+
+@register_metric("pagerank", damping=0.85)
+def pagerank(ctx: MetricContext, damping: float) -> np.ndarray:
+    """PageRank along dependency edges: mass flows to heavily used premises."""
+    return np.asarray(ctx.g.pagerank(directed=True, damping=damping), dtype=float)
+
+
+@register_metric("reverse_pagerank", damping=0.85)
+def reverse_pagerank(ctx: MetricContext, damping: float) -> np.ndarray:
+    """PageRank on the reversed graph: mass flows to theorems with deep proofs."""
+    return np.asarray(ctx.reversed_graph.pagerank(directed=True, damping=damping), dtype=float)
+
+
+@register_metric("in_degree")
+def in_degree(ctx: MetricContext) -> np.ndarray:
+    """Number of declarations using this one directly."""
+    return np.bincount(ctx.edges[:, 1], minlength=ctx.g.vcount()).astype(float)
+
+
+@register_metric("out_degree")
+def out_degree(ctx: MetricContext) -> np.ndarray:
+    """Number of premises used directly."""
+    return np.bincount(ctx.edges[:, 0], minlength=ctx.g.vcount()).astype(float)
+
+
+@register_metric("betweenness", cutoff=None)
+def betweenness(ctx: MetricContext, cutoff) -> np.ndarray:
+    """Exact directed betweenness; `cutoff` limits path lengths considered."""
+    return np.asarray(ctx.g.betweenness(directed=True, cutoff=cutoff), dtype=float)
+
+
+@register_metric("k_core", mode="all")
+def k_core(ctx: MetricContext, mode: str) -> np.ndarray:
+    """Coreness (k-core index), on in, out or all edges."""
+    return np.asarray(ctx.g.coreness(mode=mode), dtype=float)
+
+
+@register_metric("transitive_dependencies")
+def transitive_dependencies(ctx: MetricContext) -> np.ndarray:
+    """Number of declarations reachable through premises (transitive closure size)."""
+    return descendant_counts(ctx.g, ctx.condensation).astype(float)
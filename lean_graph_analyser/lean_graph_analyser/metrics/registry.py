@@ -0,0 +1,113 @@
+"""
+Metric Registry.
+
+Named node metrics, registered with `@register_metric`. A metric is a function
+`func(ctx, **params) -> np.ndarray` returning one float per vertex (indexed by
+vertex id). It receives a `MetricContext` rather than the bare graph, so
+metrics computed together share intermediate results (edge arrays, the reversed
+graph, the SCC condensation, ...) instead of rebuilding them each time.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+import igraph as ig
+import numpy as np
+
+from lean_graph_analyser.utils.csr import edge_array
+from lean_graph_analyser.utils.dag import Condensation, condense
+
+
+class MetricContext:
+    """
+    One graph plus the intermediate results shared by the metrics computed on it.
+
+    Args:
+        g: The dependency graph.
+        workers: Processes or threads a metric may use. Metrics read it from
+            the context rather than taking it as a parameter, so it does not
+            change their cache key.
+    """
+
+    def __init__(self, g: ig.Graph, workers: int = 1):
+        self.g = g
+        self.workers = workers
+        self._shared: Dict[str, Any] = {}
+
+    def shared(self, key: str, build: Callable[[], Any]) -> Any:
+        """Returns the intermediate stored under `key`, building it on first use."""
+        if key not in self._shared:
+            self._shared[key] = build()
+        return self._shared[key]
+
+    @property
+    def edges(self) -> np.ndarray:
+        """(m, 2) int32 edge array of the graph."""
+        return self.shared("edges", lambda: edge_array(self.g))
+
+    @property
+    def reversed_graph(self) -> ig.Graph:
+        """The graph with every edge flipped (premise -> theorem)."""
+        return self.shared(
+            "reversed_graph",
+            lambda: ig.Graph(self.g.vcount(), self.edges[:, ::-1].tolist(), directed=True),
+        )
+
+    @property
+    def condensation(self) -> Condensation:
+        """SCC condensation of the graph."""
+        return self.shared("condensation", lambda: condense(self.g))
+
+
+@dataclass(frozen=True)
+class Metric:
+    """
+    A registered metric.
+
+    Args:
+        name: Registry key.
+        func: `func(ctx, **params) -> np.ndarray` of shape (vcount,).
+        defaults: Default parameters; callers may override any of them.
+        version: Bump when the implementation changes, to invalidate caches.
+        description: One-line summary (the function's docstring by default).
+    """
+    name: str
+    func: Callable[..., np.ndarray]
+    defaults: Dict[str, Any] = field(default_factory=dict)
+    version: int = 1
+    description: str = ""
+
+    def resolve_params(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Defaults overridden by `params`; unknown parameter names are rejected."""
+        unknown = set(params) - set(self.defaults)
+        if unknown:
+            raise ValueError(f"Unknown parameters for metric '{self.name}': {sorted(unknown)}")
+        return {**self.defaults, **params}
+
+
+METRICS: Dict[str, Metric] = {}
+
+
+def register_metric(name: str, version: int = 1, **defaults: Any) -> Callable:
+    """
+    Decorator registering a metric function under `name`.
+
+    Keyword arguments are the metric's parameters and their defaults, e.g.
+    `@register_metric("pagerank", damping=0.85)`.
+    """
+    def decorator(func: Callable[..., np.ndarray]) -> Callable[..., np.ndarray]:
+        doc = (func.__doc__ or "").strip().splitlines()
+        METRICS[name] = Metric(name, func, dict(defaults), version, doc[0] if doc else "")
+        return func
+    return decorator
+
+
+def get_metric(name: str) -> Metric:
+    try:
+        return METRICS[name]
+    except KeyError:
+        raise KeyError(f"Unknown metric '{name}'. Available: {available_metrics()}") from None
+
+
+def available_metrics() -> List[str]:
+    return sorted(METRICS)
@@ -0,0 +1,342 @@
+"""
+Sampled Metrics.
+
+Approximations of path-based centralities that are infeasible to compute
+exactly on a Mathlib-scale graph. Each one exposes its accuracy/runtime knob
+explicitly, so callers choose the trade-off:
+
+    - `sampled_betweenness`: Brandes dependencies accumulated from a uniform
+      sample of pivot sources, with a per-vertex standard error.
+      Cost: O(n_pivots * (V + E)).
+    - `hyperball`: HyperLogLog-based neighbourhood function (HyperANF), giving
+      harmonic centrality, closeness and reachable-set sizes.
+      Cost: O(iterations * E * 2^precision) byte operations; relative error of
+      the set sizes is about 1.04 / sqrt(2^precision).
+
+Both take a `cutoff` on path length and a number of `workers`. As
+registered metrics, they run with the workers of the `MetricEngine`, which
+are not part of the cache key.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple
+
+import igraph as ig
+import numpy as np
+
+from lean_graph_analyser.metrics.registry import MetricContext, register_metric
+from lean_graph_analyser.utils.csr import csr_from_edges, edge_array, gather_neighbors, sorted_unique
+from lean_graph_analyser.utils.parallel import make_shards, pool_context
+
+
+# ==========================================
+# Pivot-Sampled Betweenness
+# ==========================================
+
+class SampledEstimate(NamedTuple):
+    """
+    values: estimate for every vertex.
+    stderr: its standard error; values +- 1.96 * stderr is a ~95% interval.
+    n_samples: number of pivots used.
+    """
+    values: np.ndarray
+    stderr: np.ndarray
+    n_samples: int
+
+
+# Worker-side state, installed by `_init_worker` (inherited under fork)
+_worker_graph: Optional[ig.Graph] = None
+_worker_cutoff: Optional[int] = None
+_worker_csr: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+
+def _init_worker(g: ig.Graph, cutoff: Optional[int]) -> None:
+    global _worker_graph, _worker_cutoff, _worker_csr
+    _worker_graph = g
+    _worker_cutoff = cutoff
+    _worker_csr = csr_from_edges(g.vcount(), edge_array(g)) if cutoff is not None else None
+
+
+def single_source_dependency(indptr: np.ndarray, indices: np.ndarray, s: int, cutoff: Optional[int] = None) -> np.ndarray:
+    """
+    Brandes' dependency delta_s(v) of every vertex on the shortest paths from
+    `s` of length at most `cutoff`.
+
+    A level-synchronous BFS from `s` over the out-CSR, stopped after `cutoff`
+    levels, counts the shortest paths sigma; the dependencies are then
+    accumulated back over the BFS levels. Summed over all sources this is
+    `g.betweenness(directed=True, cutoff=cutoff)`.
+    """
+    n = len(indptr) - 1
+    dist = np.full(n, -1, dtype=np.int32)
+    sigma = np.zeros(n)
+    dist[s], sigma[s] = 0, 1.0
+    frontier = np.array([s], dtype=np.int32)
+    # Shortest-path DAG edges (sources, targets) between consecutive levels
+    levels: List[Tuple[np.ndarray, np.ndarray]] = []
+    depth = 0
+    while len(frontier) and (cutoff is None or depth < cutoff):
+        sources = np.repeat(frontier, indptr[frontier + 1] - indptr[frontier])
+        targets = gather_neighbors(indptr, indices, frontier)
+        dist[targets[dist[targets] < 0]] = depth + 1
+        on_dag = dist[targets] == depth + 1
+        sources, targets = sources[on_dag], targets[on_dag]
+        np.add.at(sigma, targets, sigma[sources])
+        levels.append((sources, targets))
+        frontier = sorted_unique(targets)
+        depth += 1
+
+    delta = np.zeros(n)
+    for sources, targets in reversed(levels):
+        np.add.at(delta, sources, sigma[sources] / sigma[targets] * (1.0 + delta[targets]))
+    delta[s] = 0.0
+    return delta
+
+
+def _pivot_moments(pivots: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sum and sum of squares of the single-source dependencies of `pivots`."""
+    total = np.zeros(_worker_graph.vcount())
+    squares = np.zeros(_worker_graph.vcount())
+    for s in pivots.tolist():
+        if _worker_csr is None:
+            # Betweenness restricted to paths from s is Brandes' dependency delta_s
+            delta = np.asarray(_worker_graph.betweenness(directed=True, sources=[s]))
+        else:
+            # igraph rejects `sources` together with `cutoff`
+            delta = single_source_dependency(*_worker_csr, s, _worker_cutoff)
+        total += delta
+        squares += delta * delta
+    return total, squares
+
+
+def sampled_betweenness(
+    g: ig.Graph,
+    n_pivots: int = 256,
+    cutoff: Optional[int] = None,
+    seed: int = 0,
+    workers: int = 1,
+) -> SampledEstimate:
+    """
+    Estimates directed betweenness from a uniform sample of source pivots.
+
+    Exact betweenness sums the dependency delta_s(v) over all n sources; this
+    sums it over `n_pivots` sources drawn without replacement and scales by
+    n / n_pivots, which is unbiased. The standard error comes from the
+    spread of delta_s(v) across pivots (with finite-population correction,
+    so it is 0 when every vertex is a pivot).
+
+    Args:
+        g: The graph.
+        n_pivots: Number of sampled sources; error shrinks as 1/sqrt(n_pivots).
+        cutoff: Only count shortest paths up to this length.
+        seed: Seed of the pivot sample.
+        workers: Processes used to run the pivots.
+    """
+    n = g.vcount()
+    k = min(n_pivots, n)
+    if k == 0:
+        return SampledEstimate(np.zeros(n), np.zeros(n), 0)
+    pivots = np.random.default_rng(seed).choice(n, size=k, replace=False)
+
+    if workers > 1:
+        shards = [pivots[s.start:s.stop] for s in make_shards(k, workers)]
+        with pool_context().Pool(processes=workers, initializer=_init_worker, initargs=(g, cutoff)) as pool:
+            moments = pool.map(_pivot_moments, shards)
+    else:
+        _init_worker(g, cutoff)
+        moments = [_pivot_moments(pivots)]
+    total = sum(m[0] for m in moments)
+    squares = sum(m[1] for m in moments)
+
+    mean = total / k
+    variance = np.maximum(squares / k - mean * mean, 0.0) * (k / max(k - 1, 1))
+    stderr = n * np.sqrt(variance / k * (1 - k / n))
+    return SampledEstimate(n * mean, stderr, k)
+
+
+# ==========================================
+# HyperBall (HyperLogLog Neighbourhood Function)
+# ==========================================
+
+class HyperBallResult(NamedTuple):
+    """
+    harmonic: estimated harmonic centrality, sum of 1 / d(v, u) over reachable u.
+    closeness: estimated closeness, reachable / sum of distances (0 if none).
+    reachable: estimated number of vertices reachable from v (v excluded).
+    iterations: number of distance levels explored.
+    """
+    harmonic: np.ndarray
+    closeness: np.ndarray
+    reachable: np.ndarray
+    iterations: int
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _initial_registers(n: int, precision: int, seed: int) -> np.ndarray:
+    """One HyperLogLog counter per vertex, holding only the vertex itself."""
+    with np.errstate(over="ignore"):
+        h = _splitmix64(np.arange(n, dtype=np.uint64) + np.uint64(seed) * np.uint64(0x632BE59BD9B4E019))
+    register = (h >> np.uint64(64 - precision)).astype(np.int64)
+    # Rank = position of the lowest set bit of the remaining bits, 1-based
+    rest = h & np.uint64((1 << (64 - precision)) - 1)
+    lowest = np.where(rest == 0, np.uint64(1) << np.uint64(64 - precision), rest & (~rest + np.uint64(1)))
+    rank = np.log2(lowest.astype(float)).astype(np.uint8) + 1
+
+    registers = np.zeros((n, 1 << precision), dtype=np.uint8)
+    registers[np.arange(n), register] = rank
+    return registers
+
+
+def _estimate_sizes(registers: np.ndarray) -> np.ndarray:
+    """HyperLogLog cardinality estimate of every counter (row)."""
+    m = registers.shape[1]
+    alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+    raw = alpha * m * m / np.exp2(-registers.astype(float)).sum(axis=1)
+    zeros = (registers == 0).sum(axis=1)
+    # Small-range correction: linear counting while registers are still empty
+    with np.errstate(divide="ignore"):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+# Vertices with more neighbours than this are merged one at a time; the others
+# in rounds over their k-th neighbour slot (reduceat on 2-D uint8 is slow).
+_HEAVY_DEGREE = 32
+
+
+class _UnionPlan(NamedTuple):
+    """Edge slots of one vertex range, grouped for vectorized counter unions."""
+    rounds: List[np.ndarray]  # rounds[k]: slot k of every light vertex with degree > k
+    heavy: np.ndarray         # Vertices merged one at a time
+
+
+def _union_plans(indptr: np.ndarray, workers: int) -> List[_UnionPlan]:
+    """Splits the vertices into one contiguous, edge-balanced range per worker."""
+    n = len(indptr) - 1
+    degree = np.diff(indptr)
+    cuts = np.searchsorted(indptr, np.linspace(0, indptr[-1], workers + 1)[1:-1])
+    plans = []
+    for lo, hi in zip(np.r_[0, cuts], np.r_[cuts, n]):
+        vertices = np.arange(lo, hi)
+        light = vertices[(degree[vertices] > 0) & (degree[vertices] <= _HEAVY_DEGREE)]
+        rounds = [indptr[light[degree[light] > k]] + k for k in range(_HEAVY_DEGREE)]
+        plans.append(_UnionPlan([r for r in rounds if len(r)], vertices[degree[vertices] > _HEAVY_DEGREE]))
+    return plans
+
+
+def hyperball(
+    g: ig.Graph,
+    mode: str = "out",
+    precision: int = 7,
+    cutoff: Optional[int] = None,
+    seed: int = 0,
+    workers: int = 1,
+) -> HyperBallResult:
+    """
+    Estimates distance-based centralities with HyperBall.
+
+    Iteration t turns every counter into the union (register-wise max) of its
+    own and its neighbours' counters, so it then approximates the ball of
+    radius t around the vertex. Only vertices with a neighbour whose counter
+    changed are recomputed.
+
+    Args:
+        g: The graph.
+        mode: "out" follows dependencies (distances to premises), "in" follows
+            dependents.
+        precision: log2 of the registers per counter (4..16). Memory is
+            V * 2^precision bytes, twice.
+        cutoff: Maximum distance explored (None: until no counter changes).
+        seed: Seed of the vertex hash.
+        workers: Threads merging disjoint vertex ranges (numpy releases the GIL).
+    """
+    if mode not in ("out", "in"):
+        raise ValueError(f"mode must be 'out' or 'in', got {mode!r}")
+    if not 4 <= precision <= 16:
+        raise ValueError(f"precision must be between 4 and 16, got {precision}")
+    n = g.vcount()
+    edges = edge_array(g)
+    if mode == "in":
+        edges = edges[:, ::-1]
+    indptr, indices = csr_from_edges(n, edges)
+    rev_ptr, rev_idx = csr_from_edges(n, edges[:, ::-1])
+    sources = np.repeat(np.arange(n), np.diff(indptr))
+    plans = _union_plans(indptr, workers)
+
+    registers = _initial_registers(n, precision, seed)
+    merged = registers.copy()
+    active = np.zeros(n, dtype=bool)
+    previous = np.ones(n)
+    harmonic = np.zeros(n)
+    distance_sum = np.zeros(n)
+    changed = np.arange(n)
+
+    def merge(plan: _UnionPlan) -> None:
+        # Reads `registers`, writes only the rows of this plan's vertices in `merged`
+        for slots in plan.rounds:
+            slots = slots[active[sources[slots]]]
+            rows = sources[slots]
+            merged[rows] = np.maximum(merged[rows], registers[indices[slots]])
+        for v in plan.heavy[active[plan.heavy]].tolist():
+            nbrs = indices[indptr[v]:indptr[v + 1]]
+            merged[v] = np.maximum(merged[v], registers[nbrs].max(axis=0))
+
+    t = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while len(changed) and (cutoff is None or t < cutoff):
+            t += 1
+            # A counter can only grow if one of its neighbours grew last round
+            rows = sorted_unique(gather_neighbors(rev_ptr, rev_idx, changed))
+            active[:] = False
+            active[rows] = True
+            merged[rows] = registers[rows]
+            list(executor.map(merge, plans))
+
+            grew = np.any(merged[rows] != registers[rows], axis=1)
+            changed = rows[grew]
+            registers[changed] = merged[changed]
+
+            sizes = _estimate_sizes(registers[changed])
+            # Newly reached vertices are at distance exactly t
+            gained = np.maximum(sizes - previous[changed], 0.0)
+            harmonic[changed] += gained / t
+            distance_sum[changed] += gained * t
+            previous[changed] = np.maximum(sizes, previous[changed])
+
+    reachable = previous - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        closeness = np.where(distance_sum > 0, reachable / distance_sum, 0.0)
+    return HyperBallResult(harmonic, closeness, reachable, t)
+
+
+# ==========================================
+# Registered Metrics
+# ==========================================
+
+@register_metric("sampled_betweenness", n_pivots=256, cutoff=None, seed=0)
+def sampled_betweenness_metric(ctx: MetricContext, n_pivots, cutoff, seed) -> np.ndarray:
+    """Pivot-sampled betweenness estimate (see `sampled_betweenness`)."""
+    return sampled_betweenness(ctx.g, n_pivots, cutoff, seed, ctx.workers).values
+
+
+def _shared_hyperball(ctx: MetricContext, **params) -> HyperBallResult:
+    key = "hyperball-" + "-".join(f"{k}={v}" for k, v in sorted(params.items()))
+    return ctx.shared(key, lambda: hyperball(ctx.g, workers=ctx.workers, **params))
+
+
+@register_metric("approx_harmonic", mode="out", precision=7, cutoff=None, seed=0)
+def approx_harmonic(ctx: MetricContext, **params) -> np.ndarray:
+    """HyperBall estimate of harmonic centrality."""
+    return _shared_hyperball(ctx, **params).harmonic
+
+
+@register_metric("approx_closeness", mode="out", precision=7, cutoff=None, seed=0)
+def approx_closeness(ctx: MetricContext, **params) -> np.ndarray:
+    """HyperBall estimate of closeness (over reachable vertices)."""
+    return _shared_hyperball(ctx, **params).closeness
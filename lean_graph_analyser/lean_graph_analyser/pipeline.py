@@ -0,0 +1,214 @@
+"""
+Build Pipeline
+==============
+
+From a Lean project to a plotted atlas in one call (or one command,
+`lean-graph build <project>`):
+
+    1. trace      `trace(repo)` through LeanDojo, skipped when the trace
+                  artifact cache already holds this commit;
+    2. artifacts  the traced files are parsed in a process pool into
+                  per-file artifacts (`cache.trace_artifacts`);
+    3. graph      `GraphGenerator` on the artifacts, incremental against
+                  the graph cache of the previous run. After a fresh
+                  trace, Phase 1 consumes each file's nodes as the export
+                  pool yields them, so stages 2 and 3 overlap;
+    4. metrics    `MetricEngine`, cached on disk by graph fingerprint,
+       + layout   computed at the same time in a forked worker;
+    5. plot       `plot_graph` with the cached layout and the chosen metric.
+
+Re-running on an unchanged project loads the artifacts, the graph, the
+metrics and the layout from their caches and only writes the plot again.
+Every stage is timed in a `BuildProfiler` saved as `pipeline.profile.json`.
+"""
+
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+import igraph as ig
+import numpy as np
+
+from lean_graph_analyser.cache.trace_artifacts import ArtifactTracedRepo, TraceArtifactCache
+from lean_graph_analyser.extraction import NodeBatch
+from lean_graph_analyser.graph_generator import GraphGenerator
+from lean_graph_analyser.metrics.engine import DEFAULT_METRICS, MetricEngine
+from lean_graph_analyser.utils.notifier import ConsoleNotifier, Notifier
+from lean_graph_analyser.utils.parallel import pool_context
+from lean_graph_analyser.utils.plot_graph import compute_mathlib_layout, plot_graph
+from lean_graph_analyser.utils.profiling import BuildProfiler, FileStats
+
+DEFAULT_ARTIFACT_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "lean_graph_analyser",
+    "traces",
+)
+
+
+class PipelineResult(NamedTuple):
+    graph: ig.Graph
+    generator: GraphGenerator
+    scores: Dict[str, np.ndarray]
+    plot_file: Optional[str]
+    profiler: BuildProfiler
+
+
+def git_commit(root_dir: Path) -> Optional[str]:
+    """HEAD commit of the project, or None outside a git checkout."""
+    try:
+        result = subprocess.run(
+            ["git", "-C", str(root_dir), "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def trace_project(project_dir: Path, build_deps: bool = False):
+    """Traces a local Lean project with LeanDojo (slow: builds it with Lake)."""
+    from lean_dojo_v2.lean_dojo.data_extraction.lean import LeanGitRepo
+    from lean_dojo_v2.lean_dojo.data_extraction.trace import trace
+
+    return trace(LeanGitRepo.from_path(project_dir), build_deps=build_deps)
+
+
+def load_traced_project(
+    project_dir: Path,
+    name: str,
+    artifact_dir: str = DEFAULT_ARTIFACT_DIR,
+    workers: int = 1,
+    build_deps: bool = False,
+    retrace: bool = False,
+    notifier: Notifier = ConsoleNotifier(),
+    profiler: Optional[BuildProfiler] = None,
+) -> Tuple[ArtifactTracedRepo, Optional[Iterator[Tuple[NodeBatch, FileStats]]]]:
+    """
+    Stages 1 and 2: the project's trace, from the artifact cache when it
+    matches the current commit and sources, else traced and exported.
+
+    Returns:
+        The cached repo, and None, or after a fresh trace the iterator
+        driving the export (see `TraceArtifactCache.export_stream`), which
+        must be consumed, e.g. by `GraphGenerator.generate(node_batches=...)`,
+        before the repo is complete.
+    """
+    profiler = profiler or BuildProfiler()
+    commit = git_commit(project_dir) or "worktree"
+    cache = TraceArtifactCache(artifact_dir)
+    repo = None if retrace else cache.load(name, commit, project_dir)
+    if repo is not None:
+        notifier.send(f"♻️ Using cached trace of `{name}` @ {commit[:12]} ({len(repo.traced_files)} files).", important=True)
+        return repo, None
+
+    notifier.send(f"🔬 Tracing `{name}` @ {commit[:12]} (this may take a while)...", important=True)
+    with profiler.phase("trace"):
+        traced_repo = trace_project(project_dir, build_deps=build_deps)
+    notifier.send(f"📦 Exporting trace artifacts of {len(traced_repo.traced_files)} files...", important=True)
+    with profiler.phase("export_artifacts"):
+        return cache.export_stream(traced_repo, name, commit, project_dir, workers)
+
+
+# Worker-side state of the layout process, installed by `_init_layout_worker`
+_worker_graph: Optional[ig.Graph] = None
+
+
+def _init_layout_worker(g: ig.Graph) -> None:
+    global _worker_graph
+    _worker_graph = g
+
+
+def _cache_layout(seed: int, cache_dir: str) -> None:
+    compute_mathlib_layout(_worker_graph, seed=seed, cache_dir=cache_dir)
+
+
+def run_build(
+    project_dir: str,
+    output_dir: Optional[str] = None,
+    name: Optional[str] = None,
+    workers: int = 1,
+    metrics: Sequence[str] = DEFAULT_METRICS,
+    size_metric: Optional[str] = None,
+    plot_mode: Optional[str] = "full",
+    artifact_dir: str = DEFAULT_ARTIFACT_DIR,
+    build_deps: bool = False,
+    retrace: bool = False,
+    open_browser: bool = False,
+    seed: int = 0,
+    notifier: Notifier = ConsoleNotifier(),
+) -> PipelineResult:
+    """
+    Runs the whole pipeline on a Lean project.
+
+    Args:
+        project_dir: Root of the Lean project (a git checkout).
+        output_dir: Where the graph cache, metric and layout caches, profile
+            and plot go. Defaults to `<project>/graphs`.
+        name: Name of the graph; defaults to the project directory name.
+        workers: Processes for artifact export and graph extraction. With
+            more than one, the layout is computed alongside the metrics.
+        metrics: Metrics computed (and cached) for the graph.
+        size_metric: Metric that sizes the plotted nodes; defaults to the first.
+        plot_mode: `plot_graph` mode ("full", "lod", "tiles"), or None for no plot.
+        artifact_dir: Root of the trace artifact cache.
+        build_deps: Trace dependencies as well.
+        retrace: Ignore cached trace artifacts.
+        open_browser: Open the plot when done.
+        seed: Seed of the layout jitter.
+    """
+    project = Path(project_dir).resolve()
+    name = name or project.name
+    output_dir = output_dir or str(project / "graphs")
+    os.makedirs(output_dir, exist_ok=True)
+    profiler = BuildProfiler()
+
+    # 1-2. Trace (cached per commit); a fresh export runs inside stage 3
+    traced_repo, node_batches = load_traced_project(
+        project, name, artifact_dir, workers, build_deps, retrace, notifier, profiler
+    )
+
+    # 3. Graph (incremental against the previous run), fed by the export pool
+    with profiler.phase("graph"):
+        generator = GraphGenerator(
+            traced_repo,
+            notifier=notifier,
+            graph_location=os.path.join(output_dir, f"{name}_dependency_graph.graphml"),
+            workers=workers,
+            incremental=True,
+        )
+        graph = generator.generate(node_batches)
+
+    # 4. Metrics, with the layout computed alongside in a forked worker
+    layout_dir = os.path.join(output_dir, "layouts")
+    engine = MetricEngine(graph, cache_dir=os.path.join(output_dir, "metrics"), workers=workers)
+    with profiler.phase("metrics_and_layout"):
+        if plot_mode is not None and workers > 1:
+            with pool_context().Pool(1, initializer=_init_layout_worker, initargs=(graph,)) as pool:
+                layout = pool.apply_async(_cache_layout, (seed, layout_dir))
+                scores = engine.compute(list(metrics))
+                layout.get()
+        else:
+            scores = engine.compute(list(metrics))
+
+    # 5. Plot
+    plot_file = None
+    if plot_mode is not None:
+        size_metric = size_metric or metrics[0]
+        if size_metric not in scores:
+            scores[size_metric] = engine.get(size_metric)
+        plot_file = os.path.join(output_dir, f"{name}_atlas.html")
+        with profiler.phase("plot"):
+            plot_graph(
+                graph,
+                centrality_func=lambda g: scores[size_metric],
+                output_file=plot_file,
+                layout_cache_dir=layout_dir,
+                seed=seed,
+                open_browser=open_browser,
+                mode=plot_mode,
+                workers=workers,
+            )
+
+    notifier.send(profiler.summary(), important=True)
+    profiler.save(os.path.join(output_dir, "pipeline.profile.json"))
+    return PipelineResult(graph, generator, scores, plot_file, profiler)
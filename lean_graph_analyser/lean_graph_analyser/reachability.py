@@ -0,0 +1,483 @@
+"""
+Reachability Module
+===================
+
+Precomputed index for transitive-dependency questions on a graph produced by
+`GraphGenerator`:
+
+    - does X (transitively) depend on Y?            `reaches(x, y)`
+    - what breaks if Y changes?                     `ancestors(y)`
+    - which declarations does X build on?           `descendants(x)`
+    - how big are those sets?                       `n_ancestors`, `n_descendants`
+
+The index is built on the SCC condensation of the graph, so mutual
+definitions are handled, and stores per component:
+
+    - `depth`: longest-path depth. A component only reaches shallower ones.
+    - GRAIL interval labels: for k randomized DFS traversals, the min/max
+      post-order rank over everything the component reaches. If X reaches Y,
+      Y's interval lies inside X's, so most negative queries are answered by
+      O(k) comparisons; the others run a DFS pruned by the same labels.
+    - Exact closure sizes (bit-parallel, see `utils.dag.closure_sizes`).
+
+It is saved next to the graph cache (`reachability.npz`), keyed by graph
+fingerprint, and can be updated in place when edges are added.
+"""
+
+import os
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import igraph as ig
+import numpy as np
+
+from lean_graph_analyser.utils.csr import (
+    csr_from_edges,
+    gather_neighbors,
+    segment_reduce_rows,
+    sorted_unique,
+    unique_edges,
+)
+from lean_graph_analyser.utils.dag import Condensation, closure_sizes, condense, depth_levels
+from lean_graph_analyser.utils.fingerprint import graph_fingerprint
+
+REACHABILITY_FILE = "reachability.npz"
+
+# Exact closure sizes are patched on insertion while the descendants and
+# (ancestor, descendant) pairs to check stay below these limits; otherwise
+# they are recomputed on the next size query.
+_COUNT_UPDATE_BUDGET = 50_000_000
+_COUNT_UPDATE_COLUMNS = 4096
+
+Vertex = Union[int, str]
+
+
+class ReachabilityIndex:
+    """
+    Build with `ReachabilityIndex.build(g)` or `GraphGenerator.reachability_index()`.
+
+    Vertices may be given as vertex ids or, when names are known, full names.
+    Edges point from a theorem to its premises, so "descendants" are
+    dependencies and "ancestors" are dependents.
+    """
+
+    def __init__(
+        self,
+        cond: Condensation,
+        depth: np.ndarray,
+        low: np.ndarray,
+        high: np.ndarray,
+        reach_sizes: Optional[np.ndarray] = None,
+        ancestor_sizes: Optional[np.ndarray] = None,
+        fingerprint: Optional[str] = None,
+    ):
+        self.membership = cond.membership
+        self.n_components = cond.n_components
+        self.fingerprint = fingerprint
+        self.depth = depth
+        self.low = low
+        self.high = high
+        self.reach_sizes = reach_sizes          # Vertices reached, own component included
+        self.ancestor_sizes = ancestor_sizes    # Vertices reaching it, own component included
+        self._set_edges(cond.edges)
+        self._names: Optional[Dict[str, int]] = None
+        self._name_list: Optional[Sequence[str]] = None
+
+        sizes = np.bincount(self.membership, minlength=self.n_components)
+        self.component_sizes = sizes
+        self._member_ptr, self._member_idx = csr_from_edges(
+            self.n_components,
+            np.column_stack([self.membership, np.arange(len(self.membership), dtype=np.int32)]),
+        )
+
+    def _set_edges(self, edges: np.ndarray) -> None:
+        self.edges = edges
+        self._out_ptr, self._out_idx = csr_from_edges(self.n_components, edges)
+        self._in_ptr, self._in_idx = csr_from_edges(self.n_components, edges[:, ::-1])
+        # Edges inserted since the CSRs were built, per component
+        self._pending_out: Dict[int, List[int]] = {}
+        self._pending_in: Dict[int, List[int]] = {}
+
+    # ==========================================
+    # Construction & Persistence
+    # ==========================================
+
+    @classmethod
+    def build(cls, g: ig.Graph, n_intervals: int = 3, seed: int = 0) -> "ReachabilityIndex":
+        """
+        Builds the index of `g`.
+
+        Args:
+            g: The dependency graph.
+            n_intervals: Number of interval labelings; more prune more queries.
+            seed: Seed of the randomized traversals.
+        """
+        index = cls._from_condensation(condense(g), n_intervals, seed)
+        index.fingerprint = graph_fingerprint(g)
+        if "name" in g.vs.attributes():
+            index.set_names(g.vs["name"])
+        return index
+
+    @classmethod
+    def _from_condensation(
+        cls, cond: Condensation, n_intervals: int, seed: int, with_sizes: bool = True
+    ) -> "ReachabilityIndex":
+        levels = depth_levels(cond.n_components, cond.edges)
+        depth = np.zeros(cond.n_components, dtype=np.int32)
+        for level, (vertices, _, _) in enumerate(levels, start=1):
+            depth[vertices] = level
+
+        out_ptr, out_idx = csr_from_edges(cond.n_components, cond.edges)
+        post = _dfs_post_orders(out_ptr, out_idx, cond.edges, n_intervals, seed)
+        low, high = post.copy(), post.copy()
+        # Bottom-up: a component's interval covers the intervals of its successors
+        for vertices, nbrs, starts in levels:
+            low[:, vertices] = np.minimum(low[:, vertices], np.minimum.reduceat(low[:, nbrs], starts, axis=1))
+
+        index = cls(cond, depth, low, high)
+        if with_sizes:
+            index._ensure_sizes()
+        return index
+
+    def set_names(self, names: Sequence[str]) -> None:
+        """Enables lookups by full name."""
+        self._name_list = names
+        self._names = None
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """The index as plain arrays (what `save` writes, see `from_arrays`)."""
+        self._flush_pending()
+        self._ensure_sizes()
+        return {
+            "membership": self.membership,
+            "edges": self.edges,
+            "depth": self.depth,
+            "low": self.low,
+            "high": self.high,
+            "reach_sizes": self.reach_sizes,
+            "ancestor_sizes": self.ancestor_sizes,
+        }
+
+    @classmethod
+    def from_arrays(cls, data: Dict[str, np.ndarray], fingerprint: Optional[str] = None) -> "ReachabilityIndex":
+        """Rebuilds an index from `arrays()` (e.g. views into shared memory)."""
+        cond = Condensation(data["membership"], len(data["depth"]), data["edges"])
+        return cls(
+            cond,
+            data["depth"],
+            data["low"],
+            data["high"],
+            data["reach_sizes"],
+            data["ancestor_sizes"],
+            fingerprint,
+        )
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, fingerprint=np.array(self.fingerprint or ""), **self.arrays())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, fingerprint: Optional[str] = None) -> Optional["ReachabilityIndex"]:
+        """
+        Loads a saved index. Returns None if there is none, or if `fingerprint`
+        is given and the index was built for a different graph.
+        """
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            saved_fingerprint = str(data["fingerprint"]) or None
+            if fingerprint is not None and saved_fingerprint != fingerprint:
+                return None
+            return cls.from_arrays({key: data[key] for key in data.files if key != "fingerprint"}, saved_fingerprint)
+
+    # ==========================================
+    # Queries
+    # ==========================================
+
+    def _vid(self, v: Vertex) -> int:
+        if isinstance(v, str):
+            if self._names is None:
+                if self._name_list is None:
+                    raise KeyError("Names are unknown; call set_names() or pass vertex ids.")
+                self._names = {name: i for i, name in enumerate(self._name_list)}
+            return self._names[v]
+        return int(v)
+
+    def reaches(self, u: Vertex, v: Vertex) -> bool:
+        """True if `u` transitively depends on `v` (or u == v, or they are mutually defined)."""
+        cu = int(self.membership[self._vid(u)])
+        cv = int(self.membership[self._vid(v)])
+        return self._reaches_component(cu, cv)
+
+    def descendants(self, u: Vertex) -> np.ndarray:
+        """Sorted vertex ids `u` transitively depends on (u itself excluded)."""
+        vid = self._vid(u)
+        return self._expand(self._closure(int(self.membership[vid]), forward=True), vid)
+
+    def ancestors(self, v: Vertex) -> np.ndarray:
+        """Sorted vertex ids that transitively depend on `v` (v itself excluded)."""
+        vid = self._vid(v)
+        return self._expand(self._closure(int(self.membership[vid]), forward=False), vid)
+
+    def n_descendants(self, u: Vertex) -> int:
+        """Size of the transitive closure of `u`'s premises."""
+        self._ensure_sizes()
+        return int(self.reach_sizes[self.membership[self._vid(u)]]) - 1
+
+    def n_ancestors(self, v: Vertex) -> int:
+        """Number of declarations that transitively depend on `v`."""
+        self._ensure_sizes()
+        return int(self.ancestor_sizes[self.membership[self._vid(v)]]) - 1
+
+    def _may_reach(self, sources: np.ndarray, target: int) -> np.ndarray:
+        """Label filter: False means the source certainly does not reach `target`."""
+        return (
+            (self.depth[sources] > self.depth[target])
+            & np.all(self.low[:, sources] <= self.low[:, [target]], axis=0)
+            & np.all(self.high[:, sources] >= self.high[:, [target]], axis=0)
+        )
+
+    def _reaches_component(self, cu: int, cv: int) -> bool:
+        if cu == cv:
+            return True
+        if not self._may_reach(np.array([cu]), cv)[0]:
+            return False
+        # DFS that only enters components whose labels still allow reaching cv
+        seen = np.zeros(self.n_components, dtype=bool)
+        seen[cu] = True
+        stack = [cu]
+        while stack:
+            succ = self._neighbors(np.array([stack.pop()]), forward=True)
+            if np.any(succ == cv):
+                return True
+            succ = succ[~seen[succ]]
+            succ = succ[self._may_reach(succ, cv)]
+            seen[succ] = True
+            stack.extend(succ.tolist())
+        return False
+
+    def _neighbors(self, components: np.ndarray, forward: bool) -> np.ndarray:
+        """
+        Successors (or predecessors) of `components`, grouped per component
+        in the given order, with `_degrees` entries each.
+        """
+        ptr, idx, pending = (
+            (self._out_ptr, self._out_idx, self._pending_out)
+            if forward
+            else (self._in_ptr, self._in_idx, self._pending_in)
+        )
+        nbrs = gather_neighbors(ptr, idx, components)
+        if not pending:
+            return nbrs
+        extra_lists = [pending.get(c, ()) for c in components.tolist()]
+        extra = np.fromiter((w for targets in extra_lists for w in targets), dtype=nbrs.dtype)
+        if len(extra) == 0:
+            return nbrs
+        # Interleave the pending entries after the CSR entries of their component
+        segment = np.arange(len(components))
+        keys = np.concatenate([
+            np.repeat(segment, ptr[components + 1] - ptr[components]),
+            np.repeat(segment, [len(targets) for targets in extra_lists]),
+        ])
+        return np.concatenate([nbrs, extra])[np.argsort(keys, kind="stable")]
+
+    def _closure(self, c: int, forward: bool) -> np.ndarray:
+        """Components reachable from (or reaching) `c`, `c` included, by frontier expansion."""
+        return self._closure_many(np.array([c], dtype=np.int32), forward)
+
+    def _closure_many(self, sources: np.ndarray, forward: bool) -> np.ndarray:
+        seen = np.zeros(self.n_components, dtype=bool)
+        seen[sources] = True
+        frontier = sources
+        parts = [frontier]
+        while len(frontier):
+            nbrs = self._neighbors(frontier, forward)
+            frontier = sorted_unique(nbrs[~seen[nbrs]])
+            seen[frontier] = True
+            parts.append(frontier)
+        return np.concatenate(parts)
+
+    def _expand(self, components: np.ndarray, exclude: int) -> np.ndarray:
+        vertices = np.sort(gather_neighbors(self._member_ptr, self._member_idx, components))
+        return vertices[vertices != exclude]
+
+    # ==========================================
+    # Incremental Updates
+    # ==========================================
+
+    def add_edges(self, edges: Sequence[Tuple[Vertex, Vertex]], g: Optional[ig.Graph] = None) -> None:
+        """
+        Updates the index for new (source, target) edges.
+
+        Edges between already connected components change nothing. New
+        edges inside the DAG patch depths and intervals upwards from the
+        source (and closure sizes, within a budget). Edges closing a cycle
+        merge components and relabel the condensation (never the full graph);
+        closure sizes are then recomputed on the next size query.
+
+        Args:
+            edges: New edges, as vertex ids or names.
+            g: The graph with the edges already added, to refresh the fingerprint.
+        """
+        pairs = np.array([(self._vid(u), self._vid(v)) for u, v in edges], dtype=np.int64).reshape(-1, 2)
+        cycle_edges = []
+        for cu, cv in self.membership[pairs].tolist():
+            if self._reaches_component(cu, cv):
+                continue
+            if self._reaches_component(cv, cu):
+                cycle_edges.append((cu, cv))
+            else:
+                self._insert_dag_edge(cu, cv)
+
+        self._flush_pending()
+        if cycle_edges:
+            self._merge_cycles(np.array(cycle_edges, dtype=np.int32))
+        self.fingerprint = graph_fingerprint(g) if g is not None else None
+
+    def _insert_dag_edge(self, a: int, b: int) -> None:
+        if self.reach_sizes is not None:
+            self._update_sizes(a, b)
+
+        self._pending_out.setdefault(a, []).append(b)
+        self._pending_in.setdefault(b, []).append(a)
+
+        # Push depth and interval bounds up through the ancestors of `a`
+        if self.depth[a] <= self.depth[b]:
+            self.depth[a] = self.depth[b] + 1
+        self.low[:, a] = np.minimum(self.low[:, a], self.low[:, b])
+        self.high[:, a] = np.maximum(self.high[:, a], self.high[:, b])
+        frontier = np.array([a])
+        while len(frontier):
+            counts = self._degrees(frontier, forward=False)
+            parents = self._neighbors(frontier, forward=False)
+            children = np.repeat(frontier, counts)
+            need = self.depth[children] + 1
+            grew = need > self.depth[parents]
+            np.maximum.at(self.depth, parents[grew], need[grew])
+            for labels, ufunc in ((self.low, np.minimum), (self.high, np.maximum)):
+                updated = ufunc(labels[:, parents], labels[:, children])
+                grew |= np.any(updated != labels[:, parents], axis=0)
+                for row in range(labels.shape[0]):
+                    ufunc.at(labels[row], parents, labels[row, children])
+            frontier = sorted_unique(parents[grew])
+
+    def _degrees(self, components: np.ndarray, forward: bool) -> np.ndarray:
+        ptr, pending = (self._out_ptr, self._pending_out) if forward else (self._in_ptr, self._pending_in)
+        counts = ptr[components + 1] - ptr[components]
+        if pending:
+            counts = counts + np.array([len(pending.get(c, ())) for c in components.tolist()], dtype=counts.dtype)
+        return counts
+
+    def _update_sizes(self, a: int, b: int) -> None:
+        """Patches closure sizes for the new edge a -> b, or drops them if too costly."""
+        # Only ancestors of `a` that did not reach `b` yet, and only descendants
+        # of `b` that `a` did not reach yet, can become newly related.
+        reached_by_a = np.zeros(self.n_components, dtype=bool)
+        reached_by_a[self._closure(a, forward=True)] = True
+        reaching_b = np.zeros(self.n_components, dtype=bool)
+        reaching_b[self._closure(b, forward=False)] = True
+        ancestors = self._closure(a, forward=False)
+        ancestors = ancestors[~reaching_b[ancestors]]
+        descendants = self._closure(b, forward=True)
+        descendants = descendants[~reached_by_a[descendants]]
+        if len(descendants) > _COUNT_UPDATE_COLUMNS or len(ancestors) * len(descendants) > _COUNT_UPDATE_BUDGET:
+            self.reach_sizes = self.ancestor_sizes = None
+            return
+
+        # Which of those descendants every ancestor already reached: one
+        # bitset column per descendant, ORed bottom-up through the components
+        # that reach any of them (depth order is a topological order).
+        words = -(-len(descendants) // 64)
+        bits = np.zeros((self.n_components, words), dtype=np.uint64)
+        column = np.arange(len(descendants))
+        bits[descendants, column // 64] |= np.left_shift(np.uint64(1), (column % 64).astype(np.uint64))
+        region = self._closure_many(descendants, forward=False)
+        region = region[np.argsort(self.depth[region], kind="stable")]
+        region_depth = self.depth[region]
+        bounds = np.flatnonzero(np.diff(region_depth)) + 1
+        for level in np.split(region, bounds):
+            counts = self._degrees(level, forward=True)
+            level = level[counts > 0]
+            if len(level) == 0:
+                continue
+            succ = self._neighbors(level, forward=True)
+            starts = np.concatenate([[0], np.cumsum(counts[counts > 0])[:-1]])
+            bits[level] |= segment_reduce_rows(np.bitwise_or, bits[succ], starts)
+
+        reached = np.unpackbits(bits[ancestors].view(np.uint8), axis=1, bitorder="little")
+        missing = reached[:, :len(descendants)] == 0
+        self.reach_sizes[ancestors] += missing @ self.component_sizes[descendants]
+        self.ancestor_sizes[descendants] += self.component_sizes[ancestors] @ missing
+
+    def _flush_pending(self) -> None:
+        if not self._pending_out:
+            return
+        extra = np.array(
+            [(a, b) for a, targets in self._pending_out.items() for b in targets], dtype=np.int32
+        )
+        self._set_edges(unique_edges(np.concatenate([self.edges, extra])))
+
+    def _merge_cycles(self, cycle_edges: np.ndarray) -> None:
+        """Re-condenses the component DAG plus edges that close cycles, then relabels it."""
+        n_labels = self.low.shape[0]
+        edges = np.concatenate([self.edges, cycle_edges])
+        merged = condense(ig.Graph(self.n_components, edges.tolist(), directed=True))
+        membership = merged.membership[self.membership]
+        rebuilt = self._from_condensation(
+            Condensation(membership, merged.n_components, merged.edges), n_labels, seed=0, with_sizes=False
+        )
+        names = self._name_list
+        self.__dict__.update(rebuilt.__dict__)
+        self._name_list = names
+
+    def _ensure_sizes(self) -> None:
+        if self.reach_sizes is None:
+            cond = Condensation(self.membership, self.n_components, self.edges)
+            self.reach_sizes = closure_sizes(cond)
+            self.ancestor_sizes = closure_sizes(
+                Condensation(self.membership, self.n_components, self.edges[:, ::-1])
+            )
+
+
+def _dfs_post_orders(
+    indptr: np.ndarray, indices: np.ndarray, edges: np.ndarray, k: int, seed: int
+) -> np.ndarray:
+    """
+    Post-order ranks of `k` randomized depth-first traversals of a DAG.
+
+    Returns:
+        (k, n) int32 array; roots and children are visited in a fresh random
+        order per traversal, which makes the k interval labelings complementary.
+    """
+    n = len(indptr) - 1
+    rng = np.random.default_rng(seed)
+    in_degree = np.bincount(edges[:, 1], minlength=n) if len(edges) else np.zeros(n, dtype=np.int64)
+    roots = np.flatnonzero(in_degree == 0)
+    ptr = indptr.tolist()
+    post = np.empty((k, n), dtype=np.int32)
+
+    for i in range(k):
+        # Shuffle the children of every vertex: random keys, stable by source
+        sources = np.repeat(np.arange(n), np.diff(indptr))
+        children = indices[np.lexsort((rng.random(len(indices)), sources))].tolist()
+        visited = [False] * n
+        rank = [0] * n
+        counter = 0
+        for root in rng.permutation(roots).tolist():
+            visited[root] = True
+            stack = [[root, ptr[root]]]
+            while stack:
+                top = stack[-1]
+                v, j = top
+                if j < ptr[v + 1]:
+                    top[1] = j + 1
+                    w = children[j]
+                    if not visited[w]:
+                        visited[w] = True
+                        stack.append([w, ptr[w]])
+                else:
+                    stack.pop()
+                    rank[v] = counter
+                    counter += 1
+        post[i] = rank
+    return post
@@ -0,0 +1,540 @@
+"""
+Query Server
+============
+
+Keeps a graph warm in memory and answers queries on it over a local
+HTTP/JSON API, so notebooks and the plot front-end do not reload the graph
+and recompute metrics for every question.
+
+`GraphQueryService` holds everything a query needs as flat arrays: the
+out/in CSR adjacency, the vertex attributes (strings as categorical
+columns), the metric scores, the layout coordinates and the reachability
+index. Those arrays can be moved into one shared memory segment (`share()`),
+which forked server workers read without copying and other processes can
+attach to by name (`GraphQueryService.attach(name)`). Strings are decoded
+per query, and names are looked up by binary search over a name-sorted
+vertex order (`name.order`), so no per-vertex Python objects are held.
+
+Endpoints (GET, JSON; vertices by `name=<full name>` or `id=<vertex id>`):
+
+    /node          attributes, metrics, layout position, code snippet
+    /neighbors     direct premises (direction=out) or dependents (in, both)
+    /closure       transitive premises or dependents, with their count
+    /top           top-k vertices by a metric, optionally within a namespace
+    /namespace     vertices of a namespace prefix and the edges among them
+    /stats         graph size, metrics and namespaces
+    /health
+
+Responses are cached (LRU over the encoded bytes) per worker.
+
+Example:
+    service = GraphQueryService.from_cache("graphs/dependency_graph.graphml")
+    service.top("pagerank", k=10)
+    serve(service, port=8765, workers=4)     # or `lean-graph serve ...`
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+import igraph as ig
+import numpy as np
+
+from lean_graph_analyser.attributes import coded_column, has_attribute
+from lean_graph_analyser.cache.code_store import CodeStore
+from lean_graph_analyser.cache.formats import cache_dir_for, cache_for
+from lean_graph_analyser.metrics.engine import DEFAULT_METRICS, MetricEngine, MetricSpec
+from lean_graph_analyser.reachability import REACHABILITY_FILE, ReachabilityIndex
+from lean_graph_analyser.utils.csr import csr_from_edges, edge_array, gather_neighbors
+from lean_graph_analyser.utils.fingerprint import graph_fingerprint
+from lean_graph_analyser.utils.parallel import pool_context
+from lean_graph_analyser.utils.plot_graph import compute_mathlib_layout
+from lean_graph_analyser.utils.shared_arrays import SharedArrays, decode_string, decode_strings, encode_strings
+
+DEFAULT_PORT = 8765
+DIRECTIONS = ("out", "in", "both")
+
+# Categorical vertex attributes served by /node
+_STRING_ATTRIBUTES = ("full_namespace", "kind", "file_path")
+_LINE_ATTRIBUTES = ("start_line", "end_line")
+
+Vertex = Union[int, str]
+
+
+class GraphQueryService:
+    """
+    In-memory query state of one graph. Build it with `from_graph` or
+    `from_cache`, or `attach` to one shared by another process.
+
+    Vertices may be given as vertex ids or full names. Edges point from a
+    theorem to its premises: "out" neighbors are premises, "in" neighbors
+    are dependents.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any], shared: Optional[SharedArrays] = None):
+        self.arrays = arrays
+        self.meta = meta
+        self.shared = shared
+        self.vcount = len(arrays["name.offsets"]) - 1
+        self.metric_names = [key[len("metric."):] for key in arrays if key.startswith("metric.")]
+        self.reachability = self._reachability(arrays)
+        code_dir = meta.get("code_dir")
+        self.code = CodeStore(code_dir) if code_dir else None
+        if self.code is not None and not self.code.exists():
+            self.code = None
+        self._code_lock = threading.Lock()
+
+    # ==========================================
+    # Construction
+    # ==========================================
+
+    @classmethod
+    def from_graph(
+        cls,
+        g: ig.Graph,
+        metrics: Sequence[MetricSpec] = DEFAULT_METRICS,
+        metric_cache_dir: Optional[str] = None,
+        layout_cache_dir: Optional[str] = None,
+        reachability: Optional[ReachabilityIndex] = None,
+        code_dir: Optional[str] = None,
+        seed: int = 0,
+    ) -> "GraphQueryService":
+        """
+        Args:
+            g: The dependency graph (vertex attribute "name" required).
+            metrics: Metrics served by /top and /node, computed or loaded
+                from `metric_cache_dir`.
+            metric_cache_dir: `MetricEngine` cache directory.
+            layout_cache_dir: `compute_mathlib_layout` cache directory.
+            reachability: Index for /closure; built if None.
+            code_dir: Cache directory holding the code sidecar, for snippets.
+            seed: Layout seed.
+        """
+        n = g.vcount()
+        edges = edge_array(g)
+        out_ptr, out_idx = csr_from_edges(n, edges)
+        in_ptr, in_idx = csr_from_edges(n, edges[:, ::-1])
+        arrays = {"out_ptr": out_ptr, "out_idx": out_idx, "in_ptr": in_ptr, "in_idx": in_idx}
+
+        attributes = g.vs.attributes()
+        names = g.vs["name"]
+        _, arrays["name.blob"], arrays["name.offsets"] = encode_strings(names)
+        arrays["name.order"] = np.argsort(np.array(names, dtype=object), kind="stable").astype(np.int32)
+        for attribute in _STRING_ATTRIBUTES:
+            if has_attribute(g, attribute):
+                # Encode the distinct values only, then map the vertex codes through
+                codes, table = coded_column(g, attribute)
+                table_codes, blob, offsets = encode_strings(table)
+                codes = table_codes[codes]
+                arrays.update({f"{attribute}.codes": codes, f"{attribute}.blob": blob, f"{attribute}.offsets": offsets})
+        for attribute in _LINE_ATTRIBUTES:
+            if attribute in attributes:
+                arrays[attribute] = np.array([-1 if v is None else v for v in g.vs[attribute]], dtype=np.int64)
+
+        engine = MetricEngine(g, cache_dir=metric_cache_dir)
+        for name, values in engine.compute(list(metrics)).items():
+            arrays[f"metric.{name}"] = values
+        layout = compute_mathlib_layout(g, seed=seed, cache_dir=layout_cache_dir)
+        arrays["x"] = layout["x"].to_numpy(dtype=float)
+        arrays["y"] = layout["y"].to_numpy(dtype=float)
+
+        fingerprint = graph_fingerprint(g)
+        reachability = reachability or ReachabilityIndex.build(g)
+        arrays.update({f"reach.{key}": value for key, value in reachability.arrays().items()})
+        return cls(arrays, {"fingerprint": fingerprint, "code_dir": code_dir})
+
+    @classmethod
+    def from_cache(
+        cls,
+        graph_location: str,
+        metrics: Sequence[MetricSpec] = DEFAULT_METRICS,
+        cache_format: str = "columnar",
+        seed: int = 0,
+    ) -> "GraphQueryService":
+        """
+        Loads a graph cache written by `GraphGenerator`, with the reachability
+        index and code sidecar beside it. Metrics and layout are cached in the
+        `metrics/` and `layouts/` directories next to the graph, as the build
+        pipeline (`lean-graph build`) leaves them.
+        """
+        g = cache_for(graph_location, cache_format).load()
+        cache_dir = cache_dir_for(graph_location)
+        output_dir = os.path.dirname(cache_dir)
+        index_path = os.path.join(cache_dir, REACHABILITY_FILE)
+        reachability = ReachabilityIndex.load(index_path, graph_fingerprint(g))
+        if reachability is None:
+            reachability = ReachabilityIndex.build(g)
+            try:
+                reachability.save(index_path)
+            except OSError:
+                pass  # Read-only cache; the index is rebuilt next time
+        return cls.from_graph(
+            g,
+            metrics,
+            metric_cache_dir=os.path.join(output_dir, "metrics"),
+            layout_cache_dir=os.path.join(output_dir, "layouts"),
+            reachability=reachability,
+            code_dir=cache_dir,
+            seed=seed,
+        )
+
+    # ==========================================
+    # Shared Memory
+    # ==========================================
+
+    def share(self) -> str:
+        """
+        Moves the query arrays into one shared memory segment and returns its
+        name. Call `close()` when done (the segment is freed by the owner).
+        """
+        if self.shared is None:
+            self.shared = SharedArrays.create(self.arrays, self.meta)
+            self._rebind(self.shared.arrays)
+        return self.shared.name
+
+    @classmethod
+    def attach(cls, name: str) -> "GraphQueryService":
+        """Service over a segment shared by another process (`share()`)."""
+        shared = SharedArrays.attach(name)
+        return cls(shared.arrays, shared.meta, shared)
+
+    def _rebind(self, arrays: Dict[str, np.ndarray]) -> None:
+        self.arrays = arrays
+        self.reachability = self._reachability(arrays)
+
+    def _reachability(self, arrays: Dict[str, np.ndarray]) -> Optional[ReachabilityIndex]:
+        if "reach.membership" not in arrays:
+            return None
+        return ReachabilityIndex.from_arrays(
+            {key[len("reach."):]: value for key, value in arrays.items() if key.startswith("reach.")},
+            self.meta.get("fingerprint"),
+        )
+
+    def close(self, unlink: bool = True) -> None:
+        """Detaches from shared memory, freeing it if `unlink` (owner only)."""
+        if self.code is not None:
+            self.code.close()
+        if self.shared is not None:
+            self.arrays = {}
+            self.reachability = None
+            self.shared.unlink() if unlink else self.shared.close()
+            self.shared = None
+
+    # ==========================================
+    # Queries
+    # ==========================================
+
+    def vid(self, v: Vertex) -> int:
+        if isinstance(v, str):
+            # Binary search of the name-sorted vertex order
+            order = self.arrays["name.order"]
+            lo, hi = 0, len(order)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self.name(int(order[mid])) < v:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo == len(order) or self.name(int(order[lo])) != v:
+                raise KeyError(v)
+            return int(order[lo])
+        vid = int(v)
+        if not 0 <= vid < self.vcount:
+            raise KeyError(v)
+        return vid
+
+    def name(self, vid: int) -> str:
+        return decode_string(self.arrays["name.blob"], self.arrays["name.offsets"], vid)
+
+    def _adjacent(self, vids: np.ndarray, direction: str) -> np.ndarray:
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown direction {direction!r}, expected one of {DIRECTIONS}")
+        parts = []
+        if direction in ("out", "both"):
+            parts.append(gather_neighbors(self.arrays["out_ptr"], self.arrays["out_idx"], vids))
+        if direction in ("in", "both"):
+            parts.append(gather_neighbors(self.arrays["in_ptr"], self.arrays["in_idx"], vids))
+        return np.unique(np.concatenate(parts))
+
+    def _vertices(self, vids: np.ndarray) -> List[Dict[str, Any]]:
+        return [{"id": vid, "name": self.name(vid)} for vid in vids.tolist()]
+
+    def _string(self, attribute: str, vid: int) -> Optional[str]:
+        if f"{attribute}.codes" not in self.arrays:
+            return None
+        code = int(self.arrays[f"{attribute}.codes"][vid])
+        if code < 0:
+            return None
+        return decode_string(self.arrays[f"{attribute}.blob"], self.arrays[f"{attribute}.offsets"], code)
+
+    def node(self, v: Vertex, code: bool = True) -> Dict[str, Any]:
+        """Everything known about one vertex."""
+        vid = self.vid(v)
+        name = self.name(vid)
+        arrays = self.arrays
+        detail = {
+            "id": vid,
+            "name": name,
+            "label": name.rpartition(".")[2],
+            **{attribute: self._string(attribute, vid) for attribute in _STRING_ATTRIBUTES},
+            **{
+                attribute: (None if arrays[attribute][vid] < 0 else int(arrays[attribute][vid]))
+                for attribute in _LINE_ATTRIBUTES
+                if attribute in arrays
+            },
+            "out_degree": int(arrays["out_ptr"][vid + 1] - arrays["out_ptr"][vid]),
+            "in_degree": int(arrays["in_ptr"][vid + 1] - arrays["in_ptr"][vid]),
+            "metrics": {metric: float(arrays[f"metric.{metric}"][vid]) for metric in self.metric_names},
+            "position": [float(arrays["x"][vid]), float(arrays["y"][vid])],
+        }
+        if self.reachability is not None:
+            detail["n_descendants"] = self.reachability.n_descendants(vid)
+            detail["n_ancestors"] = self.reachability.n_ancestors(vid)
+        if code and self.code is not None:
+            with self._code_lock:
+                detail["code"] = self.code.get(vid)
+        return detail
+
+    def neighbors(self, v: Vertex, direction: str = "out", limit: Optional[int] = None) -> Dict[str, Any]:
+        """Direct premises ("out"), dependents ("in") or both of a vertex."""
+        vid = self.vid(v)
+        nbrs = self._adjacent(np.array([vid]), direction)
+        return {"id": vid, "direction": direction, "count": len(nbrs), "neighbors": self._vertices(nbrs[:limit])}
+
+    def closure(self, v: Vertex, direction: str = "out", limit: Optional[int] = 1000) -> Dict[str, Any]:
+        """
+        Transitive premises ("out") or dependents ("in") of a vertex, in
+        vertex id order; `count` is the full size, `limit` caps the list.
+        """
+        if self.reachability is None:
+            raise ValueError("No reachability index in this service.")
+        vid = self.vid(v)
+        if direction == "out":
+            members = self.reachability.descendants(vid)
+        elif direction == "in":
+            members = self.reachability.ancestors(vid)
+        else:
+            raise ValueError(f"Unknown direction {direction!r}, expected 'out' or 'in'")
+        return {"id": vid, "direction": direction, "count": len(members), "vertices": self._vertices(members[:limit])}
+
+    def namespace_mask(self, prefix: str) -> np.ndarray:
+        """Vertices whose full namespace is `prefix` or lies inside it."""
+        if "full_namespace.codes" not in self.arrays:
+            raise ValueError("The graph has no `full_namespace` attribute.")
+        namespaces = decode_strings(self.arrays["full_namespace.blob"], self.arrays["full_namespace.offsets"])
+        inside = np.array(
+            [ns == prefix or ns.startswith(prefix + ".") for ns in namespaces] + [False],
+            dtype=bool,
+        )
+        return inside[self.arrays["full_namespace.codes"]]
+
+    def top(self, metric: str, k: int = 20, namespace: Optional[str] = None) -> Dict[str, Any]:
+        """The `k` highest-scoring vertices by a served metric."""
+        if metric not in self.metric_names:
+            raise ValueError(f"Metric {metric!r} is not served; available: {self.metric_names}")
+        scores = self.arrays[f"metric.{metric}"]
+        candidates = np.flatnonzero(self.namespace_mask(namespace)) if namespace else None
+        values = scores if candidates is None else scores[candidates]
+        k = min(k, len(values))
+        best = np.argpartition(-values, k - 1)[:k] if k > 0 else np.empty(0, dtype=np.int64)
+        best = best[np.argsort(-values[best], kind="stable")]
+        vids = best if candidates is None else candidates[best]
+        return {
+            "metric": metric,
+            "namespace": namespace,
+            "vertices": [
+                {"id": vid, "name": self.name(vid), "score": float(scores[vid])} for vid in vids.tolist()
+            ],
+        }
+
+    def namespace_subgraph(self, prefix: str, limit: Optional[int] = 5000) -> Dict[str, Any]:
+        """
+        Vertices of a namespace prefix and the edges among them, as pairs of
+        positions in the vertex list. `count` is the full vertex count.
+        """
+        mask = self.namespace_mask(prefix)
+        vids = np.flatnonzero(mask)
+        count = len(vids)
+        if limit is not None and count > limit:
+            vids = vids[:limit]
+            mask = np.zeros_like(mask)
+            mask[vids] = True
+        out_ptr = self.arrays["out_ptr"]
+        targets = gather_neighbors(out_ptr, self.arrays["out_idx"], vids)
+        sources = np.repeat(vids, out_ptr[vids + 1] - out_ptr[vids])
+        inside = mask[targets]
+        position = np.full(len(mask), -1, dtype=np.int64)
+        position[vids] = np.arange(len(vids))
+        edges = np.column_stack([position[sources[inside]], position[targets[inside]]])
+        return {"namespace": prefix, "count": count, "vertices": self._vertices(vids), "edges": edges.tolist()}
+
+    def stats(self) -> Dict[str, Any]:
+        namespace_offsets = self.arrays.get("full_namespace.offsets")
+        return {
+            "vcount": self.vcount,
+            "ecount": len(self.arrays["out_idx"]),
+            "fingerprint": self.meta.get("fingerprint"),
+            "metrics": self.metric_names,
+            "n_namespaces": 0 if namespace_offsets is None else len(namespace_offsets) - 1,
+            "shared_memory": self.shared.name if self.shared is not None else None,
+        }
+
+
+# ==========================================
+# Response Cache
+# ==========================================
+
+class ResponseCache:
+    """Thread-safe LRU of encoded responses, keyed by normalized request."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: Tuple, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# ==========================================
+# HTTP API
+# ==========================================
+
+def _int_param(params: Dict[str, str], key: str, default: Optional[int]) -> Optional[int]:
+    value = params.get(key)
+    if value is None:
+        return default
+    if value.lower() == "all":
+        return None
+    return int(value)
+
+
+def _vertex_param(params: Dict[str, str]) -> Vertex:
+    if "id" in params:
+        return int(params["id"])
+    if "name" in params:
+        return params["name"]
+    raise ValueError("Give the vertex as `name=<full name>` or `id=<vertex id>`.")
+
+
+def _routes(service: GraphQueryService) -> Dict[str, Callable[[Dict[str, str]], Any]]:
+    return {
+        "/node": lambda p: service.node(_vertex_param(p), code=p.get("code", "1") != "0"),
+        "/neighbors": lambda p: service.neighbors(
+            _vertex_param(p), p.get("direction", "out"), _int_param(p, "limit", None)
+        ),
+        "/closure": lambda p: service.closure(
+            _vertex_param(p), p.get("direction", "out"), _int_param(p, "limit", 1000)
+        ),
+        "/top": lambda p: service.top(p["metric"], _int_param(p, "k", 20), p.get("namespace")),
+        "/namespace": lambda p: service.namespace_subgraph(p["prefix"], _int_param(p, "limit", 5000)),
+        "/stats": lambda p: service.stats(),
+        "/health": lambda p: {"status": "ok"},
+    }
+
+
+def make_handler(service: GraphQueryService, cache: ResponseCache) -> type:
+    """Request handler class answering the API from `service` through `cache`."""
+    routes = _routes(service)
+
+    class QueryHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            url = urlsplit(self.path)
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            key = (url.path, tuple(sorted(params.items())))
+            body = cache.get(key)
+            status = 200
+            if body is None:
+                route = routes.get(url.path)
+                try:
+                    if route is None:
+                        status, result = 404, {"error": f"Unknown endpoint {url.path}"}
+                    else:
+                        result = route(params)
+                except KeyError as e:
+                    status, result = 404, {"error": f"Unknown vertex or parameter: {e}"}
+                except ValueError as e:
+                    status, result = 400, {"error": str(e)}
+                body = json.dumps(result, separators=(",", ":")).encode("utf-8")
+                if status == 200 and url.path != "/stats":
+                    cache.put(key, body)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            # The plot front-end is opened from file:// or another local port
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass  # One line per query would drown the console
+
+    return QueryHandler
+
+
+def serve(
+    service: GraphQueryService,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    workers: int = 1,
+    cache_size: int = 4096,
+) -> None:
+    """
+    Serves the query API until interrupted.
+
+    Args:
+        service: The warm graph.
+        host: Interface to bind; keep the default to stay local.
+        port: TCP port.
+        workers: Processes accepting on the same socket. With more than one,
+            the service arrays are moved to shared memory first, so every
+            worker reads the same pages.
+        cache_size: Responses kept per worker (0 disables caching).
+    """
+    if workers > 1:
+        service.share()
+    server = ThreadingHTTPServer((host, port), make_handler(service, ResponseCache(cache_size)))
+    children = [
+        pool_context().Process(target=server.serve_forever, daemon=True) for _ in range(workers - 1)
+    ]
+    for child in children:
+        child.start()
+    stats = service.stats()
+    print(
+        f"🛰️ Serving {stats['vcount']} nodes, {stats['ecount']} edges on http://{host}:{server.server_port}"
+        f" ({workers} worker{'s' if workers > 1 else ''}"
+        + (f", shared memory `{stats['shared_memory']}`" if stats["shared_memory"] else "")
+        + ")"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for child in children:
+            child.terminate()
+            child.join()
+        server.server_close()
+        service.close()
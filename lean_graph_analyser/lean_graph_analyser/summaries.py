@@ -0,0 +1,251 @@
+"""
+Summaries Module
+================
+
+Quotient graphs of a theorem graph at coarser levels of its hierarchy:
+
+    - "file":       one vertex per source file (`file_path`)
+    - "module":     one vertex per directory of source files, as a dotted
+                    module prefix ("Mathlib/Algebra/Group/Basic.lean" ->
+                    "Mathlib.Algebra.Group")
+    - "namespace":  one vertex per declaration namespace (`full_namespace`)
+
+Every group becomes one vertex with its size, the number of edges inside
+it, and the sum / mean / max of the requested metrics over its members.
+Edges between groups are merged into one edge weighted by the number of
+theorem-level edges they stand for. Everything is computed with array
+group-bys over integer group codes (one pass over the edge array), and the
+result is cached keyed by graph fingerprint, level, grouping and metrics.
+
+A summary is small enough to plot, rank or query at once, and
+`GraphSummary.members` maps a group back to its vertices in the full graph.
+
+Example:
+    summary = summarize(g, "module", metrics=["pagerank"])
+    summary.graph.vs["pagerank_sum"]
+    summary.members("Mathlib.Algebra.Group")
+"""
+
+import hashlib
+import os
+from pathlib import PurePosixPath
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import igraph as ig
+import numpy as np
+import pandas as pd
+
+from lean_graph_analyser.attributes import coded_column, has_attribute
+from lean_graph_analyser.metrics.engine import MetricEngine, MetricSpec
+from lean_graph_analyser.symbols import ROOT_NAMESPACE
+from lean_graph_analyser.utils.csr import edge_array, edge_tuples
+from lean_graph_analyser.utils.fingerprint import fingerprint_names
+
+SUMMARY_LEVELS = ("file", "module", "namespace")
+SUMMARY_VERSION = 1
+
+# Group of vertices without a file path
+UNKNOWN_GROUP = "Unknown"
+
+
+class GraphSummary(NamedTuple):
+    """
+    level: The level summarized ("file", "module" or "namespace").
+    graph: The quotient graph. Vertex attributes: `name` (group label),
+        `size`, `internal_edges` and `<metric>_sum` / `_mean` / `_max`;
+        edge attribute `weight`.
+    membership: Group (quotient vertex id) of every vertex of the full graph.
+    """
+    level: str
+    graph: ig.Graph
+    membership: np.ndarray
+
+    def members(self, group: Union[int, str]) -> np.ndarray:
+        """Vertex ids of the full graph in one group, by id or label."""
+        if isinstance(group, str):
+            group = self.graph.vs.find(name=group).index
+        return np.flatnonzero(self.membership == group)
+
+
+# ==========================================
+# Grouping
+# ==========================================
+
+def _factorize(values: Sequence[str]) -> Tuple[np.ndarray, List[str]]:
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object), sort=True)
+    return codes.astype(np.int32), list(uniques)
+
+
+def _compact(codes: np.ndarray, table: List[Optional[str]]) -> Tuple[np.ndarray, List[str]]:
+    """Renumbers a coded column to its used table entries, sorted by label."""
+    table_codes, labels = _factorize([UNKNOWN_GROUP if value is None else value for value in table])
+    grouped = table_codes[codes]
+    used = np.flatnonzero(np.bincount(grouped, minlength=len(labels)))
+    remap = np.zeros(len(labels), dtype=np.int32)
+    remap[used] = np.arange(len(used), dtype=np.int32)
+    return remap[grouped], [labels[i] for i in used.tolist()]
+
+
+def module_of(file_path: str) -> str:
+    """Dotted directory of a source file; a top-level file is its own module."""
+    path = PurePosixPath(file_path).with_suffix("")
+    return ".".join(path.parts[:-1]) or path.name
+
+
+def group_codes(g: ig.Graph, level: str) -> Tuple[np.ndarray, List[str]]:
+    """
+    Group of every vertex at `level`.
+
+    Returns:
+        (membership, labels): int32 group id per vertex, and the sorted group labels.
+    """
+    if level not in SUMMARY_LEVELS:
+        raise ValueError(f"Unknown summary level {level!r}, expected one of {SUMMARY_LEVELS}")
+    if level == "namespace":
+        if has_attribute(g, "full_namespace"):
+            return _compact(*coded_column(g, "full_namespace"))
+        return _factorize([name.rpartition(".")[0] or ROOT_NAMESPACE for name in g.vs["name"]])
+
+    if not has_attribute(g, "file_path"):
+        raise ValueError(f"Level {level!r} needs the `file_path` vertex attribute.")
+    # Group-bys run on the int codes; only the distinct paths are strings
+    codes, files = _compact(*coded_column(g, "file_path"))
+    if level == "file":
+        return codes, files
+    # Modules are grouped over the distinct files only
+    file_modules, modules = _factorize([p if p == UNKNOWN_GROUP else module_of(p) for p in files])
+    return file_modules[codes], modules
+
+
+# ==========================================
+# Contraction
+# ==========================================
+
+def quotient_edges(membership: np.ndarray, n_groups: int, edges: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Contracts an edge array by `membership`.
+
+    Returns:
+        (pairs, weights, internal): distinct (source group, target group)
+        pairs between different groups, sorted, with the number of edges
+        each stands for; and the number of edges inside every group.
+    """
+    sources = membership[edges[:, 0]].astype(np.int64)
+    targets = membership[edges[:, 1]].astype(np.int64)
+    same = sources == targets
+    internal = np.bincount(sources[same], minlength=n_groups)
+
+    keys = np.sort((sources[~same] << 32) | targets[~same])
+    if len(keys) == 0:
+        return np.empty((0, 2), dtype=np.int32), np.empty(0, dtype=np.int64), internal
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+    weights = np.diff(np.append(starts, len(keys)))
+    unique = keys[starts]
+    pairs = np.column_stack([unique >> 32, unique & 0xFFFFFFFF]).astype(np.int32)
+    return pairs, weights, internal
+
+
+def aggregate_metric(membership: np.ndarray, n_groups: int, values: np.ndarray) -> Dict[str, np.ndarray]:
+    """Sum, mean and max of a vertex metric per group (every group non-empty)."""
+    sizes = np.bincount(membership, minlength=n_groups)
+    sums = np.bincount(membership, weights=values, minlength=n_groups)
+    order = np.argsort(membership, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    return {
+        "sum": sums,
+        "mean": sums / np.maximum(sizes, 1),
+        "max": np.maximum.reduceat(values[order], starts) if len(order) else np.zeros(n_groups),
+    }
+
+
+def _summary_graph(
+    labels: List[str],
+    pairs: np.ndarray,
+    weights: np.ndarray,
+    columns: Dict[str, np.ndarray],
+) -> ig.Graph:
+    summary = ig.Graph(n=len(labels), edges=edge_tuples(pairs), directed=True)
+    summary.vs["name"] = labels
+    for column, values in columns.items():
+        summary.vs[column] = values.tolist()
+    summary.es["weight"] = weights.tolist()
+    return summary
+
+
+# ==========================================
+# Entry Points
+# ==========================================
+
+def _cache_key(
+    fingerprint: str, level: str, labels: List[str], membership: np.ndarray, metrics: Sequence[MetricSpec]
+) -> str:
+    digest = hashlib.sha1()
+    digest.update(f"v{SUMMARY_VERSION}:{level}:{fingerprint}:{list(metrics)!r}\n".encode("utf-8"))
+    digest.update(fingerprint_names(labels).encode("ascii"))
+    digest.update(membership.tobytes())
+    return digest.hexdigest()[:20]
+
+
+def summarize(
+    g: ig.Graph,
+    level: str = "file",
+    metrics: Sequence[MetricSpec] = ("pagerank",),
+    cache_dir: Optional[str] = None,
+    metric_cache_dir: Optional[str] = None,
+    engine: Optional[MetricEngine] = None,
+) -> GraphSummary:
+    """
+    Contracts `g` to the quotient graph of one level.
+
+    Args:
+        g: The dependency graph.
+        level: "file", "module" or "namespace".
+        metrics: Vertex metrics aggregated per group (see `MetricEngine`).
+        cache_dir: If set, summaries are stored there and reused while the
+            graph, its grouping and the metrics are unchanged.
+        metric_cache_dir: `MetricEngine` cache for the vertex metrics.
+        engine: Engine to compute the metrics with, so several summaries
+            share them; defaults to a new one on `metric_cache_dir`.
+    """
+    engine = engine or MetricEngine(g, cache_dir=metric_cache_dir)
+    membership, labels = group_codes(g, level)
+    cache_path = None
+    if cache_dir is not None:
+        key = _cache_key(engine.fingerprint, level, labels, membership, metrics)
+        cache_path = os.path.join(cache_dir, f"summary-{level}-{key}.npz")
+        if os.path.exists(cache_path):
+            with np.load(cache_path, allow_pickle=False) as cached:
+                columns = {name[len("col."):]: cached[name] for name in cached.files if name.startswith("col.")}
+                graph = _summary_graph(labels, cached["pairs"], cached["weights"], columns)
+            return GraphSummary(level, graph, membership)
+
+    n_groups = len(labels)
+    pairs, weights, internal = quotient_edges(membership, n_groups, edge_array(g))
+    columns = {
+        "size": np.bincount(membership, minlength=n_groups),
+        "internal_edges": internal,
+    }
+    if metrics:
+        scores = engine.compute(list(metrics))
+        for name, values in scores.items():
+            for statistic, aggregated in aggregate_metric(membership, n_groups, values).items():
+                columns[f"{name}_{statistic}"] = aggregated
+
+    if cache_path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.tmp.npz"
+        np.savez(tmp_path, pairs=pairs, weights=weights, **{f"col.{k}": v for k, v in columns.items()})
+        os.replace(tmp_path, cache_path)
+    return GraphSummary(level, _summary_graph(labels, pairs, weights, columns), membership)
+
+
+def summarize_all(
+    g: ig.Graph,
+    levels: Sequence[str] = SUMMARY_LEVELS,
+    metrics: Sequence[MetricSpec] = ("pagerank",),
+    cache_dir: Optional[str] = None,
+    metric_cache_dir: Optional[str] = None,
+) -> Dict[str, GraphSummary]:
+    """`summarize` at several levels; metrics are computed once and shared."""
+    engine = MetricEngine(g, cache_dir=metric_cache_dir)
+    return {level: summarize(g, level, metrics, cache_dir, engine=engine) for level in levels}
@@ -0,0 +1,138 @@
+"""
+Symbol Table Module
+===================
+
+Interned declaration names for graph construction.
+
+A `SymbolTable` maps every full name to a dense int id (the vertex id) and
+splits it once into namespace prefix and label. Namespace prefixes live in
+a `NamespaceTable`: each distinct prefix ("Mathlib.Algebra.Group") is stored
+once, with the id of its parent prefix ("Mathlib.Algebra") and its root and
+second components precomputed. So the taxonomy of a vertex is one int, the
+`namespace_id` vertex column, from which `attributes` resolves the
+`root_namespace` / `namespace` / `full_namespace` strings on demand.
+
+`SymbolTable.ids` is the name -> id dict that edge extraction resolves
+premises against, so premise names are looked up once and compared as ints
+afterwards.
+
+Example:
+    symbols = SymbolTable()
+    vid = symbols.intern("Mathlib.Algebra.Group.mul_comm")
+    symbols.namespaces.name(symbols.namespace_id(vid))  # "Mathlib.Algebra.Group"
+"""
+
+from array import array
+import sys
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# `full_namespace` of names without a namespace
+ROOT_NAMESPACE = "Root"
+
+
+class NamespaceTable:
+    """
+    Distinct namespace prefixes as a parent-id trie.
+
+    Every prefix of an interned namespace is interned too, so walking
+    `parent` from any id reaches a top-level namespace (parent -1).
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.parent = array("i")
+        self.depth = array("i")
+        self.roots: List[str] = []                  # First component
+        self.seconds: List[Optional[str]] = []      # Second component (None at depth 1)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern(self, prefix: str) -> int:
+        """Id of a namespace prefix, adding it (and its ancestors) if new."""
+        ns_id = self.ids.get(prefix)
+        if ns_id is not None:
+            return ns_id
+        head, dot, component = prefix.rpartition(".")
+        parent = self.intern(head) if dot else -1
+        ns_id = len(self.names)
+        self.ids[prefix] = ns_id
+        self.names.append(sys.intern(prefix))
+        self.parent.append(parent)
+        if parent < 0:
+            self.depth.append(1)
+            self.roots.append(sys.intern(component))
+            self.seconds.append(None)
+        else:
+            self.depth.append(self.depth[parent] + 1)
+            self.roots.append(self.roots[parent])
+            self.seconds.append(sys.intern(component) if self.depth[parent] == 1 else self.seconds[parent])
+        return ns_id
+
+    def name(self, ns_id: int) -> str:
+        return self.names[ns_id] if ns_id >= 0 else ROOT_NAMESPACE
+
+    def ancestors(self, ns_id: int) -> List[int]:
+        """`ns_id` and its enclosing namespaces, innermost first."""
+        chain = []
+        while ns_id >= 0:
+            chain.append(ns_id)
+            ns_id = self.parent[ns_id]
+        return chain
+
+
+class SymbolTable:
+    """
+    Full names <-> dense int ids, with the namespace of every symbol.
+
+    Ids are assigned in interning order, so when vertices are created in
+    the same order, symbol id == vertex id.
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.labels: List[str] = []
+        self.namespaces = NamespaceTable()
+        self._namespace_of = array("i")     # -1: no namespace
+
+    @classmethod
+    def from_names(cls, names: Iterable[str]) -> "SymbolTable":
+        """Table of distinct `names` in order (e.g. `g.vs["name"]` of a cached graph)."""
+        table = cls()
+        for name in names:
+            table.intern(name)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.ids
+
+    def get(self, name: str) -> Optional[int]:
+        return self.ids.get(name)
+
+    def intern(self, name: str) -> int:
+        """Id of `name`, assigning the next id if it is new."""
+        symbol = self.ids.get(name)
+        if symbol is not None:
+            return symbol
+        symbol = len(self.names)
+        self.ids[name] = symbol
+        self.names.append(name)
+        prefix, dot, label = name.rpartition(".")
+        self.labels.append(label)
+        self._namespace_of.append(self.namespaces.intern(prefix) if dot else -1)
+        return symbol
+
+    def namespace_id(self, symbol: int) -> int:
+        """Namespace id of a symbol (-1 for names without a namespace)."""
+        return self._namespace_of[symbol]
+
+    def namespace_ids(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Namespace ids of symbols [start, stop) as an int32 array."""
+        return np.frombuffer(self._namespace_of, dtype=np.int32)[start:stop].copy()
@@ -0,0 +1,123 @@
+"""
+CSR Helpers.
+
+Conversions between igraph edge lists and compressed sparse row (CSR) arrays,
+the compact topology representation used by the graph cache.
+"""
+
+import itertools
+from typing import List, Tuple
+
+import igraph as ig
+import numpy as np
+
+
+def edge_array(g: ig.Graph) -> np.ndarray:
+    """Returns the edges of `g` as an int32 array of shape (m, 2)."""
+    # fromiter over the flattened tuples avoids np.array's per-row inspection
+    flat = itertools.chain.from_iterable(g.get_edgelist())
+    return np.fromiter(flat, dtype=np.int32, count=2 * g.ecount()).reshape(-1, 2)
+
+
+def csr_from_edges(n: int, edges: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Builds the out-adjacency CSR of a directed graph.
+
+    Args:
+        n: Number of vertices.
+        edges: (m, 2) array of (source, target) pairs.
+
+    Returns:
+        (indptr, indices): the targets of vertex v are indices[indptr[v]:indptr[v + 1]].
+        Edges keep their relative order within each source (stable sort).
+    """
+    m = len(edges)
+    indptr_dtype = np.int32 if m < np.iinfo(np.int32).max else np.int64
+
+    sources = edges[:, 0]
+    order = np.argsort(sources, kind="stable")
+    indices = np.ascontiguousarray(edges[order, 1], dtype=np.int32)
+
+    indptr = np.zeros(n + 1, dtype=indptr_dtype)
+    np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+    return indptr, indices
+
+
+def edges_from_csr(indptr: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """Inverse of `csr_from_edges`: expands a CSR back to an (m, 2) int32 edge array."""
+    n = len(indptr) - 1
+    sources = np.repeat(np.arange(n, dtype=np.int32), np.diff(indptr))
+    return np.column_stack([sources, np.asarray(indices, dtype=np.int32)])
+
+
+def edge_tuples(edges: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Converts an (m, 2) edge array into the list of tuples igraph expects.
+
+    Zipping two flat lists is about twice as fast as `edges.tolist()`, which
+    allocates one small list per edge.
+    """
+    return list(zip(edges[:, 0].tolist(), edges[:, 1].tolist()))
+
+
+def gather_neighbors(indptr: np.ndarray, indices: np.ndarray, vertices: np.ndarray) -> np.ndarray:
+    """
+    Concatenated CSR neighbour lists of `vertices`, without a Python loop.
+
+    Returns:
+        indices[indptr[v]:indptr[v + 1]] for every v in `vertices`, back to back.
+    """
+    starts = np.asarray(indptr[vertices], dtype=np.int64)
+    counts = np.asarray(indptr[np.asarray(vertices) + 1], dtype=np.int64) - starts
+    # Offset of every gathered slot: its range start plus its rank inside the range
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    return np.asarray(indices)[offsets]
+
+
+def sorted_unique(values: np.ndarray) -> np.ndarray:
+    """
+    Sorted distinct values of a 1-D integer array.
+
+    Same result as np.unique, but sort + neighbour mask: recent numpy
+    versions are much slower with np.unique on millions of int64 keys.
+    """
+    values = np.sort(values)
+    if len(values) == 0:
+        return values
+    keep = np.empty(len(values), dtype=bool)
+    keep[0] = True
+    np.not_equal(values[1:], values[:-1], out=keep[1:])
+    return values[keep]
+
+
+def unique_edges(edges: np.ndarray) -> np.ndarray:
+    """Deduplicates an (m, 2) edge array; the result is sorted by (source, target)."""
+    keys = sorted_unique((edges[:, 0].astype(np.int64) << 32) | edges[:, 1].astype(np.int64))
+    return np.column_stack([keys >> 32, keys & 0xFFFFFFFF]).astype(np.int32)
+
+
+# Segments longer than this are reduced one at a time by `segment_reduce_rows`
+_LONG_SEGMENT = 32
+
+
+def segment_reduce_rows(ufunc: np.ufunc, values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """
+    Same as `ufunc.reduceat(values, starts, axis=0)` for a 2-D array split
+    into non-empty, back-to-back row segments, but much faster on small
+    integer rows (bitsets, HyperLogLog registers), where numpy's reduceat
+    falls back to a slow per-element loop.
+
+    The k-th row of every short segment is combined in one vectorized step
+    per k; the few long segments are reduced one by one.
+    """
+    counts = np.diff(np.append(starts, len(values)))
+    out = values[starts].copy()
+    segments = np.flatnonzero(counts <= _LONG_SEGMENT)
+    for k in range(1, _LONG_SEGMENT):
+        segments = segments[counts[segments] > k]
+        if len(segments) == 0:
+            break
+        out[segments] = ufunc(out[segments], values[starts[segments] + k])
+    for s in np.flatnonzero(counts > _LONG_SEGMENT).tolist():
+        out[s] = ufunc.reduce(values[starts[s]:starts[s] + counts[s]], axis=0)
+    return out
@@ -0,0 +1,186 @@
+"""
+DAG Helpers.
+
+Strongly connected component (SCC) condensation and linear-time longest-path
+depths. Dependency graphs are almost DAGs, but mutual definitions create small
+cycles; condensing each SCC into one vertex gives a true DAG to work on.
+"""
+
+from typing import List, NamedTuple, Optional, Tuple
+
+import igraph as ig
+import numpy as np
+
+from lean_graph_analyser.utils.csr import (
+    csr_from_edges,
+    edge_array,
+    gather_neighbors,
+    segment_reduce_rows,
+    sorted_unique,
+    unique_edges,
+)
+
+
+class Condensation(NamedTuple):
+    """
+    membership: component id of every vertex of the original graph.
+    n_components: number of components (vertices of the condensation).
+    edges: (k, 2) int32 unique edges between distinct components.
+    """
+    membership: np.ndarray
+    n_components: int
+    edges: np.ndarray
+
+
+def condense(g: ig.Graph) -> Condensation:
+    """Collapses every strongly connected component of `g` into one vertex."""
+    components = g.connected_components(mode="strong")
+    membership = np.asarray(components.membership, dtype=np.int32)
+
+    edges = membership[edge_array(g)]
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    return Condensation(membership, len(components), unique_edges(edges))
+
+
+def longest_path_depth(n: int, edges: np.ndarray) -> np.ndarray:
+    """
+    Longest-path depth of every vertex of a DAG, following edge direction.
+
+    Vertices without out-edges get depth 0, and every other vertex sits one
+    level above its deepest out-neighbour. For a dependency graph (theorem ->
+    premise) that is the length of the longest dependency chain below a node.
+
+    Runs level-synchronous Kahn peeling with numpy: every edge is touched once,
+    so the cost is linear in the size of the DAG.
+
+    Args:
+        n: Number of vertices.
+        edges: (k, 2) array of (source, target) pairs; must be acyclic.
+    """
+    depth = np.zeros(n, dtype=np.int32)
+    if len(edges) == 0:
+        return depth
+
+    remaining = np.bincount(edges[:, 0], minlength=n)     # Out-degrees not yet resolved
+    in_ptr, in_src = csr_from_edges(n, edges[:, ::-1])    # Predecessors of every vertex
+
+    frontier = np.flatnonzero(remaining == 0)
+    level = 0
+    while len(frontier):
+        depth[frontier] = level
+        # Every predecessor of the frontier has one more out-neighbour resolved
+        preds = gather_neighbors(in_ptr, in_src, frontier)
+        np.subtract.at(remaining, preds, 1)
+        # A predecessor is ready once all its out-neighbours are done
+        frontier = sorted_unique(preds[remaining[preds] == 0])
+        level += 1
+
+    if np.any(remaining > 0):
+        raise ValueError("Graph has cycles; condense it first.")
+    return depth
+
+
+def condensed_depth(g: ig.Graph) -> np.ndarray:
+    """
+    Depth of every vertex of a possibly cyclic graph: the longest-path depth
+    of its strongly connected component in the condensation.
+    """
+    cond = condense(g)
+    return longest_path_depth(cond.n_components, cond.edges)[cond.membership]
+
+
+# Set bits of every byte value, for popcounts on numpy < 2.0 (no np.bitwise_count)
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount_rows(bits: np.ndarray) -> np.ndarray:
+    """Number of set bits in every row of a 2-D uint64 array."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits).sum(axis=1, dtype=np.int64)
+    return _POPCOUNT8[bits.view(np.uint8)].sum(axis=1, dtype=np.int64)
+
+
+def depth_levels(n: int, edges: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Groups the vertices of a DAG by longest-path depth, for bottom-up sweeps.
+
+    Returns:
+        For every depth >= 1, in increasing order, (vertices, neighbors, starts):
+        the out-neighbours of vertices[i] are neighbors[starts[i]:starts[i + 1]],
+        and all of them live at a lower depth. Depth 0 (sinks) is left out.
+    """
+    depth = longest_path_depth(n, edges)
+    indptr, indices = csr_from_edges(n, edges)
+    order = np.argsort(depth, kind="stable")
+    bounds = np.searchsorted(depth[order], np.arange(1, depth.max(initial=0) + 2))
+
+    levels = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        vertices = order[lo:hi]
+        counts = np.diff(indptr)[vertices]
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        levels.append((vertices, gather_neighbors(indptr, indices, vertices), starts))
+    return levels
+
+
+def closure_sizes(cond: Condensation, max_bytes: int = 256 * 2**20) -> np.ndarray:
+    """
+    For every component, the number of original vertices in the components it
+    reaches (itself included).
+
+    Bit-parallel propagation: vertices are processed in blocks of 64 * words
+    columns, and one bottom-up sweep per block ORs the successor bitsets into
+    every component. Cost is O(E * V / 64) word operations, with memory
+    bounded by `max_bytes`. Pass a condensation with reversed edges to count
+    ancestors instead.
+    """
+    n = len(cond.membership)
+    levels = depth_levels(cond.n_components, cond.edges)
+
+    # Words per block: the bitset table and the largest gathered level must fit
+    widest = max([len(nbrs) for _, nbrs, _ in levels], default=0)
+    words = int(np.clip(max_bytes // (8 * (cond.n_components + widest)), 1, 64))
+    block = 64 * words
+
+    # Columns ordered by depth: a block's bits can only appear at or above the
+    # depth of its shallowest target, so the levels below it are skipped.
+    comp_depth = np.zeros(cond.n_components, dtype=np.int64)
+    for level, (vertices, _, _) in enumerate(levels, start=1):
+        comp_depth[vertices] = level
+    columns = np.argsort(comp_depth[cond.membership], kind="stable")
+
+    sizes = np.zeros(cond.n_components, dtype=np.int64)
+    for lo in range(0, n, block):
+        targets = columns[lo:lo + block]
+        bits = np.zeros((cond.n_components, words), dtype=np.uint64)
+        offsets = np.arange(len(targets))
+        # Every component starts out reaching its own member vertices
+        np.bitwise_or.at(
+            bits,
+            (cond.membership[targets], offsets // 64),
+            np.left_shift(np.uint64(1), (offsets % 64).astype(np.uint64)),
+        )
+        for vertices, nbrs, starts in levels[comp_depth[cond.membership[targets[0]]]:]:
+            bits[vertices] |= segment_reduce_rows(np.bitwise_or, bits[nbrs], starts)
+        sizes += popcount_rows(bits)
+    return sizes
+
+
+def descendant_counts(
+    g: ig.Graph,
+    cond: Optional[Condensation] = None,
+    max_bytes: int = 256 * 2**20,
+) -> np.ndarray:
+    """
+    Number of distinct vertices reachable from every vertex (itself excluded).
+
+    On a dependency graph this is the size of each declaration's transitive
+    closure of premises; see `closure_sizes` for the algorithm.
+
+    Args:
+        g: The graph.
+        cond: Its condensation, if already computed.
+        max_bytes: Memory budget of the bitset table.
+    """
+    cond = cond if cond is not None else condense(g)
+    return closure_sizes(cond, max_bytes)[cond.membership] - 1
@@ -0,0 +1,38 @@
+"""
+Fingerprint Helpers.
+
+Short content hashes used to tell whether an on-disk artifact (a resumable
+edge spool, a cached layout, ...) still belongs to the graph at hand.
+"""
+
+import hashlib
+from typing import Iterable
+
+import igraph as ig
+import numpy as np
+
+from lean_graph_analyser.utils.csr import edge_array
+
+
+def fingerprint_names(names: Iterable[str]) -> str:
+    """Hash of a sequence of vertex names, order included (i.e. of the vertex ids)."""
+    return hashlib.sha1("\n".join(names).encode("utf-8")).hexdigest()
+
+
+def graph_fingerprint(g: ig.Graph) -> str:
+    """
+    Hash of a graph's topology and vertex names.
+
+    Two graphs with the same fingerprint have the same vertex ids, names and
+    edge set, so anything computed from one (layouts, metrics, indexes) can be
+    reused for the other.
+    """
+    digest = hashlib.sha1()
+    digest.update(f"{g.vcount()}:{g.ecount()}:{g.is_directed()}\n".encode("ascii"))
+    # Sorted so the fingerprint does not depend on edge ids
+    edges = edge_array(g)
+    keys = np.sort((edges[:, 0].astype(np.int64) << 32) | edges[:, 1])
+    digest.update(keys.tobytes())
+    if "name" in g.vs.attributes():
+        digest.update(fingerprint_names(g.vs["name"]).encode("ascii"))
+    return digest.hexdigest()
@@ -0,0 +1,27 @@
+"""
+Process Pool Helpers.
+
+Shared by the extraction workers and the parallel metrics.
+"""
+
+import math
+import multiprocessing as mp
+from typing import List
+
+
+def pool_context() -> mp.context.BaseContext:
+    # Prefer fork: workers inherit large read-only state (traced ASTs, graphs)
+    # from the parent instead of unpickling it.
+    if "fork" in mp.get_all_start_methods():
+        return mp.get_context("fork")
+    return mp.get_context()
+
+
+def make_shards(n_items: int, workers: int, per_worker: int = 4) -> List[range]:
+    """
+    Splits range(n_items) into contiguous shards.
+
+    A few shards per worker keeps the pool busy when item costs are skewed.
+    """
+    shard_size = max(1, math.ceil(n_items / (workers * per_worker)))
+    return [range(i, min(i + shard_size, n_items)) for i in range(0, n_items, shard_size)]
@@ -0,0 +1,233 @@
+"""
+Edge Rendering Module.
+
+Dependency edges on top of `compute_mathlib_layout` coordinates, in a form a
+WebGL plot can draw at Mathlib scale:
+
+    - namespace bundles: all edges between two namespaces aggregated into one
+      weighted curve between the namespace centroids (the top `max_bundles`
+      by weight, in a few line-width classes);
+    - individual edges: a bounded sample, either the top-weight edges
+      (both endpoints highly ranked) or a uniform random sample.
+
+Coordinates are built with vectorized NumPy as one flat array per trace,
+with NaN separators between segments, so each layer is a single trace no
+matter how many segments it holds.
+
+Used by `plot_graph(..., show_edges=True)`.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import igraph as ig
+import numpy as np
+import pandas as pd
+
+from lean_graph_analyser.utils.csr import edge_array
+
+# Individual-edge sampling strategies
+EDGE_SAMPLES = ("top", "random")
+
+# Line widths of the bundle weight classes (light -> heavy)
+BUNDLE_WIDTHS = (0.5, 1.5, 3.0, 6.0)
+
+# Points per bundle curve
+CURVE_POINTS = 12
+
+
+def segment_coords(x: np.ndarray, y: np.ndarray, edges: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Straight segments as flat float32 arrays: x[s], x[t], NaN for every edge.
+    """
+    m = len(edges)
+    xs = np.full(3 * m, np.nan, dtype=np.float32)
+    ys = np.full(3 * m, np.nan, dtype=np.float32)
+    xs[0::3], xs[1::3] = x[edges[:, 0]], x[edges[:, 1]]
+    ys[0::3], ys[1::3] = y[edges[:, 0]], y[edges[:, 1]]
+    return xs, ys
+
+
+def curve_coords(
+    start: np.ndarray, end: np.ndarray, bend: float = 0.15, n_points: int = CURVE_POINTS
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quadratic Bezier curves as flat float32 arrays with NaN separators.
+
+    Args:
+        start, end: (b, 2) endpoints.
+        bend: Offset of the control point, perpendicular to the chord, as a
+            fraction of its length. Opposite directions bend to opposite
+            sides, so A -> B and B -> A stay apart.
+    """
+    chord = end - start
+    normal = np.stack([-chord[:, 1], chord[:, 0]], axis=1)
+    control = (start + end) / 2 + bend * normal
+    t = np.linspace(0.0, 1.0, n_points)[None, :, None]
+    points = (1 - t) ** 2 * start[:, None] + 2 * (1 - t) * t * control[:, None] + t ** 2 * end[:, None]
+    # One NaN row after every curve
+    padded = np.full((len(start), n_points + 1, 2), np.nan, dtype=np.float32)
+    padded[:, :n_points] = points
+    return padded[..., 0].ravel(), padded[..., 1].ravel()
+
+
+# ==========================================
+# Aggregation & Sampling
+# ==========================================
+
+def namespace_bundles(layout_df: pd.DataFrame, edges: np.ndarray) -> pd.DataFrame:
+    """
+    Aggregates edges by (source namespace, target namespace).
+
+    Edges within one namespace are left out: they would collapse to a point.
+
+    Returns:
+        One row per namespace pair, heaviest first: source/target namespace
+        codes, weight (number of edges) and both centroids.
+    """
+    ns = np.asarray(layout_df["namespace"].cat.codes, dtype=np.int64)
+    n_ns = len(layout_df["namespace"].cat.categories)
+    x = layout_df["x"].to_numpy(dtype=float)
+    y = layout_df["y"].to_numpy(dtype=float)
+
+    counts = np.maximum(np.bincount(ns, minlength=n_ns), 1)
+    cx = np.bincount(ns, weights=x, minlength=n_ns) / counts
+    cy = np.bincount(ns, weights=y, minlength=n_ns) / counts
+
+    src, dst = ns[edges[:, 0]], ns[edges[:, 1]]
+    keys = np.sort((src * n_ns + dst)[src != dst])
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.zeros(0, dtype=np.int64)
+    pair = keys[starts]
+    weight = np.diff(np.r_[starts, len(keys)])
+    order = np.argsort(-weight, kind="stable")
+    pair, weight = pair[order], weight[order]
+    s, t = pair // n_ns, pair % n_ns
+    return pd.DataFrame({
+        "source": s, "target": t, "weight": weight,
+        "x0": cx[s], "y0": cy[s], "x1": cx[t], "y1": cy[t],
+    })
+
+
+def sample_edges(
+    edges: np.ndarray,
+    scores: np.ndarray,
+    max_edges: int,
+    strategy: str = "top",
+    seed: int = 0,
+    visible: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Picks at most `max_edges` edges to draw individually.
+
+    Args:
+        edges: (m, 2) edge array.
+        scores: Node centrality.
+        strategy: "top" keeps the edges whose weaker endpoint ranks highest
+            (edges between important nodes); "random" samples uniformly.
+        visible: Optional boolean mask of drawn nodes; other edges are skipped.
+    """
+    if strategy not in EDGE_SAMPLES:
+        raise ValueError(f"Unknown edge sample {strategy!r}, expected one of {EDGE_SAMPLES}")
+    if visible is not None:
+        edges = edges[visible[edges[:, 0]] & visible[edges[:, 1]]]
+    if len(edges) <= max_edges:
+        return edges
+    if strategy == "random":
+        rng = np.random.default_rng(seed)
+        return edges[np.sort(rng.choice(len(edges), size=max_edges, replace=False))]
+    weight = np.minimum(scores[edges[:, 0]], scores[edges[:, 1]])
+    return edges[np.argpartition(-weight, max_edges - 1)[:max_edges]]
+
+
+# ==========================================
+# Traces
+# ==========================================
+
+def edge_traces(
+    g: ig.Graph,
+    layout_df: pd.DataFrame,
+    scores: np.ndarray,
+    max_edges: int = 20_000,
+    sample: str = "top",
+    max_bundles: int = 300,
+    visible: Optional[np.ndarray] = None,
+    dark_mode: bool = True,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Trace specs (plain dicts with NumPy arrays) of the edge layers, meant to
+    be drawn beneath the nodes.
+
+    Args:
+        g: The graph (edges point from a theorem to its premises).
+        layout_df: Output of `compute_mathlib_layout`.
+        scores: Node centrality, used by the "top" sample.
+        max_edges: Individual edges drawn (0 disables them).
+        sample: "top" or "random", see `sample_edges`.
+        max_bundles: Namespace bundles drawn (0 disables them).
+        visible: Boolean mask of nodes drawn individually (e.g. the top-k of
+            the LOD mode); individual edges are limited to these nodes.
+        dark_mode: Pick line colors for the dark or the light theme.
+    """
+    edges = edge_array(g)
+    ink = "255, 255, 255" if dark_mode else "0, 0, 0"
+    traces: List[Dict[str, Any]] = []
+
+    if max_bundles > 0 and len(edges):
+        bundles = namespace_bundles(layout_df, edges).head(max_bundles)
+        if len(bundles):
+            categories = np.asarray(layout_df["namespace"].cat.categories, dtype=object)
+            start = bundles[["x0", "y0"]].to_numpy()
+            end = bundles[["x1", "y1"]].to_numpy()
+            # Width classes by quantile of log weight
+            log_w = np.log1p(bundles["weight"].to_numpy(dtype=float))
+            thresholds = np.quantile(log_w, np.linspace(0, 1, len(BUNDLE_WIDTHS) + 1)[1:-1])
+            width_class = np.searchsorted(thresholds, log_w, side="right")
+            for c, width in enumerate(BUNDLE_WIDTHS):
+                members = width_class == c
+                if not members.any():
+                    continue
+                xs, ys = curve_coords(start[members], end[members])
+                traces.append({
+                    "type": "scattergl",
+                    "mode": "lines",
+                    "name": f"bundles ({width:g}px)",
+                    "x": xs,
+                    "y": ys,
+                    "line": dict(width=width, color=f"rgba({ink}, 0.25)"),
+                    "hoverinfo": "skip",
+                    "showlegend": False,
+                })
+            # Hover targets at the curve midpoints
+            mid_x, mid_y = curve_coords(start, end, n_points=3)
+            labels = [
+                f"{categories[s]} → {categories[t]}: {w} dependencies"
+                for s, t, w in zip(bundles["source"], bundles["target"], bundles["weight"])
+            ]
+            traces.append({
+                "type": "scattergl",
+                "mode": "markers",
+                "name": "bundle weights",
+                "x": mid_x[1::4],
+                "y": mid_y[1::4],
+                "marker": dict(size=4, color=f"rgba({ink}, 0.4)"),
+                "text": labels,
+                "hovertemplate": "%{text}<extra></extra>",
+                "showlegend": False,
+            })
+
+    if max_edges > 0 and len(edges):
+        sampled = sample_edges(edges, scores, max_edges, sample, seed, visible)
+        xs, ys = segment_coords(
+            layout_df["x"].to_numpy(dtype=np.float32), layout_df["y"].to_numpy(dtype=np.float32), sampled
+        )
+        traces.append({
+            "type": "scattergl",
+            "mode": "lines",
+            "name": f"{len(sampled)} edges",
+            "x": xs,
+            "y": ys,
+            "line": dict(width=0.5, color=f"rgba({ink}, 0.12)"),
+            "hoverinfo": "skip",
+            "showlegend": False,
+        })
+    return traces
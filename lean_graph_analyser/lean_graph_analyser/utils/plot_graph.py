@@ -11,7 +11,22 @@ import numpy as np
 import pandas as pd
 import webbrowser
 import os
-from typing import Callable, Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional, Sequence, Tuple, Union
+
+from lean_graph_analyser.attributes import has_attribute, vertex_strings
+from lean_graph_analyser.cache.code_store import CodeStore
+from lean_graph_analyser.utils.dag import condensed_depth
+from lean_graph_analyser.utils.fingerprint import graph_fingerprint
+from lean_graph_analyser.utils.plot_edges import edge_traces
+from lean_graph_analyser.utils.plot_lod import lod_traces, top_ranked, write_lod_html
+from lean_graph_analyser.utils.plot_tiles import write_tile_pyramid, write_tile_viewer
+from lean_graph_analyser.views import SubgraphView
+
+# Characters of code shown in a hover tooltip
+HOVER_CODE_CHARS = 300
+
+# Rendering modes of `plot_graph`
+PLOT_MODES = ("full", "lod", "tiles")
 
 def default_centrality(g: ig.Graph) -> Dict[int, float]:
     """Default centrality: PageRank (approximate importance)."""
@@ -30,87 +45,282 @@ def get_namespace(name: str) -> str:
         return parts[1] 
     return "Root"
 
-def compute_mathlib_layout(g: ig.Graph) -> pd.DataFrame:
+def get_namespaces(g: ig.Graph) -> np.ndarray:
+    """`get_namespace` for every vertex of `g`, as a str array."""
+    names = g.vs["name"]
+    if has_attribute(g, "namespace"):
+        # Graphs from GraphGenerator resolve parts[1] as `namespace`;
+        # single-part names (no dot) map to "Root" like get_namespace.
+        namespaces = np.array(vertex_strings(g, "namespace"), dtype=object)
+        namespaces[np.array(["." not in name for name in names], dtype=bool)] = "Root"
+        return namespaces.astype(str)
+    # Otherwise one bounded split per name
+    splits = (name.split('.', 2) for name in names)
+    return np.array([p[1] if len(p) >= 2 else "Root" for p in splits], dtype=str)
+
+# Bump when the layout formula changes, so stale cache entries are ignored
+LAYOUT_VERSION = 2
+
+# Supported X-axis modes of `compute_mathlib_layout`
+X_AXIS_MODES = ("topological", "depth")
+
+def depth_x_coords(g: ig.Graph, rng: np.random.Generator) -> np.ndarray:
+    """
+    X coordinates from dependency depth: the longest chain of premises below
+    each node (foundations at 0). Mutual definitions share the depth of their
+    strongly connected component, so this works on graphs with cycles.
+    """
+    depth = condensed_depth(g).astype(float)
+    # Spread each depth level a little so it does not collapse into one column
+    return depth + rng.uniform(0, 0.6, g.vcount())
+
+def compute_mathlib_layout(
+    g: ig.Graph,
+    seed: int = 0,
+    cache_dir: Optional[str] = None,
+    x_axis: str = "topological",
+) -> pd.DataFrame:
     """
     Computes the specific X/Y layout used by Mathlib Explorer.
     X-Axis: Topological Depth (Time/Complexity)
     Y-Axis: Semantic Namespace (Topic)
+
+    Args:
+        g: The igraph object.
+        seed: Seed of the jitter; the same graph and seed give the same layout.
+        cache_dir: If set, layouts are stored there keyed by the graph
+            fingerprint and seed, and reused on the next call.
+        x_axis: "topological" (topological order, scaled by index^0.72) or
+            "depth" (longest-path depth on the SCC condensation). Graphs with
+            cycles always use "depth", since they have no topological order.
     """
-    print("   [Layout] Computing Topological Sort (X-Axis)...")
-    try:
+    if x_axis not in X_AXIS_MODES:
+        raise ValueError(f"Unknown x_axis {x_axis!r}, expected one of {X_AXIS_MODES}")
+    node_names = g.vs["name"]
+
+    cache_path = None
+    if cache_dir is not None:
+        key = f"{graph_fingerprint(g)}-s{seed}-{x_axis}-v{LAYOUT_VERSION}"
+        cache_path = os.path.join(cache_dir, f"layout-{key}.npz")
+        if os.path.exists(cache_path):
+            print("   [Layout] Loaded cached layout.")
+            with np.load(cache_path, allow_pickle=False) as cached:
+                return pd.DataFrame({
+                    'x': cached["x"],
+                    'y': cached["y"],
+                    'namespace': pd.Categorical.from_codes(cached["ns_codes"], cached["unique_ns"]),
+                    'name': node_names
+                })
+
+    rng = np.random.default_rng(seed)
+    if x_axis == "topological" and not g.is_dag():
+        print("   [Warning] Graph has cycles (not a DAG). Using SCC condensation depth for the X-axis.")
+        x_axis = "depth"
+
+    if x_axis == "depth":
+        print("   [Layout] Computing Condensation Depth (X-Axis)...")
+        x_coords = depth_x_coords(g, rng)
+    else:
+        print("   [Layout] Computing Topological Sort (X-Axis)...")
         # Topological sort gives a linear ordering of dependencies
         # This is O(V+E), very fast for 200k nodes
-        topo_indices = g.topological_sorting(mode='out')
+        topo_indices = np.asarray(g.topological_sorting(mode='out'), dtype=np.int64)
         
-        # Create a mapping from node_index -> topo_order
-        # We perform a reverse lookup to get the X coordinate for every node
-        x_map = np.zeros(g.vcount())
-        for rank, node_idx in enumerate(topo_indices):
-            x_map[node_idx] = rank
-            
+        # Invert the permutation (node_index -> topo_order) to get the
+        # X coordinate for every node
+        x_map = np.argsort(topo_indices).astype(float)
+
         # Apply the Mathlib Explorer scaling factor: index^0.72
         # This compresses the tail end of the graph
         x_coords = np.power(x_map, 0.72)
-        
-    except ig.InternalError:
-        print("   [Warning] Graph has cycles (not a DAG). Fallback to Degree-based X-axis.")
-        x_coords = np.array(g.degree(mode='out'), dtype=float)
 
     print("   [Layout] Computing Namespace Grouping (Y-Axis)...")
-    # Extract namespaces
-    node_names = g.vs["name"]
-    namespaces = [get_namespace(name) for name in node_names]
-    
-    # Create unique integer ID for each namespace for Y-positioning
-    unique_ns = sorted(list(set(namespaces)))
-    ns_to_y = {ns: i * 100.0 for i, ns in enumerate(unique_ns)}
+    # Extract namespaces and give each a sorted integer code for Y-positioning
+    unique_ns, ns_codes = np.unique(get_namespaces(g), return_inverse=True)
     
     # Calculate base Y coordinates
-    base_y = np.array([ns_to_y[ns] for ns in namespaces])
+    base_y = ns_codes * 100.0
     
     # Anti-Collision / Jittering
     # We add random noise to Y to prevent nodes in the same namespace 
     # from forming a flat line.
     # For a prettier "cloud" look, we can sine-wave the jitter based on X
-    y_jitter = np.sin(x_coords * 0.1) * 30 + np.random.normal(0, 15, g.vcount())
+    y_jitter = np.sin(x_coords * 0.1) * 30 + rng.normal(0, 15, g.vcount())
     y_coords = base_y + y_jitter
 
+    if cache_path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.tmp.npz"
+        np.savez(tmp_path, x=x_coords, y=y_coords, ns_codes=ns_codes, unique_ns=unique_ns)
+        os.replace(tmp_path, cache_path)
+
     return pd.DataFrame({
         'x': x_coords,
         'y': y_coords,
-        'namespace': namespaces,
+        'namespace': pd.Categorical.from_codes(ns_codes, unique_ns),
         'name': node_names
     })
 
 def plot_graph(
-    g: ig.Graph, 
-    centrality_func: Callable[[ig.Graph], Dict[int, float]] = default_centrality,
+    g: Union[ig.Graph, SubgraphView],
+    centrality_func: Callable[[ig.Graph], Union[Dict[int, float], np.ndarray]] = default_centrality,
     output_file: str = "lean_atlas.html",
-    dark_mode: bool = True
+    dark_mode: bool = True,
+    code_store: Optional[CodeStore] = None,
+    seed: int = 0,
+    layout_cache_dir: Optional[str] = None,
+    x_axis: str = "topological",
+    open_browser: bool = True,
+    mode: str = "full",
+    top_k: int = 20_000,
+    aggregate: str = "bins",
+    lod_grid: Optional[Tuple[int, int]] = None,
+    show_edges: bool = False,
+    max_edges: int = 20_000,
+    edge_sample: str = "top",
+    max_bundles: int = 300,
+    max_zoom: Optional[int] = None,
+    workers: int = 1,
 ):
     """
     Generates an interactive WebGL plot of the graph.
     
     Args:
-        g: The igraph object.
-        centrality_func: Function accepting g and returning {node_index: score}.
+        g: The igraph object, or a `views.SubgraphView` (materialized with
+            every attribute; `code_store` is then read through the view).
+        centrality_func: Function accepting g and returning {node_index: score},
+            or an array of scores indexed by vertex id (e.g. `metrics.engine.metric_func`).
         output_file: Path to save the HTML.
         dark_mode: Whether to use the specific Mathlib Explorer dark theme.
+        code_store: Optional sidecar store (e.g. `GraphGenerator.code_store()`).
+            When given, a code snippet is read per vertex id and shown on hover.
+        seed: Seed of the layout jitter, for reproducible plots.
+        layout_cache_dir: Directory where layouts are cached by graph
+            fingerprint, so replotting the same graph skips the layout.
+        x_axis: X-axis mode of the layout, see `compute_mathlib_layout`.
+        open_browser: Open the written HTML in the default browser.
+        mode: "full" draws every node. "lod" (level of detail) keeps the HTML
+            size bounded at any graph size: nodes are pre-aggregated into
+            bins or a density raster, and only the `top_k` best-ranked nodes
+            are drawn individually (see `utils.plot_lod`). "tiles" renders a
+            zoomable pyramid of PNG tiles into `<output_file stem>_tiles/`
+            and writes a static viewer page to `output_file`, for graphs too
+            large for any interactive HTML (see `utils.plot_tiles`).
+        top_k: Individual points in "lod" mode.
+        aggregate: Zoomed-out layer of "lod" mode, "bins" (namespace x depth
+            cells) or "raster" (density heatmap).
+        lod_grid: (columns, rows) of the aggregation grid in "lod" mode.
+        show_edges: Draw dependency edges beneath the nodes: namespace-to-
+            namespace bundles plus a sample of individual edges (see
+            `utils.plot_edges`). In "lod" mode individual edges are limited
+            to the `top_k` drawn nodes. Not available in "tiles" mode.
+        max_edges: Individual edges drawn.
+        edge_sample: "top" (edges between the highest-ranked nodes) or "random".
+        max_bundles: Heaviest namespace bundles drawn.
+        max_zoom: Deepest zoom level of "tiles" mode (default: by graph size).
+        workers: Processes rendering tiles in "tiles" mode.
     """
+    if mode not in PLOT_MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {PLOT_MODES}")
+    if isinstance(g, SubgraphView):
+        if code_store is not None:
+            code_store = g.code_store(code_store)
+        g = g.materialize()
     print(f"🚀 Starting Plot Generation for {g.vcount()} nodes...")
 
     # 1. Calculate Layout
-    layout_df = compute_mathlib_layout(g)
+    layout_df = compute_mathlib_layout(g, seed=seed, cache_dir=layout_cache_dir, x_axis=x_axis)
     
     # 2. Calculate Size (Centrality)
     print("   [Metrics] Calculating Centrality...")
     centrality_scores = centrality_func(g)
     # Normalize size: min 2px, max 20px
-    scores = np.array([centrality_scores.get(i, 0) for i in range(g.vcount())])
+    if isinstance(centrality_scores, dict):
+        scores = np.array([centrality_scores.get(i, 0) for i in range(g.vcount())])
+    else:
+        scores = np.asarray(centrality_scores, dtype=float)
     min_s, max_s = scores.min(), scores.max()
     # Log-scale normalization is usually better for power-law graphs like Mathlib
     sizes = 3 + 15 * (scores - min_s) / (max_s - min_s + 1e-9)
 
+    edges = []
+    if show_edges and mode != "tiles":
+        print("   [Render] Bundling & sampling edges...")
+        visible = None
+        if mode == "lod":
+            visible = np.zeros(g.vcount(), dtype=bool)
+            visible[top_ranked(scores, top_k)] = True
+        edges = edge_traces(
+            g, layout_df, scores, max_edges=max_edges, sample=edge_sample,
+            max_bundles=max_bundles, visible=visible, dark_mode=dark_mode, seed=seed,
+        )
+
+    if mode == "lod":
+        print(f"   [Render] Aggregating (LOD: {aggregate}, top {min(top_k, g.vcount())} points)...")
+        traces = lod_traces(
+            layout_df, scores, top_k=top_k, aggregate=aggregate, grid=lod_grid,
+            colorscale='Viridis' if dark_mode else 'Turbo',
+            code_store=code_store, hover_chars=HOVER_CODE_CHARS,
+        )
+        # Aggregate layer, then edges, then the individual points on top
+        traces = traces[:1] + edges + traces[1:]
+        print(f"   [Output] Saving to {output_file}...")
+        size = write_lod_html(traces, _atlas_layout(g.vcount(), dark_mode), output_file)
+        print(f"   [Output] {size / 2**20:.1f} MB written.")
+    elif mode == "tiles":
+        tiles_dir = f"{os.path.splitext(output_file)[0]}_tiles"
+        print(f"   [Render] Rasterizing tiles into {tiles_dir} ({workers} workers)...")
+        pyramid = write_tile_pyramid(
+            layout_df, scores, sizes, tiles_dir, max_zoom=max_zoom,
+            colorscale='Viridis' if dark_mode else 'Turbo', workers=workers,
+        )
+        print(f"   [Output] {len(pyramid.tiles)} tiles over {pyramid.max_zoom + 1} zoom levels, viewer {output_file}...")
+        write_tile_viewer(pyramid, output_file, f"Lean Mathlib Atlas ({g.vcount()} nodes)", dark_mode)
+    else:
+        _write_full_html(layout_df, sizes, dark_mode, code_store, output_file, edges)
+
+    # 6. Open
+    abs_path = os.path.abspath(output_file)
+    if not open_browser:
+        print(f"✅ Done! Saved {abs_path}")
+        return
+    print(f"✅ Done! Opening {abs_path}")
+    webbrowser.open(f"file://{abs_path}")
+
+def _atlas_layout(n_nodes: int, dark_mode: bool) -> go.Layout:
+    """The "Mathlib Explorer" look, shared by every rendering mode."""
+    return go.Layout(
+        title=f"Lean Mathlib Atlas ({n_nodes} nodes)",
+        template="plotly_dark" if dark_mode else "plotly_white",
+        xaxis=dict(
+            title="Complexity (Topological Depth)",
+            showgrid=False,
+            zeroline=False,
+            showticklabels=False
+        ),
+        yaxis=dict(
+            title="Namespace / Topic",
+            showgrid=False,
+            zeroline=False,
+            showticklabels=False
+        ),
+        hovermode='closest',
+        dragmode='pan', # Default to Panning (like Google Maps)
+        width=1600,
+        height=1000,
+        margin=dict(l=0, r=0, t=30, b=0)
+    )
+
+
+def _write_full_html(
+    layout_df: pd.DataFrame,
+    sizes: np.ndarray,
+    dark_mode: bool,
+    code_store: Optional[CodeStore],
+    output_file: str,
+    edges: Sequence[Dict[str, Any]] = (),
+) -> None:
+    """Every node as one point of a single WebGL trace, above optional edge traces."""
     # 3. Assign Colors (Categorical based on Namespace)
     # We use a hash map to ensure the same namespace always gets the same color
     unique_ns = layout_df['namespace'].unique()
@@ -119,6 +329,18 @@ def plot_graph(
     # 4. Render with Plotly WebGL
     print("   [Render] Building WebGL Trace...")
     
+    # Hover text: namespace, plus a code snippet read lazily from the sidecar
+    if code_store is not None:
+        snippets = [
+            code[:HOVER_CODE_CHARS].replace("\n", "<br>")
+            for code in code_store.get_many(range(len(layout_df)))
+        ]
+        customdata = np.column_stack([layout_df['namespace'], snippets])
+        hovertemplate = "<b>%{text}</b><br>Topic: %{customdata[0]}<br><br>%{customdata[1]}<extra></extra>"
+    else:
+        customdata = layout_df['namespace']
+        hovertemplate = "<b>%{text}</b><br>Topic: %{customdata}<extra></extra>"
+
     # We use Scattergl for performance with 200k+ points
     trace = go.Scattergl(
         x=layout_df['x'],
@@ -133,42 +355,14 @@ def plot_graph(
             line=dict(width=0) # No border improves performance at scale
         ),
         text=layout_df['name'], # Hover text
-        hovertemplate="<b>%{text}</b><br>Topic: %{customdata}<extra></extra>",
-        customdata=layout_df['namespace']
-    )
-
-    # 5. Configure Layout (The "Mathlib Explorer" Look)
-    layout = go.Layout(
-        title=f"Lean Mathlib Atlas ({g.vcount()} nodes)",
-        template="plotly_dark" if dark_mode else "plotly_white",
-        xaxis=dict(
-            title="Complexity (Topological Depth)",
-            showgrid=False,
-            zeroline=False,
-            showticklabels=False
-        ),
-        yaxis=dict(
-            title="Namespace / Topic",
-            showgrid=False,
-            zeroline=False,
-            showticklabels=False
-        ),
-        hovermode='closest',
-        dragmode='pan', # Default to Panning (like Google Maps)
-        width=1600,
-        height=1000,
-        margin=dict(l=0, r=0, t=30, b=0)
+        hovertemplate=hovertemplate,
+        customdata=customdata
     )
 
-    fig = go.Figure(data=[trace], layout=layout)
+    fig = go.Figure(data=[*edges, trace], layout=_atlas_layout(len(layout_df), dark_mode))
 
-    # 6. Save and Open
     print(f"   [Output] Saving to {output_file}...")
     fig.write_html(output_file)
-    
-    abs_path = os.path.abspath(output_file)
-    print(f"✅ Done! Opening {abs_path}")
-    webbrowser.open(f"file://{abs_path}")
 
 # ==========================================
 # Example Usage
@@ -0,0 +1,294 @@
+"""
+Level-of-Detail Plotting Module.
+
+Renders the Mathlib atlas with an output size that does not grow with the
+graph. The zoomed-out picture is pre-aggregated into a bounded number of
+cells: either namespace/depth bins (one marker per occupied cell, sized by
+its node count and colored by its dominant namespace) or a density raster.
+Only the `top_k` highest-ranked nodes are drawn as individual points. All
+numeric arrays are embedded as base64 typed arrays (`{"dtype": "f4",
+"bdata": ...}`, understood by plotly.js >= 2.28) instead of JSON number lists.
+
+Used by `plot_graph(..., mode="lod")`.
+"""
+
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from lean_graph_analyser.cache.code_store import CodeStore
+
+# Zoomed-out aggregations
+LOD_AGGREGATES = ("bins", "raster")
+
+# plotly.js releases that understand typed-array payloads
+_TYPED_ARRAY_PLOTLYJS = (2, 28)
+_PLOTLYJS_CDN = "https://cdn.plot.ly/plotly-2.35.2.min.js"
+
+
+def typed_array(values: Any, dtype: str = "f4", shape: Optional[Tuple[int, ...]] = None) -> Dict[str, str]:
+    """
+    Base64 typed-array payload of plotly.js.
+
+    Args:
+        values: Array-like of numbers.
+        dtype: plotly.js dtype code ("f4", "f8", "i4", "u2", "u1", ...).
+        shape: For 2-D data (heatmap z), the array shape.
+    """
+    array = np.ascontiguousarray(np.asarray(values).astype(np.dtype(dtype).newbyteorder("<"), copy=False))
+    payload = {"dtype": dtype, "bdata": base64.b64encode(array.tobytes()).decode("ascii")}
+    if shape is not None:
+        payload["shape"] = ",".join(map(str, shape))
+    return payload
+
+
+def _encode_json(value: Any) -> Any:
+    """`json.dumps` fallback: NumPy arrays become typed arrays (floats as float32)."""
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == "f":
+            return typed_array(value, "f4")
+        if value.dtype.kind in "iub" and value.size and value.min() >= 0 and value.max() < 2**32:
+            return typed_array(value, "u4")
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def top_ranked(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the `top_k` highest scores, lowest first (so the best are drawn on top)."""
+    if top_k >= len(scores):
+        return np.argsort(scores, kind="stable")
+    top = np.argpartition(-scores, top_k - 1)[:top_k]
+    return top[np.argsort(scores[top], kind="stable")]
+
+
+def _quantize(values: np.ndarray, n_bins: int) -> np.ndarray:
+    low, high = float(values.min()), float(values.max())
+    scale = n_bins / (high - low) if high > low else 0.0
+    return np.minimum(((values - low) * scale).astype(np.int64), n_bins - 1)
+
+
+# ==========================================
+# Aggregations
+# ==========================================
+
+def aggregate_bins(layout_df: pd.DataFrame, grid: Tuple[int, int] = (200, 120)) -> pd.DataFrame:
+    """
+    Groups nodes into cells of a bounded grid.
+
+    Columns are `grid[0]` bins along X (depth / topological position). Rows
+    are the namespaces themselves when there are at most `grid[1]` of them,
+    otherwise `grid[1]` bands along Y.
+
+    Returns:
+        One row per occupied cell: centroid x/y, node count and the code of
+        its most frequent namespace.
+    """
+    nx, ny = grid
+    x = layout_df["x"].to_numpy(dtype=float)
+    y = layout_df["y"].to_numpy(dtype=float)
+    ns = np.asarray(layout_df["namespace"].cat.codes, dtype=np.int64)
+    n_ns = len(layout_df["namespace"].cat.categories)
+
+    if n_ns <= ny:
+        rows, n_rows = ns, n_ns
+    else:
+        rows, n_rows = _quantize(y, ny), ny
+    cells = rows * nx + _quantize(x, nx)
+
+    counts = np.bincount(cells, minlength=n_rows * nx)
+    occupied = np.flatnonzero(counts)
+    n = counts[occupied]
+    cx = np.bincount(cells, weights=x, minlength=len(counts))[occupied] / n
+    cy = np.bincount(cells, weights=y, minlength=len(counts))[occupied] / n
+
+    if n_ns <= ny:
+        dominant = occupied // nx
+    else:
+        # Longest run of (cell, namespace) keys within every cell
+        keys = np.sort(cells * n_ns + ns)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        run_keys = keys[starts]
+        run_lengths = np.diff(np.r_[starts, len(keys)])
+        best = np.lexsort((run_lengths, run_keys // n_ns))
+        last_of_cell = np.r_[(run_keys // n_ns)[best][1:] != (run_keys // n_ns)[best][:-1], True]
+        dominant = run_keys[best][last_of_cell] % n_ns
+
+    return pd.DataFrame({"x": cx, "y": cy, "count": n, "namespace_code": dominant})
+
+
+def density_raster(
+    x: np.ndarray, y: np.ndarray, grid: Tuple[int, int] = (400, 250)
+) -> Tuple[np.ndarray, Tuple[float, float], Tuple[float, float]]:
+    """
+    Node counts on a `grid[0]` x `grid[1]` raster.
+
+    Returns:
+        (z, (x0, dx), (y0, dy)): (rows, cols) float32 counts and the
+        position/size of the first cell along each axis.
+    """
+    nx, ny = grid
+    xb, yb = _quantize(x, nx), _quantize(y, ny)
+    z = np.bincount(yb * nx + xb, minlength=nx * ny).reshape(ny, nx).astype(np.float32)
+    dx = (x.max() - x.min()) / nx or 1.0
+    dy = (y.max() - y.min()) / ny or 1.0
+    return z, (float(x.min() + dx / 2), float(dx)), (float(y.min() + dy / 2), float(dy))
+
+
+# ==========================================
+# Figure
+# ==========================================
+
+def lod_traces(
+    layout_df: pd.DataFrame,
+    scores: np.ndarray,
+    top_k: int = 20_000,
+    aggregate: str = "bins",
+    grid: Optional[Tuple[int, int]] = None,
+    colorscale: str = "Viridis",
+    code_store: Optional[CodeStore] = None,
+    hover_chars: int = 300,
+) -> List[Dict[str, Any]]:
+    """
+    plotly.js trace specs of the LOD atlas: one aggregated layer plus the
+    `top_k` best-ranked nodes as individual points.
+
+    Args:
+        layout_df: Output of `compute_mathlib_layout`.
+        scores: Centrality of every node (ranks the individual points and sizes them).
+        top_k: Number of individual points.
+        aggregate: "bins" or "raster".
+        grid: Cells of the aggregation, (columns, rows).
+        colorscale: Colorscale of namespace codes.
+        code_store: If given, code snippets of the individual points (only
+            those) are shown on hover, cut to `hover_chars`.
+    """
+    if aggregate not in LOD_AGGREGATES:
+        raise ValueError(f"Unknown aggregate {aggregate!r}, expected one of {LOD_AGGREGATES}")
+    n_ns = len(layout_df["namespace"].cat.categories)
+    ns_codes = np.asarray(layout_df["namespace"].cat.codes)
+    # Same code -> color mapping in every trace
+    color_range = dict(cmin=0, cmax=max(n_ns - 1, 1), colorscale=colorscale, showscale=False)
+
+    traces: List[Dict[str, Any]] = []
+    if aggregate == "bins":
+        bins = aggregate_bins(layout_df, grid or (200, 120))
+        categories = np.asarray(layout_df["namespace"].cat.categories, dtype=object)
+        traces.append({
+            "type": "scattergl",
+            "mode": "markers",
+            "name": "aggregate",
+            "x": typed_array(bins["x"]),
+            "y": typed_array(bins["y"]),
+            "marker": dict(
+                size=typed_array(4 + 16 * np.sqrt(bins["count"] / bins["count"].max())),
+                color=typed_array(bins["namespace_code"], "u4"),
+                opacity=0.35,
+                line=dict(width=0),
+                **color_range,
+            ),
+            "customdata": typed_array(bins["count"], "u4"),
+            "text": categories[bins["namespace_code"].to_numpy()].tolist(),
+            "hovertemplate": "Topic: %{text}<br>Nodes: %{customdata}<extra></extra>",
+        })
+    else:
+        z, (x0, dx), (y0, dy) = density_raster(
+            layout_df["x"].to_numpy(dtype=float), layout_df["y"].to_numpy(dtype=float), grid or (400, 250)
+        )
+        traces.append({
+            "type": "heatmap",
+            "name": "aggregate",
+            "z": typed_array(np.log1p(z), shape=z.shape),
+            "x0": x0, "dx": dx, "y0": y0, "dy": dy,
+            "colorscale": "Greys",
+            "reversescale": True,
+            "showscale": False,
+            "opacity": 0.6,
+            "hoverinfo": "skip",
+            "zmin": 0,
+        })
+
+    top = top_ranked(scores, top_k)
+    min_s, max_s = scores.min(), scores.max()
+    sizes = 3 + 15 * (scores[top] - min_s) / (max_s - min_s + 1e-9)
+    names = layout_df["name"].to_numpy(dtype=object)[top]
+    point_namespaces = np.asarray(layout_df["namespace"], dtype=object)[top]
+    if code_store is not None:
+        snippets = [code[:hover_chars].replace("\n", "<br>") for code in code_store.get_many(top.tolist())]
+        customdata = [[ns, code] for ns, code in zip(point_namespaces.tolist(), snippets)]
+        hovertemplate = "<b>%{text}</b><br>Topic: %{customdata[0]}<br><br>%{customdata[1]}<extra></extra>"
+    else:
+        customdata = point_namespaces.tolist()
+        hovertemplate = "<b>%{text}</b><br>Topic: %{customdata}<extra></extra>"
+    traces.append({
+        "type": "scattergl",
+        "mode": "markers",
+        "name": f"top {len(top)}",
+        "x": typed_array(layout_df["x"].to_numpy()[top]),
+        "y": typed_array(layout_df["y"].to_numpy()[top]),
+        "marker": dict(
+            size=typed_array(sizes),
+            color=typed_array(ns_codes[top], "u4"),
+            opacity=0.8,
+            line=dict(width=0),
+            **color_range,
+        ),
+        "text": names.tolist(),
+        "customdata": customdata,
+        "hovertemplate": hovertemplate,
+    })
+    return traces
+
+
+def _plotlyjs_tag() -> str:
+    """Inline plotly.js when the bundled build reads typed arrays, else a pinned CDN build."""
+    from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+    version = tuple(int(part) for part in get_plotlyjs_version().split(".")[:2])
+    if version >= _TYPED_ARRAY_PLOTLYJS:
+        return f"<script type=\"text/javascript\">{get_plotlyjs()}</script>"
+    return f"<script src=\"{_PLOTLYJS_CDN}\"></script>"
+
+
+# Fades the aggregate layer out as the user zooms in on the individual points
+_ZOOM_SCRIPT = """
+const atlas = document.getElementById("atlas");
+const fullRange = atlas.layout.xaxis.range.slice();
+atlas.on("plotly_relayout", () => {
+    const range = atlas.layout.xaxis.range;
+    const zoom = (range[1] - range[0]) / (fullRange[1] - fullRange[0]);
+    const opacity = Math.max(0.08, Math.min(1, zoom)) * BASE_OPACITY;
+    const key = atlas.data[0].type === "heatmap" ? "opacity" : "marker.opacity";
+    Plotly.restyle(atlas, {[key]: opacity}, [0]);
+});
+"""
+
+
+def write_lod_html(traces: List[Dict[str, Any]], layout: go.Layout, output_file: str) -> int:
+    """
+    Writes a standalone HTML page for LOD traces. Traces may hold NumPy
+    arrays; they are embedded as typed arrays. The first trace is the
+    aggregate layer that fades on zoom.
+
+    Returns:
+        Size of the written file in bytes.
+    """
+    data = json.dumps(traces, separators=(",", ":"), default=_encode_json)
+    layout_json = json.dumps(layout.to_plotly_json(), separators=(",", ":"))
+    base_opacity = traces[0].get("opacity", traces[0].get("marker", {}).get("opacity", 1.0))
+    html = (
+        "<!DOCTYPE html>\n<html>\n<head><meta charset=\"utf-8\" />"
+        f"{_plotlyjs_tag()}</head>\n<body style=\"margin:0\">\n"
+        "<div id=\"atlas\" style=\"width:100%;height:100vh\"></div>\n<script type=\"text/javascript\">\n"
+        f"Plotly.newPlot(\"atlas\", {data}, {layout_json}, {{scrollZoom: true, responsive: true}}).then(() => {{\n"
+        f"const BASE_OPACITY = {base_opacity};\n{_ZOOM_SCRIPT}}});\n"
+        "</script>\n</body>\n</html>\n"
+    )
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(html)
+    return len(html.encode("utf-8"))
@@ -0,0 +1,388 @@
+"""
+Tiled Atlas Export Module.
+
+For graphs too large for any interactive HTML, the `compute_mathlib_layout`
+point cloud is rasterized into a zoomable pyramid of 256 x 256 PNG tiles
+(`<dir>/<zoom>/<column>/<row>.png`, the usual web-map scheme) plus a small
+static viewer page, so a million-node atlas can be published as plain files.
+
+Rasterization is datashader-style: every point is splatted as a disk whose
+radius follows its plot size (shrinking on coarser levels), and each pixel
+takes the color of its highest-ranked point, with an alpha that grows with
+the number of points piled on it. Everything is vectorized NumPy, and PNGs
+are encoded with zlib directly, so no imaging library is needed.
+
+Tiles are rendered in parallel, one task per (zoom, tile column). Points are
+sorted by x once, so a column is a contiguous slice; splats are processed in
+bounded chunks, so worker memory depends on the column, not the graph.
+Empty tiles are not written.
+
+Used by `plot_graph(..., mode="tiles")`.
+"""
+
+import json
+import os
+import struct
+import zlib
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from plotly.colors import sample_colorscale
+
+from lean_graph_analyser.utils.parallel import pool_context
+
+TILE_SIZE = 256
+
+# Largest splat radius in pixels (the biggest nodes at the deepest zoom)
+MAX_RADIUS = 9
+
+# Points piled on one pixel before it is fully opaque
+ALPHA_SATURATION = 64
+
+# Pixel writes buffered at once while splatting
+MAX_SPLATS = 1 << 22
+
+# Padding around the point cloud, as a fraction of each axis
+_PADDING = 0.02
+
+
+class TilePyramid(NamedTuple):
+    """A written tile pyramid."""
+    directory: str
+    max_zoom: int
+    tiles: List[str]    # "zoom/column/row" of every written (non-empty) tile
+    n_points: int
+
+
+def png_bytes(rgba: np.ndarray) -> bytes:
+    """Encodes an (h, w, 4) uint8 RGBA image as PNG."""
+    h, w, _ = rgba.shape
+    raw = np.zeros((h, w * 4 + 1), dtype=np.uint8)  # Filter byte 0 (None) per row
+    raw[:, 1:] = rgba.reshape(h, w * 4)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 6, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def namespace_palette(n_namespaces: int, colorscale: str) -> np.ndarray:
+    """(n, 3) uint8 colors of namespace codes, as plotly maps them onto `colorscale`."""
+    positions = np.linspace(0.0, 1.0, n_namespaces) if n_namespaces > 1 else [0.0]
+    colors = sample_colorscale(colorscale, list(positions), colortype="tuple")
+    return np.clip(np.round(np.asarray(colors) * 255), 0, 255).astype(np.uint8).reshape(-1, 3)
+
+
+def auto_max_zoom(n_points: int) -> int:
+    """Deepest zoom level: about 8 pixels per point along each axis, between 2 and 10."""
+    side = 8 * np.sqrt(max(n_points, 1))
+    return int(np.clip(np.ceil(np.log2(side / TILE_SIZE)), 2, 10))
+
+
+@lru_cache(maxsize=None)
+def _disk_offsets(radius: int) -> np.ndarray:
+    """(k, 2) pixel offsets of a disk of `radius` (radius 0 is one pixel)."""
+    d = np.arange(-radius, radius + 1)
+    dx, dy = np.meshgrid(d, d)
+    inside = dx * dx + dy * dy <= radius * radius + radius
+    return np.column_stack([dx[inside], dy[inside]])
+
+
+# ==========================================
+# Rasterization
+# ==========================================
+
+def render_tile(
+    px: np.ndarray,
+    py: np.ndarray,
+    radius: np.ndarray,
+    score: np.ndarray,
+    color: np.ndarray,
+    palette: np.ndarray,
+    tile_size: int = TILE_SIZE,
+) -> Optional[np.ndarray]:
+    """
+    Rasterizes points into one RGBA tile.
+
+    Args:
+        px, py: Pixel coordinates inside the tile (points of the margin may
+            lie outside; only their in-tile pixels are drawn).
+        radius: Integer splat radius of every point.
+        score: Ranking; the best point of a pixel gives its color.
+        color: Palette index of every point.
+        palette: (n, 3) uint8 colors.
+
+    Returns:
+        (tile_size, tile_size, 4) uint8 image, or None if nothing was drawn.
+    """
+    n_pixels = tile_size * tile_size
+    count = np.zeros(n_pixels, dtype=np.int64)
+    best = np.full(n_pixels, -np.inf)
+    best_color = np.zeros(n_pixels, dtype=np.int64)
+    ix0 = np.floor(px).astype(np.int64)
+    iy0 = np.floor(py).astype(np.int64)
+
+    for r in np.unique(radius).tolist():
+        members = np.flatnonzero(radius == r)
+        offsets = _disk_offsets(r)
+        step = max(1, MAX_SPLATS // len(offsets))
+        for start in range(0, len(members), step):
+            chunk = members[start:start + step]
+            ix = (ix0[chunk, None] + offsets[:, 0]).ravel()
+            iy = (iy0[chunk, None] + offsets[:, 1]).ravel()
+            inside = (ix >= 0) & (ix < tile_size) & (iy >= 0) & (iy < tile_size)
+            pixel = (iy * tile_size + ix)[inside]
+            if not len(pixel):
+                continue
+            owner = np.repeat(chunk, len(offsets))[inside]
+            count += np.bincount(pixel, minlength=n_pixels)
+            # Best point per pixel of this chunk, then merge with earlier chunks
+            order = np.lexsort((score[owner], pixel))
+            pixel, owner = pixel[order], owner[order]
+            last = np.r_[pixel[1:] != pixel[:-1], True]
+            pixel, owner = pixel[last], owner[last]
+            better = score[owner] > best[pixel]
+            best[pixel[better]] = score[owner[better]]
+            best_color[pixel[better]] = color[owner[better]]
+
+    drawn = count > 0
+    if not drawn.any():
+        return None
+    rgba = np.zeros((n_pixels, 4), dtype=np.uint8)
+    rgba[drawn, :3] = palette[best_color[drawn]]
+    density = np.minimum(1.0, np.log1p(count[drawn]) / np.log1p(ALPHA_SATURATION))
+    rgba[drawn, 3] = np.round(255 * (0.5 + 0.5 * density)).astype(np.uint8)
+    return rgba.reshape(tile_size, tile_size, 4)
+
+
+class _Points(NamedTuple):
+    """The point cloud in world coordinates (unit square, y down), sorted by x."""
+    x: np.ndarray
+    y: np.ndarray
+    radius: np.ndarray  # Splat radius at the deepest zoom (float)
+    score: np.ndarray
+    color: np.ndarray
+    palette: np.ndarray
+
+
+# Worker-side state, installed by `_init_worker` (inherited under fork)
+_worker_points: Optional[_Points] = None
+_worker_directory: str = ""
+_worker_max_zoom: int = 0
+
+
+def _init_worker(points: _Points, directory: str, max_zoom: int) -> None:
+    global _worker_points, _worker_directory, _worker_max_zoom
+    _worker_points = points
+    _worker_directory = directory
+    _worker_max_zoom = max_zoom
+
+
+def _render_column(task: Tuple[int, int]) -> List[str]:
+    """Renders and writes every non-empty tile of one column of one zoom level."""
+    zoom, column = task
+    p = _worker_points
+    n_tiles = 2 ** zoom
+    world_pixels = TILE_SIZE * n_tiles
+    level_radius = np.minimum(np.round(p.radius * 2.0 ** (zoom - _worker_max_zoom)), MAX_RADIUS)
+    margin = (MAX_RADIUS + 1) / world_pixels
+
+    lo, hi = np.searchsorted(p.x, [column / n_tiles - margin, (column + 1) / n_tiles + margin])
+    if lo == hi:
+        return []
+    by_y = lo + np.argsort(p.y[lo:hi], kind="stable")
+    ys = p.y[by_y]
+
+    written = []
+    for row in range(n_tiles):
+        start, stop = np.searchsorted(ys, [row / n_tiles - margin, (row + 1) / n_tiles + margin])
+        if start == stop:
+            continue
+        idx = by_y[start:stop]
+        tile = render_tile(
+            p.x[idx] * world_pixels - column * TILE_SIZE,
+            p.y[idx] * world_pixels - row * TILE_SIZE,
+            level_radius[idx].astype(np.int64),
+            p.score[idx],
+            p.color[idx],
+            p.palette,
+        )
+        if tile is None:
+            continue
+        column_dir = os.path.join(_worker_directory, str(zoom), str(column))
+        os.makedirs(column_dir, exist_ok=True)
+        with open(os.path.join(column_dir, f"{row}.png"), "wb") as f:
+            f.write(png_bytes(tile))
+        written.append(f"{zoom}/{column}/{row}")
+    return written
+
+
+def _normalize(values: np.ndarray) -> np.ndarray:
+    low, high = float(values.min()), float(values.max())
+    span = (high - low) or 1.0
+    return (_PADDING + (1 - 2 * _PADDING) * (values - low) / span) if len(values) else values
+
+
+def write_tile_pyramid(
+    layout_df: pd.DataFrame,
+    scores: np.ndarray,
+    sizes: np.ndarray,
+    directory: str,
+    max_zoom: Optional[int] = None,
+    colorscale: str = "Viridis",
+    workers: int = 1,
+) -> TilePyramid:
+    """
+    Rasterizes the layout into a PNG tile pyramid.
+
+    Args:
+        layout_df: Output of `compute_mathlib_layout`.
+        scores: Node centrality; decides which point colors a shared pixel.
+        sizes: Marker diameter in pixels at the deepest zoom.
+        directory: Output directory (`<zoom>/<column>/<row>.png`).
+        max_zoom: Deepest zoom level (level z has 2^z x 2^z tiles); by
+            default `auto_max_zoom`.
+        colorscale: Plotly colorscale of the namespace colors.
+        workers: Processes rendering tile columns.
+    """
+    n = len(layout_df)
+    max_zoom = auto_max_zoom(n) if max_zoom is None else max_zoom
+    x = _normalize(layout_df["x"].to_numpy(dtype=float))
+    # Tile rows count downwards: the top namespace is row 0
+    y = 1.0 - _normalize(layout_df["y"].to_numpy(dtype=float))
+    order = np.argsort(x, kind="stable")
+    codes = np.asarray(layout_df["namespace"].cat.codes, dtype=np.int64)
+    points = _Points(
+        x=x[order],
+        y=y[order],
+        radius=np.asarray(sizes, dtype=float)[order] / 2,
+        score=np.asarray(scores, dtype=float)[order],
+        color=codes[order],
+        palette=namespace_palette(len(layout_df["namespace"].cat.categories), colorscale),
+    )
+    os.makedirs(directory, exist_ok=True)
+
+    # Deepest (most numerous) levels first, so the pool drains evenly
+    tasks = [(z, c) for z in range(max_zoom, -1, -1) for c in range(2 ** z)]
+    if workers > 1:
+        with pool_context().Pool(
+            processes=workers, initializer=_init_worker, initargs=(points, directory, max_zoom)
+        ) as pool:
+            columns = list(pool.imap_unordered(_render_column, tasks))
+    else:
+        _init_worker(points, directory, max_zoom)
+        columns = [_render_column(task) for task in tasks]
+    tiles = sorted(tile for column in columns for tile in column)
+    return TilePyramid(directory, max_zoom, tiles, n)
+
+
+# ==========================================
+# Viewer
+# ==========================================
+
+# Pan (drag) and zoom (wheel) over the pyramid; the world is the unit square
+_VIEWER_SCRIPT = """
+const view = document.getElementById("atlas");
+const available = new Set(ATLAS.tiles);
+const shown = new Map();
+let scale = Math.min(innerWidth, innerHeight), cx = 0.5, cy = 0.5;
+const maxScale = ATLAS.tileSize * 2 ** ATLAS.maxZoom * 4;
+
+function render() {
+    const z = Math.max(0, Math.min(ATLAS.maxZoom, Math.ceil(Math.log2(scale / ATLAS.tileSize))));
+    const n = 2 ** z, size = scale / n;
+    const left = innerWidth / 2 - cx * scale, top = innerHeight / 2 - cy * scale;
+    const x0 = Math.max(0, Math.floor(-left / size)), x1 = Math.min(n - 1, Math.floor((innerWidth - left) / size));
+    const y0 = Math.max(0, Math.floor(-top / size)), y1 = Math.min(n - 1, Math.floor((innerHeight - top) / size));
+    const wanted = new Set();
+    for (let x = x0; x <= x1; x++) {
+        for (let y = y0; y <= y1; y++) {
+            const key = `${z}/${x}/${y}`;
+            if (!available.has(key)) continue;
+            wanted.add(key);
+            let img = shown.get(key);
+            if (!img) {
+                img = new Image();
+                img.draggable = false;
+                img.src = `${ATLAS.root}/${key}.png`;
+                view.appendChild(img);
+                shown.set(key, img);
+            }
+            img.style.left = `${left + x * size}px`;
+            img.style.top = `${top + y * size}px`;
+            img.style.width = img.style.height = `${size}px`;
+        }
+    }
+    for (const [key, img] of shown) {
+        if (!wanted.has(key)) { img.remove(); shown.delete(key); }
+    }
+}
+
+view.addEventListener("wheel", (e) => {
+    e.preventDefault();
+    const dx = e.clientX - innerWidth / 2, dy = e.clientY - innerHeight / 2;
+    const wx = cx + dx / scale, wy = cy + dy / scale;
+    scale = Math.max(ATLAS.tileSize / 2, Math.min(maxScale, scale * Math.exp(-e.deltaY * 0.0015)));
+    cx = wx - dx / scale;
+    cy = wy - dy / scale;
+    render();
+}, {passive: false});
+
+let drag = null;
+view.addEventListener("pointerdown", (e) => {
+    drag = [e.clientX, e.clientY];
+    view.setPointerCapture(e.pointerId);
+    view.style.cursor = "grabbing";
+});
+view.addEventListener("pointermove", (e) => {
+    if (!drag) return;
+    cx -= (e.clientX - drag[0]) / scale;
+    cy -= (e.clientY - drag[1]) / scale;
+    drag = [e.clientX, e.clientY];
+    render();
+});
+view.addEventListener("pointerup", () => { drag = null; view.style.cursor = "grab"; });
+addEventListener("resize", render);
+render();
+"""
+
+
+def write_tile_viewer(pyramid: TilePyramid, output_file: str, title: str, dark_mode: bool = True) -> None:
+    """
+    Writes a dependency-free HTML viewer for a tile pyramid.
+
+    The page refers to the tiles by relative path, so the viewer and the
+    tile directory can be published together on any static host.
+    """
+    root = os.path.relpath(pyramid.directory, os.path.dirname(os.path.abspath(output_file)))
+    atlas = {
+        "root": root.replace(os.sep, "/"),
+        "tileSize": TILE_SIZE,
+        "maxZoom": pyramid.max_zoom,
+        "tiles": pyramid.tiles,
+    }
+    # plotly_dark / plotly_white page colors
+    background, foreground = ("#111111", "#f2f5fa") if dark_mode else ("#ffffff", "#2a3f5f")
+    html = (
+        "<!DOCTYPE html>\n<html>\n<head><meta charset=\"utf-8\" />"
+        f"<title>{title}</title>\n<style>\n"
+        f"html, body {{ margin: 0; height: 100%; overflow: hidden; background: {background}; }}\n"
+        "#atlas { position: absolute; inset: 0; cursor: grab; touch-action: none; }\n"
+        "#atlas img { position: absolute; user-select: none; }\n"
+        f"#title {{ position: absolute; top: 8px; left: 12px; color: {foreground}; "
+        "font: 14px sans-serif; pointer-events: none; }\n"
+        "</style></head>\n<body>\n"
+        f"<div id=\"atlas\"></div><div id=\"title\">{title}</div>\n"
+        "<script type=\"text/javascript\">\n"
+        f"const ATLAS = {json.dumps(atlas, separators=(',', ':'))};\n{_VIEWER_SCRIPT}"
+        "</script>\n</body>\n</html>\n"
+    )
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(html)
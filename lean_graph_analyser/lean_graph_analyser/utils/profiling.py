@@ -0,0 +1,279 @@
+"""
+Build Profiling Module.
+
+Structured timing and memory figures for a graph build, so it is clear where
+the hours of a Mathlib build go:
+
+    - per phase (cache load, node extraction, edge extraction, add_edges,
+      save, ...): wall time, CPU time (including pool workers) and peak RSS;
+    - per traced file: extraction cost of both phases and edge counts;
+    - the slowest theorems in `get_premise_full_names`;
+    - counters of dropped premises (outside the graph, self-loops, errors).
+
+Per-file figures are gathered in `FileStats` objects by the extractors. They
+are small and picklable, so pool workers send them back with their batches.
+
+Example:
+    profiler = BuildProfiler()
+    with profiler.phase("node_extraction"):
+        ...
+    profiler.save("graphs/dependency_graph.profile.json")
+    profiler.notify(notifier)
+"""
+
+import heapq
+import json
+import os
+import re
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# Slowest theorems kept per file and per build
+DEFAULT_TOP_N = 20
+
+# Counters of premises that did not become edges
+DROP_COUNTERS = ("dropped_premises", "self_loops", "missing_sources", "errors")
+
+
+class FileStats:
+    """
+    Extraction counters of one traced file.
+
+    Args:
+        file_path: Path of the traced file.
+        top_n: Number of slowest theorems to remember.
+    """
+
+    __slots__ = (
+        "file_path", "top_n", "node_seconds", "n_nodes", "edge_seconds", "n_theorems",
+        "n_edges", "dropped_premises", "self_loops", "missing_sources", "errors", "slowest",
+    )
+
+    def __init__(self, file_path: str, top_n: int = DEFAULT_TOP_N):
+        self.file_path = file_path
+        self.top_n = top_n
+        self.node_seconds = 0.0
+        self.n_nodes = 0
+        self.edge_seconds = 0.0
+        self.n_theorems = 0
+        self.n_edges = 0
+        self.dropped_premises = 0
+        self.self_loops = 0
+        self.missing_sources = 0
+        self.errors = 0
+        # Min-heap of (seconds, theorem name): the root is the fastest kept
+        self.slowest: List[Tuple[float, str]] = []
+
+    def add_theorem(self, name: str, seconds: float) -> None:
+        """Records the premise-resolution time of one theorem."""
+        self.n_theorems += 1
+        if len(self.slowest) < self.top_n:
+            heapq.heappush(self.slowest, (seconds, name))
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (seconds, name))
+
+    def __getstate__(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
+
+class PhaseStats(NamedTuple):
+    """Cost of one build phase."""
+    name: str
+    wall_seconds: float
+    cpu_seconds: float      # This process plus pool workers that finished during the phase
+    peak_rss_mb: float      # Peak resident memory of this process during the phase
+    workers_peak_rss_mb: float  # Largest peak of any finished worker so far
+
+
+# ==========================================
+# Resource Probes
+# ==========================================
+
+_VM_HWM = re.compile(r"VmHWM:\s+(\d+)\s+kB")
+
+
+def _cpu_seconds() -> float:
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def _maxrss_mb(who: int) -> float:
+    # ru_maxrss is in kB on Linux and in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(who).ru_maxrss * scale / 2**20
+
+
+def _reset_peak_rss() -> bool:
+    """Resets the kernel's peak-RSS watermark (Linux only). Returns True on success."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            match = _VM_HWM.search(f.read())
+        if match:
+            return int(match.group(1)) / 1024
+    except OSError:
+        pass
+    return _maxrss_mb(resource.RUSAGE_SELF)
+
+
+# ==========================================
+# Profiler
+# ==========================================
+
+class BuildProfiler:
+    """
+    Collects phase costs and per-file extraction statistics of one build.
+
+    Args:
+        top_n: Number of slowest theorems and files kept in summaries.
+    """
+
+    def __init__(self, top_n: int = DEFAULT_TOP_N):
+        self.top_n = top_n
+        self.phases: List[PhaseStats] = []
+        self.files: Dict[str, FileStats] = {}
+        self._slowest: List[Tuple[float, str, str]] = []
+        # Without a resettable watermark, peaks are lifetime peaks
+        self._per_phase_peaks = sys.platform.startswith("linux")
+        self._open: List[float] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Times the enclosed block as one phase. Nested phases are allowed."""
+        if self._open:
+            # Nested phase: the enclosing one keeps its peak so far
+            self._open[-1] = max(self._open[-1], _peak_rss_mb())
+        if self._per_phase_peaks:
+            self._per_phase_peaks = _reset_peak_rss()
+        # Running peak of nested phases, which reset the watermark
+        self._open.append(0.0)
+        wall_start = time.perf_counter()
+        cpu_start = _cpu_seconds()
+        try:
+            yield
+        finally:
+            peak = max(_peak_rss_mb(), self._open.pop())
+            if self._open:
+                self._open[-1] = max(self._open[-1], peak)
+            self.phases.append(PhaseStats(
+                name=name,
+                wall_seconds=time.perf_counter() - wall_start,
+                cpu_seconds=_cpu_seconds() - cpu_start,
+                peak_rss_mb=peak,
+                workers_peak_rss_mb=_maxrss_mb(resource.RUSAGE_CHILDREN),
+            ))
+
+    def phase_seconds(self, name: str) -> float:
+        """Total wall time of every phase called `name`."""
+        return sum(p.wall_seconds for p in self.phases if p.name == name)
+
+    def add_file(self, stats: FileStats) -> None:
+        """Merges the statistics of one file (both phases may report separately)."""
+        merged = self.files.get(stats.file_path)
+        if merged is None:
+            merged = self.files[stats.file_path] = FileStats(stats.file_path, self.top_n)
+        merged.node_seconds += stats.node_seconds
+        merged.n_nodes += stats.n_nodes
+        merged.edge_seconds += stats.edge_seconds
+        merged.n_theorems += stats.n_theorems
+        merged.n_edges += stats.n_edges
+        for counter in DROP_COUNTERS:
+            setattr(merged, counter, getattr(merged, counter) + getattr(stats, counter))
+        for seconds, name in stats.slowest:
+            item = (seconds, name, stats.file_path)
+            if len(self._slowest) < self.top_n:
+                heapq.heappush(self._slowest, item)
+            elif seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, item)
+
+    # --- Reporting ---
+
+    def totals(self) -> Dict[str, int]:
+        totals = {key: 0 for key in ("n_nodes", "n_theorems", "n_edges") + DROP_COUNTERS}
+        for stats in self.files.values():
+            for key in totals:
+                totals[key] += getattr(stats, key)
+        return totals
+
+    def slowest_theorems(self) -> List[Dict[str, Any]]:
+        return [
+            {"theorem": name, "file_path": path, "seconds": seconds}
+            for seconds, name, path in sorted(self._slowest, reverse=True)
+        ]
+
+    def slowest_files(self, n: Optional[int] = None) -> List[FileStats]:
+        ranked = sorted(self.files.values(), key=lambda s: s.node_seconds + s.edge_seconds, reverse=True)
+        return ranked[: self.top_n if n is None else n]
+
+    def report(self) -> Dict[str, Any]:
+        """Everything collected, as a JSON-serializable dict."""
+        return {
+            "phases": [p._asdict() for p in self.phases],
+            "totals": self.totals(),
+            "slowest_theorems": self.slowest_theorems(),
+            "files": [
+                {
+                    "file_path": s.file_path,
+                    "node_seconds": s.node_seconds,
+                    "edge_seconds": s.edge_seconds,
+                    "n_nodes": s.n_nodes,
+                    "n_theorems": s.n_theorems,
+                    "n_edges": s.n_edges,
+                    **{counter: getattr(s, counter) for counter in DROP_COUNTERS},
+                }
+                for s in self.slowest_files(len(self.files))
+            ],
+        }
+
+    def save(self, path: str) -> None:
+        """Writes `report()` as JSON (atomically)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.report(), f, indent=1)
+        os.replace(tmp_path, path)
+
+    def summary(self, n: int = 5) -> str:
+        """Short human-readable digest: phases, drop counters, slowest files and theorems."""
+        lines = ["📊 Build profile:"]
+        for p in self.phases:
+            lines.append(
+                f"  {p.name}: {p.wall_seconds:.2f}s wall, {p.cpu_seconds:.2f}s CPU, "
+                f"peak RSS {p.peak_rss_mb:.0f} MB"
+            )
+        totals = self.totals()
+        if self.files:
+            lines.append(
+                f"  premises dropped: {totals['dropped_premises']} outside graph, "
+                f"{totals['self_loops']} self-loops, {totals['missing_sources']} theorems without a node, "
+                f"{totals['errors']} extraction errors"
+            )
+            lines.append("  slowest files:")
+            for s in self.slowest_files(n):
+                lines.append(f"    {s.node_seconds + s.edge_seconds:.2f}s `{s.file_path}` ({s.n_theorems} theorems)")
+        if self._slowest:
+            lines.append("  slowest theorems:")
+            for item in self.slowest_theorems()[:n]:
+                lines.append(f"    {item['seconds']:.3f}s `{item['theorem']}`")
+        return "\n".join(lines)
+
+    def notify(self, notifier, n: int = 5) -> None:
+        """Sends `summary()` through a Notifier."""
+        notifier.send(self.summary(n), important=True)
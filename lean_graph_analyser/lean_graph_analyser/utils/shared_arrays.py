@@ -0,0 +1,142 @@
+"""
+Shared Array Helpers.
+
+Packs a dict of numpy arrays into one `multiprocessing.shared_memory`
+segment, so several processes read the same physical pages: workers forked
+by a server, or an unrelated process (a notebook) attaching by segment name.
+
+Segment layout:
+    [8 bytes: header length][JSON header][arrays, each 64-byte aligned]
+
+The header holds the dtype, shape and offset of every array, plus a small
+JSON-able `meta` dict. Strings travel as categorical columns
+(`encode_strings`), read back one value at a time (`decode_string`) or
+whole (`decode_strings`).
+"""
+
+import json
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+_ALIGN = 64
+_HEADER_LENGTH_BYTES = 8
+
+# Segments created here (inherited under fork, like the resource tracker
+# they are registered with), until unlinked
+_created: Set[str] = set()
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+class SharedArrays:
+    """
+    Read-only arrays in one shared memory segment.
+
+    Create with `SharedArrays.create(arrays)` in the owning process (which
+    should `unlink()` it when done) and `SharedArrays.attach(name)` elsewhere.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+        self.shm = shm
+        self.arrays = arrays
+        self.meta = meta
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @classmethod
+    def create(cls, arrays: Dict[str, np.ndarray], meta: Optional[Dict[str, Any]] = None) -> "SharedArrays":
+        entries, offset = {}, 0
+        arrays = {key: np.ascontiguousarray(value) for key, value in arrays.items()}
+        for key, value in arrays.items():
+            entries[key] = {"dtype": value.dtype.str, "shape": list(value.shape), "offset": offset}
+            offset = _aligned(offset + value.nbytes)
+        header = json.dumps({"arrays": entries, "meta": meta or {}}).encode("utf-8")
+        data_start = _aligned(_HEADER_LENGTH_BYTES + len(header))
+
+        shm = shared_memory.SharedMemory(create=True, size=max(1, data_start + offset))
+        shm.buf[:_HEADER_LENGTH_BYTES] = len(header).to_bytes(_HEADER_LENGTH_BYTES, "little")
+        shm.buf[_HEADER_LENGTH_BYTES:_HEADER_LENGTH_BYTES + len(header)] = header
+        _created.add(shm.name)
+        views = cls._views(shm, entries, data_start)
+        for key, value in arrays.items():
+            views[key][...] = value
+            views[key].flags.writeable = False
+        return cls(shm, views, meta or {})
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedArrays":
+        shm = shared_memory.SharedMemory(name=name)
+        # Before Python 3.13 attaching registers the segment with this
+        # process's resource tracker, which would unlink it on exit. The
+        # creator's own registration must stay, or its `unlink()` fails.
+        if shm.name not in _created:
+            try:
+                resource_tracker.unregister(shm._name, "shared_memory")
+            except Exception:
+                pass
+        length = int.from_bytes(bytes(shm.buf[:_HEADER_LENGTH_BYTES]), "little")
+        header = json.loads(bytes(shm.buf[_HEADER_LENGTH_BYTES:_HEADER_LENGTH_BYTES + length]))
+        views = cls._views(shm, header["arrays"], _aligned(_HEADER_LENGTH_BYTES + length))
+        for view in views.values():
+            view.flags.writeable = False
+        return cls(shm, views, header["meta"])
+
+    @staticmethod
+    def _views(shm: shared_memory.SharedMemory, entries: Dict[str, Dict[str, Any]], data_start: int) -> Dict[str, np.ndarray]:
+        views = {}
+        for key, entry in entries.items():
+            dtype = np.dtype(entry["dtype"])
+            count = int(np.prod(entry["shape"], dtype=np.int64))
+            views[key] = np.ndarray(
+                entry["shape"], dtype=dtype, buffer=shm.buf, offset=data_start + entry["offset"]
+            ) if count else np.empty(entry["shape"], dtype=dtype)
+        return views
+
+    def close(self) -> None:
+        """Detaches this process (views become invalid)."""
+        self.arrays = {}
+        self.shm.close()
+
+    def unlink(self) -> None:
+        """Frees the segment once every process has detached (owner only)."""
+        self.close()
+        self.shm.unlink()
+        _created.discard(self.shm.name)
+
+
+def encode_strings(values: Sequence[Optional[str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Categorical encoding of a string column.
+
+    Returns:
+        (codes, blob, offsets): int32 code per value (-1 for None) into the
+        distinct values, which are `blob[offsets[i]:offsets[i + 1]]` (UTF-8).
+    """
+    ids: Dict[str, int] = {}
+    codes = np.fromiter(
+        (-1 if value is None else ids.setdefault(value, len(ids)) for value in values),
+        dtype=np.int32,
+        count=len(values),
+    )
+    encoded = [value.encode("utf-8") for value in ids]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return codes, np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def decode_string(blob: np.ndarray, offsets: np.ndarray, i: int) -> str:
+    """The `i`-th distinct value of a column encoded by `encode_strings`."""
+    return blob[offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+
+
+def decode_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """Distinct values of a column encoded by `encode_strings`."""
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)]
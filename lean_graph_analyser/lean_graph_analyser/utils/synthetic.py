@@ -0,0 +1,230 @@
+"""
+Synthetic Traced Repositories.
+
+Stand-ins for LeanDojo's `TracedRepo` / `TracedFile` that generate
+Mathlib-like declarations and premise lists of any size, for benchmarks and
+experiments without a multi-hour trace.
+
+They implement the part of the LeanDojo API `GraphGenerator` uses:
+`TracedRepo.name` / `.traced_files`, `TracedFile.path` / `.abs_path` /
+`.get_premise_definitions()` / `.get_traced_theorems()`, and
+`TracedTheorem.theorem.full_name` / `.get_premise_full_names()`.
+
+The shape roughly follows Mathlib:
+    - ~40 declarations per file, files grouped into areas and namespaces;
+    - ~70% theorems/lemmas (the traced ones), the rest defs, instances,
+      structures and inductives;
+    - a heavy-tailed number of premises per proof (mean ~8), mixing
+      foundational declarations (a power law favouring early ones), nearby
+      declarations of the same file or area, and names from Lean core that
+      are not in the graph.
+
+Files are generated on demand from (seed, file index), so even a 500k node
+repo costs almost nothing until it is traversed, and two traversals see the
+same content. Pool workers regenerate their files instead of receiving them.
+
+Example:
+    repo = make_synthetic_repo(100_000)
+    graph = GraphGenerator(repo, graph_location="bench/graph.graphml").generate()
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from lean_graph_analyser.utils.traced_stubs import StubTracedTheorem
+
+AREAS = (
+    "Algebra", "Analysis", "CategoryTheory", "Combinatorics", "Data", "GroupTheory",
+    "LinearAlgebra", "Logic", "MeasureTheory", "NumberTheory", "Order", "RingTheory",
+    "SetTheory", "Topology",
+)
+NAMESPACES = (
+    "Nat", "Int", "Rat", "Real", "Complex", "Finset", "Set", "List", "Multiset",
+    "Polynomial", "Submodule", "Subgroup", "Ideal", "Filter", "MeasureTheory",
+    "CategoryTheory", "Matrix", "LinearMap", "Function", "Equiv",
+)
+STEMS = (
+    "add", "mul", "sub", "div", "neg", "inv", "pow", "sum", "prod", "card", "map",
+    "comap", "image", "preimage", "le", "lt", "min", "max", "sup", "inf", "zero",
+    "one", "smul", "comp", "id", "mem", "subset", "union", "inter", "compl",
+)
+SUFFIXES = (
+    "comm", "assoc", "left", "right", "cancel", "self", "zero", "one", "iff",
+    "of_le", "of_lt", "mono", "injective", "surjective", "eq", "ne", "pos", "nonneg",
+)
+# Declarations of Lean core that proofs use but a Mathlib trace does not define
+CORE_NAMES = (
+    "Eq.refl", "Eq.symm", "Eq.trans", "Eq.mpr", "congrArg", "id", "rfl", "True.intro",
+    "And.intro", "Or.inl", "Or.inr", "Nat.succ", "Nat.rec", "propext", "funext",
+    "of_eq_true", "eq_self", "Classical.em", "absurd", "trivial",
+)
+KINDS = ("theorem", "lemma", "def", "instance", "structure", "inductive", "abbrev")
+KIND_WEIGHTS = (0.45, 0.25, 0.15, 0.08, 0.03, 0.02, 0.02)
+
+# Declarations per file: Mathlib files range from a handful to thousands
+MEAN_DECLS_PER_FILE = 40
+MEAN_PREMISES = 8
+
+
+class SyntheticTracedFile:
+    """
+    One synthetic Lean file: declarations [start, stop) of its repo.
+
+    Definitions and traced theorems are generated on every call (as LeanDojo
+    walks the AST on every call), deterministically.
+    """
+
+    def __init__(self, repo: "SyntheticTracedRepo", index: int, start: int, stop: int):
+        self.repo = repo
+        self.index = index
+        self.start = start
+        self.stop = stop
+        area = AREAS[index % len(AREAS)]
+        self.path = Path("Mathlib") / area / f"{NAMESPACES[index % len(NAMESPACES)]}{index}.lean"
+
+    @property
+    def abs_path(self) -> Path:
+        # Never exists: the manifest falls back to hashing the definitions
+        return self.repo.root_dir / self.path
+
+    def get_premise_definitions(self) -> List[Dict[str, Any]]:
+        repo = self.repo
+        premises = repo.file_premises(self.index)
+        definitions = []
+        line = 1
+        for i in range(self.start, self.stop):
+            name = repo.name_of(i)
+            kind = repo.kind_of(i)
+            code = repo.code_of(i, kind, name, premises.get(i, []))
+            n_lines = code.count("\n") + 1
+            definitions.append({
+                "full_name": name,
+                "code": code,
+                "start": [line, 1],
+                "end": [line + n_lines - 1, 1],
+                "kind": kind,
+            })
+            line += n_lines + 1
+        return definitions
+
+    def get_traced_theorems(self) -> List[StubTracedTheorem]:
+        repo = self.repo
+        return [
+            StubTracedTheorem(repo.name_of(i), premises)
+            for i, premises in repo.file_premises(self.index).items()
+        ]
+
+
+class SyntheticTracedRepo:
+    """
+    A Mathlib-like repository of `n_nodes` declarations.
+
+    Args:
+        n_nodes: Number of declarations (graph vertices).
+        seed: Seed of every random choice; equal seeds give equal repos.
+        name: Repository name.
+        root_dir: Pretend checkout directory (nothing is written there).
+        mean_premises: Mean number of premises per traced theorem.
+    """
+
+    def __init__(
+        self,
+        n_nodes: int,
+        seed: int = 0,
+        name: str = "synthetic-mathlib",
+        root_dir: str = "/nonexistent/synthetic-mathlib",
+        mean_premises: float = MEAN_PREMISES,
+    ):
+        self.n_nodes = n_nodes
+        self.seed = seed
+        self.name = name
+        self.root_dir = Path(root_dir)
+        self.mean_premises = mean_premises
+
+        rng = np.random.default_rng(seed)
+        # File sizes: geometric around the mean, so a few files are huge
+        sizes = rng.geometric(1 / MEAN_DECLS_PER_FILE, size=n_nodes // MEAN_DECLS_PER_FILE * 2 + 1)
+        bounds = np.concatenate([[0], np.cumsum(sizes)])
+        n_files = int(np.searchsorted(bounds, n_nodes))
+        bounds = np.minimum(bounds[: n_files + 1], n_nodes)
+        bounds[-1] = n_nodes
+        self.traced_files = [
+            SyntheticTracedFile(self, f, int(bounds[f]), int(bounds[f + 1])) for f in range(n_files)
+        ]
+        self._bounds = bounds
+        self._file_of = np.repeat(np.arange(n_files), np.diff(bounds))
+        self.kinds = rng.choice(len(KINDS), size=n_nodes, p=KIND_WEIGHTS).astype(np.int8)
+        # Names are formatted on every traversal; plain lists index fastest
+        stems = rng.integers(0, len(STEMS), size=(n_nodes, 2))
+        suffixes = rng.integers(0, len(SUFFIXES), size=n_nodes)
+        self._namespace_of = (self._file_of % len(NAMESPACES)).tolist()
+        self._stems = stems.tolist()
+        self._suffixes = suffixes.tolist()
+
+    def __len__(self) -> int:
+        return self.n_nodes
+
+    # --- Declarations ---
+
+    def name_of(self, i: int) -> str:
+        a, b = self._stems[i]
+        # The index keeps names unique, like Mathlib's primed variants
+        return f"{NAMESPACES[self._namespace_of[i]]}.{STEMS[a]}_{STEMS[b]}_{SUFFIXES[self._suffixes[i]]}_{i}"
+
+    def kind_of(self, i: int) -> str:
+        return KINDS[self.kinds[i]]
+
+    def code_of(self, i: int, kind: str, name: str, premises: List[str]) -> str:
+        short = name.rsplit(".", 1)[-1]
+        if self.kinds[i] < 2:
+            steps = "\n".join(f"  rw [{p}]" for p in premises[:4]) or "  simp"
+            return f"{kind} {short} {{α : Type*}} [CommRing α] (a b : α) :\n    a * b = b * a := by\n{steps}"
+        if kind == "structure" or kind == "inductive":
+            return f"{kind} {short} (α : Type*) where\n  val : α\n  prop : val = val"
+        return f"{kind} {short} {{α : Type*}} [Monoid α] : α → α :=\n  fun a => a * a"
+
+    def file_premises(self, f: int) -> Dict[int, List[str]]:
+        """
+        Premise names of every theorem/lemma of file `f`, by declaration index.
+
+        A pure function of (seed, f), drawn for the whole file at once.
+        """
+        start, stop = int(self._bounds[f]), int(self._bounds[f + 1])
+        theorems = start + np.flatnonzero(self.kinds[start:stop] < 2)  # theorem / lemma
+        rng = np.random.default_rng((self.seed, f))
+        # Heavy-tailed premise counts: E[floor(X * c)] + 1 = mean for X ~ Pareto(2.5)
+        scale = 1.5 * max(self.mean_premises - 0.5, 0.0)
+        counts = np.minimum((rng.pareto(2.5, len(theorems)) * scale).astype(np.int64) + 1, 200)
+        owner = np.repeat(theorems, counts)
+        source, r = rng.random(len(owner)), rng.random(len(owner))
+
+        # Foundational: a power law over all earlier declarations. Local:
+        # recent declarations, mostly from the same file. Else Lean core.
+        foundational = (owner * r ** 3).astype(np.int64)
+        local = np.maximum(0, owner - 1 - (-np.log1p(-r) * 30).astype(np.int64))
+        target = np.where(source < 0.45, foundational, local)
+        core = (source >= 0.9) | (owner == 0)
+        target[core] = -1 - (r[core] * len(CORE_NAMES)).astype(np.int64)
+        # A few recursive uses of the theorem itself
+        recursive = rng.random(len(theorems)) < 0.02
+
+        premises: Dict[int, List[str]] = {int(i): [] for i in theorems}
+        for i, j in zip(owner.tolist(), target.tolist()):
+            premises[i].append(self.name_of(j) if j >= 0 else CORE_NAMES[-1 - j])
+        for i in theorems[recursive].tolist():
+            premises[i].append(self.name_of(i))
+        return premises
+
+    def premises_of(self, i: int) -> List[str]:
+        """Premise names of declaration `i` (empty unless it is a theorem/lemma)."""
+        return self.file_premises(int(self._file_of[i])).get(i, [])
+
+    def get_traced_theorems(self) -> List[StubTracedTheorem]:
+        return [thm for tf in self.traced_files for thm in tf.get_traced_theorems()]
+
+
+def make_synthetic_repo(n_nodes: int, seed: int = 0, **kwargs) -> SyntheticTracedRepo:
+    """Synthetic repository with `n_nodes` declarations, see `SyntheticTracedRepo`."""
+    return SyntheticTracedRepo(n_nodes, seed=seed, **kwargs)
@@ -0,0 +1,30 @@
+"""
+Traced Theorem Stubs.
+
+The minimal LeanDojo-shaped theorem objects `GraphGenerator` reads
+(`TracedTheorem.theorem.full_name` and `.get_premise_full_names()`), shared
+by the stand-in traced repositories (`utils.synthetic`,
+`cache.trace_artifacts`).
+"""
+
+from typing import List
+
+
+class StubTheorem:
+    __slots__ = ("full_name",)
+
+    def __init__(self, full_name: str):
+        self.full_name = full_name
+
+
+class StubTracedTheorem:
+    """A traced theorem with a fixed premise list."""
+
+    __slots__ = ("theorem", "_premises")
+
+    def __init__(self, full_name: str, premises: List[str]):
+        self.theorem = StubTheorem(full_name)
+        self._premises = premises
+
+    def get_premise_full_names(self) -> List[str]:
+        return self._premises
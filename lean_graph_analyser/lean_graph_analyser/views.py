@@ -0,0 +1,259 @@
+"""
+Views Module
+============
+
+Lightweight subgraphs of a graph produced by `GraphGenerator`.
+
+A `SubgraphView` is a sorted array of parent vertex ids plus a reference to
+one shared `GraphViews`, which holds the parent's out/in CSR adjacency and
+lazily cached attribute columns. Creating a view allocates O(view size),
+never a copy of the parent graph, so thousands of them (one ego network
+per theorem, one per file, ...) stay cheap:
+
+    views = generator.views()
+    ego = views.ego("Mathlib.Foo.bar", hops=2)          # k-hop premises
+    views.group("file", "Mathlib/Algebra/Group/Basic.lean")
+    views.group("namespace", "Mathlib.Algebra", nested=True)
+
+Edges among the view's vertices are gathered from the CSR on demand, and a
+standalone `igraph.Graph` is only built by `materialize()`, copying just
+the view's vertices, its edges and the attributes asked for. `plot_graph`
+accepts views directly; metrics run on `view.materialize(())` (topology
+only), or restrict parent-level scores with `view.take(values)`.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import igraph as ig
+import numpy as np
+
+from lean_graph_analyser.attributes import CODED_COLUMNS, vertex_strings
+from lean_graph_analyser.cache.code_store import CodeStore
+from lean_graph_analyser.summaries import group_codes
+from lean_graph_analyser.utils.csr import csr_from_edges, edge_array, edge_tuples, gather_neighbors, sorted_unique
+
+DIRECTIONS = ("out", "in", "both")
+
+Vertex = Union[int, str]
+
+
+def _contains_sorted(values: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """Mask of `queries` present in the sorted array `values`."""
+    if len(values) == 0:
+        return np.zeros(len(queries), dtype=bool)
+    pos = np.searchsorted(values, queries)
+    return values[np.minimum(pos, len(values) - 1)] == queries
+
+
+class GraphViews:
+    """
+    Shared state of all views over one parent graph.
+
+    Args:
+        g: The parent graph. It must not be modified while views are in use.
+    """
+
+    def __init__(self, g: ig.Graph):
+        self.g = g
+        self.n = g.vcount()
+        self.ecount = g.ecount()
+        edges = edge_array(g)
+        self.out_ptr, self.out_idx = csr_from_edges(self.n, edges)
+        self.in_ptr, self.in_idx = csr_from_edges(self.n, edges[:, ::-1])
+        self._columns: Dict[str, np.ndarray] = {}
+        self._ids: Optional[Dict[str, int]] = None
+        # level -> (labels, member CSR over groups)
+        self._groups: Dict[str, Tuple[List[str], np.ndarray, np.ndarray]] = {}
+
+    def is_current(self, g: ig.Graph) -> bool:
+        """False once `g` is another graph or was patched since the views were built."""
+        return g is self.g and g.vcount() == self.n and g.ecount() == self.ecount
+
+    def column(self, attribute: str) -> np.ndarray:
+        """
+        Vertex attribute of the parent as an object array, read once. Coded
+        string attributes ("file_path", "kind", ...) are resolved here.
+        """
+        column = self._columns.get(attribute)
+        if column is None:
+            column = np.empty(self.n, dtype=object)
+            column[:] = vertex_strings(self.g, attribute)
+            self._columns[attribute] = column
+        return column
+
+    def vid(self, v: Vertex) -> int:
+        if isinstance(v, str):
+            if self._ids is None:
+                self._ids = {name: i for i, name in enumerate(self.column("name").tolist())}
+            return self._ids[v]
+        vid = int(v)
+        if not 0 <= vid < self.n:
+            raise IndexError(f"Vertex id {vid} out of range for {self.n} vertices")
+        return vid
+
+    def _neighbors(self, vertices: np.ndarray, direction: str) -> np.ndarray:
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown direction {direction!r}, expected one of {DIRECTIONS}")
+        parts = []
+        if direction in ("out", "both"):
+            parts.append(gather_neighbors(self.out_ptr, self.out_idx, vertices))
+        if direction in ("in", "both"):
+            parts.append(gather_neighbors(self.in_ptr, self.in_idx, vertices))
+        return sorted_unique(np.concatenate(parts))
+
+    # ==========================================
+    # View Constructors
+    # ==========================================
+
+    def view(self, vertices: Iterable[Vertex]) -> "SubgraphView":
+        """View of an arbitrary vertex set (ids or names)."""
+        vids = np.fromiter((self.vid(v) for v in vertices), dtype=np.int32)
+        return SubgraphView(self, sorted_unique(vids))
+
+    def ego(
+        self,
+        center: Union[Vertex, Sequence[Vertex]],
+        hops: int = 1,
+        direction: str = "out",
+        max_vertices: Optional[int] = None,
+    ) -> "SubgraphView":
+        """
+        k-hop neighborhood of one or several vertices by CSR frontier expansion.
+
+        Args:
+            center: Vertex, or vertices, at distance 0.
+            hops: Number of expansion steps.
+            direction: "out" (premises), "in" (dependents) or "both".
+            max_vertices: Stop expanding once the view holds this many
+                vertices (the last frontier is kept whole).
+
+        Only the visited set is touched, as a sorted array, so the cost is
+        proportional to the neighborhood, not to the parent graph. The hop
+        distance of every vertex is kept in `view.distances`.
+        """
+        centers = [center] if isinstance(center, (int, str, np.integer)) else list(center)
+        frontier = sorted_unique(np.array([self.vid(v) for v in centers], dtype=np.int32))
+        visited, levels = frontier, [frontier]
+        for _ in range(hops):
+            if max_vertices is not None and len(visited) >= max_vertices:
+                break
+            nbrs = self._neighbors(frontier, direction)
+            frontier = nbrs[~_contains_sorted(visited, nbrs)]
+            if len(frontier) == 0:
+                break
+            visited = np.sort(np.concatenate([visited, frontier]))
+            levels.append(frontier)
+
+        hop = np.concatenate([np.full(len(level), d, dtype=np.int32) for d, level in enumerate(levels)])
+        order = np.argsort(np.concatenate(levels), kind="stable")
+        return SubgraphView(self, visited, distances=hop[order])
+
+    def group(self, level: str, label: str, nested: bool = False) -> "SubgraphView":
+        """
+        Induced view of one group of a summary level ("file", "module" or
+        "namespace", see `summaries`). With `nested`, groups whose label
+        extends `label` by ".<...>" or "/<...>" are included too (sub-namespaces,
+        sub-modules, files under a directory).
+        """
+        if level not in self._groups:
+            membership, labels = group_codes(self.g, level)
+            members = np.column_stack([membership, np.arange(self.n, dtype=np.int32)])
+            self._groups[level] = (labels, *csr_from_edges(len(labels), members))
+        labels, ptr, idx = self._groups[level]
+        selected = [
+            i for i, name in enumerate(labels)
+            if name == label or (nested and name.startswith((label + ".", label + "/")))
+        ]
+        if not selected:
+            raise KeyError(f"No {level} group {label!r}")
+        vertices = gather_neighbors(ptr, idx, np.array(selected, dtype=np.int64))
+        return SubgraphView(self, np.sort(vertices))
+
+
+class SubgraphView:
+    """
+    A vertex subset of a parent graph and the edges among it.
+
+    `vertices` are sorted parent ids; local vertex i of the view (and of its
+    materialized graph) is parent vertex `vertices[i]`.
+    """
+
+    def __init__(self, base: GraphViews, vertices: np.ndarray, distances: Optional[np.ndarray] = None):
+        self.base = base
+        self.vertices = vertices
+        self.distances = distances
+        self._edges: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.vertices)
+
+    def vcount(self) -> int:
+        return len(self.vertices)
+
+    def ecount(self) -> int:
+        return len(self.edges())
+
+    def __contains__(self, v: Vertex) -> bool:
+        return bool(_contains_sorted(self.vertices, np.array([self.base.vid(v)]))[0])
+
+    def local_ids(self, parent_ids: Sequence[int]) -> np.ndarray:
+        """Local ids of parent vertices (which must be in the view)."""
+        return np.searchsorted(self.vertices, np.asarray(parent_ids))
+
+    def edges(self) -> np.ndarray:
+        """(m, 2) int32 edges among the view's vertices, in local ids."""
+        if self._edges is None:
+            base = self.base
+            counts = base.out_ptr[self.vertices + 1] - base.out_ptr[self.vertices]
+            sources = np.repeat(np.arange(len(self.vertices), dtype=np.int32), counts)
+            targets = gather_neighbors(base.out_ptr, base.out_idx, self.vertices)
+            inside = _contains_sorted(self.vertices, targets)
+            self._edges = np.column_stack(
+                [sources[inside], np.searchsorted(self.vertices, targets[inside])]
+            ).astype(np.int32)
+        return self._edges
+
+    def names(self) -> List[str]:
+        return self.attribute("name")
+
+    def attribute(self, attribute: str) -> List[Any]:
+        """Values of a parent vertex attribute for the view's vertices."""
+        return self.base.column(attribute)[self.vertices].tolist()
+
+    def take(self, values: np.ndarray) -> np.ndarray:
+        """Restricts a parent-indexed array (e.g. global metric scores) to the view."""
+        return np.asarray(values)[self.vertices]
+
+    def code_store(self, store: CodeStore) -> "ViewCodeStore":
+        """`store` addressed by local ids, e.g. for `plot_graph(view, code_store=...)`."""
+        return ViewCodeStore(store, self.vertices)
+
+    def materialize(self, attributes: Optional[Sequence[str]] = None) -> ig.Graph:
+        """
+        Standalone graph of the view: its vertices (in local id order), its
+        edges, and the given vertex attributes (default: all of the parent's).
+        Coded columns keep their codes and bring the parent's string tables.
+        """
+        parent = self.base.g
+        g = ig.Graph(n=len(self.vertices), edges=edge_tuples(self.edges()), directed=parent.is_directed())
+        if attributes is None:
+            attributes = parent.vs.attributes()
+        for attribute in attributes:
+            g.vs[attribute] = self.attribute(attribute)
+            if attribute in CODED_COLUMNS and CODED_COLUMNS[attribute] in parent.attributes():
+                g[CODED_COLUMNS[attribute]] = parent[CODED_COLUMNS[attribute]]
+        return g
+
+
+class ViewCodeStore:
+    """Read access to a `CodeStore` through a view's local vertex ids."""
+
+    def __init__(self, store: CodeStore, vertices: np.ndarray):
+        self.store = store
+        self.vertices = vertices
+
+    def get(self, vid: int) -> str:
+        return self.store.get(int(self.vertices[vid]))
+
+    def get_many(self, vids: Iterable[int]) -> List[str]:
+        return [self.get(v) for v in vids]
@@ -0,0 +1,45 @@
+import igraph as ig
+import numpy as np
+import pytest
+
+from lean_graph_analyser.metrics.engine import MetricEngine
+from lean_graph_analyser.metrics.sampled import sampled_betweenness
+
+
+def _random_dag_with_cycles(n: int = 60, m: int = 240, seed: int = 0) -> ig.Graph:
+    rng = np.random.default_rng(seed)
+    edges = rng.integers(0, n, size=(m, 2))
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    g = ig.Graph(n=n, edges=edges.tolist(), directed=True)
+    g.simplify()
+    return g
+
+
+@pytest.mark.parametrize("cutoff", [1, 2, 3, None])
+def test_all_pivots_match_exact_betweenness(cutoff):
+    g = _random_dag_with_cycles()
+    estimate = sampled_betweenness(g, n_pivots=g.vcount(), cutoff=cutoff)
+    exact = np.asarray(g.betweenness(directed=True, cutoff=cutoff))
+    np.testing.assert_allclose(estimate.values, exact, atol=1e-9)
+    np.testing.assert_allclose(estimate.stderr, 0.0, atol=1e-9)
+
+
+def test_workers_match_serial():
+    g = _random_dag_with_cycles()
+    serial = sampled_betweenness(g, n_pivots=20, cutoff=3)
+    parallel = sampled_betweenness(g, n_pivots=20, cutoff=3, workers=2)
+    np.testing.assert_allclose(parallel.values, serial.values)
+
+
+def test_engine_cutoff_and_cache_key_ignores_workers(tmp_path):
+    g = _random_dag_with_cycles()
+    values = MetricEngine(g, cache_dir=str(tmp_path), workers=1).get("sampled_betweenness", n_pivots=g.vcount(), cutoff=3)
+    np.testing.assert_allclose(values, g.betweenness(directed=True, cutoff=3), atol=1e-9)
+
+    engine = MetricEngine(g, cache_dir=str(tmp_path), workers=2)
+    with pytest.raises(ValueError):
+        engine.get("sampled_betweenness", workers=2)
+    # Same parameters, other worker count: served from the on-disk cache
+    cached = list((tmp_path / engine.fingerprint).iterdir())
+    np.testing.assert_array_equal(engine.get("sampled_betweenness", n_pivots=g.vcount(), cutoff=3), values)
+    assert list((tmp_path / engine.fingerprint).iterdir()) == cached